@@ -1,6 +1,4 @@
 import time
-import numpy as np
-from dataclasses import asdict
 from collections import Counter
 
 from sklearn.metrics import (
@@ -104,13 +102,8 @@ class Evaluation:
     # HYBRID PREDICTION
     def predict_hybrid(self, host_features, flow_features):
 
-        host_bin_f, flow_bin_f, host_multi_f, flow_multi_f = \
-            self.preprocessor.transform(host_features, flow_features)
-
-        host_bin_array = np.array(list(asdict(host_bin_f).values())).reshape(1, -1)
-        flow_bin_array = np.array(list(asdict(flow_bin_f).values())).reshape(1, -1)
-        host_multi_array = np.array(list(asdict(host_multi_f).values())).reshape(1, -1)
-        flow_multi_array = np.array(list(asdict(flow_multi_f).values())).reshape(1, -1)
+        host_bin_array, flow_bin_array, host_multi_array, flow_multi_array = \
+            self.preprocessor.transform_rows([(host_features, flow_features)])
 
         host_bin_output = BinaryModelOutput.from_proba(
             self.host_bin.predict_proba(host_bin_array)[0]
@@ -0,0 +1,8 @@
+from enum import Enum
+
+
+class EvictionPolicy(Enum):
+    # entity lâu nhất không có packet
+    LRU = "lru"
+    # entity ít packet nhất trong vài entity LRU nhất
+    LEAST_PACKETS = "least_packets"
@@ -1,14 +1,55 @@
 from dataclasses import dataclass
+from typing import Union
+
 from NetworkReader.Data.Enums.L4Protocol import L4Protocol
 from NetworkReader.Data.Enums.Direction import Direction
 
 @dataclass(frozen=True, slots=True)
 class FlowKey:
-    src_ip: str
-    dst_ip: str
+    # int trong pipeline khi parser chạy với int_ips=True; feature vector luôn là string
+    src_ip: Union[str, int]
+    dst_ip: Union[str, int]
     dst_port: int
     protocol: L4Protocol
     direction: Direction
 
     def __str__(self) -> str:
         return f"{self.direction.name}: {self.src_ip} → {self.dst_ip}:{self.dst_port}/{self.protocol}"
+
+    @classmethod
+    def from_packed(cls, key: int) -> "FlowKey":
+        """Inverse of pack_flow_key (IP giữ dạng int)."""
+        direction = Direction.FORWARD if key & 1 else Direction.BACKWARD
+        key >>= 1
+        protocol = L4Protocol(key & 0xFF)
+        key >>= 8
+        dst_port = key & 0xFFFF
+        key >>= 16
+        return cls(
+            src_ip=key >> 32,
+            dst_ip=key & 0xFFFFFFFF,
+            dst_port=dst_port,
+            protocol=protocol,
+            direction=direction,
+        )
+
+
+def pack_flow_key(pkt) -> int:
+    """
+    Flow key dạng một int: src(32) | dst(32) | dst_port(16) | protocol(8) | forward(1).
+
+    Cần IP dạng int (PacketParserService(int_ips=True)). Hash một int rẻ hơn
+    nhiều so với hash dataclass (tuple str / int / Enum).
+    IP dạng string → ValueError ngay packet đầu tiên.
+    """
+    try:
+        return (
+            ((((pkt.src_ip << 32 | pkt.dst_ip) << 16 | pkt.dst_port) << 8
+              | pkt.protocol.value) << 1)
+            | (pkt.direction > 0)
+        )
+    except TypeError:
+        raise ValueError(
+            f"packed_keys needs integer IPs, got {type(pkt.src_ip).__name__} "
+            "(use PacketParserService(int_ips=True))"
+        ) from None
@@ -1,12 +1,14 @@
 from dataclasses import dataclass
+from typing import Union
+
 from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey
 
 @dataclass(frozen=True, slots=True)
 class FlowSlidingWindowSnapshot:
 
 
-    # identity
-    flow_key: FlowKey
+    # identity (int từ pack_flow_key khi window chạy với packed_keys=True)
+    flow_key: Union[FlowKey, int]
 
     # window
     window_start: float
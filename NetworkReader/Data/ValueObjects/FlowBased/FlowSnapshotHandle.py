@@ -0,0 +1,126 @@
+from typing import Union
+
+from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey
+from NetworkReader.Data.ValueObjects.FlowBased.FlowSlidingWindowSnapshot import (
+    FlowSlidingWindowSnapshot
+)
+from NetworkReader.Data.ValueObjects.FlowBased.FlowStats import FlowStats
+
+
+class FlowSnapshotHandle:
+    """
+    Snapshot lazy của một flow window: cùng field với
+    FlowSlidingWindowSnapshot nhưng đọc thẳng FlowStats đang chạy, field
+    dẫn xuất (rate, variance, ratio) chỉ được tính khi consumer đọc.
+
+    Handle chỉ đúng tới lần update kế tiếp của flow (stats bị sửa tại
+    chỗ); cần giữ lâu hơn thì gọi materialize().
+    """
+
+    __slots__ = ("flow_key", "window_start", "window_end", "_stats")
+
+    def __init__(
+        self,
+        flow_key: Union[FlowKey, int],
+        stats: FlowStats,
+        window_start: float,
+        window_end: float,
+    ):
+        self.flow_key = flow_key
+        self.window_start = window_start
+        self.window_end = window_end
+        self._stats = stats
+
+    @property
+    def window_duration(self) -> float:
+        return self.window_end - self.window_start
+
+    @property
+    def packet_count(self) -> int:
+        return self._stats.total_packets
+
+    @property
+    def byte_count(self) -> int:
+        return self._stats.total_bytes
+
+    @property
+    def packets_per_sec(self) -> float:
+        duration = self.window_end - self.window_start
+        return self._stats.total_packets / duration if duration > 0 else 0.0
+
+    @property
+    def bytes_per_sec(self) -> float:
+        duration = self.window_end - self.window_start
+        return self._stats.total_bytes / duration if duration > 0 else 0.0
+
+    @property
+    def flow_duration(self) -> float:
+        return self._stats.last_seen - self._stats.first_seen
+
+    @property
+    def inter_arrival_mean(self) -> float:
+        return self._stats.inter_arrival_mean
+
+    @property
+    def inter_arrival_variance(self) -> float:
+        stats = self._stats
+        if stats.inter_arrival_count > 1:
+            return stats.inter_arrival_m2 / (stats.inter_arrival_count - 1)
+        return 0.0
+
+    @property
+    def protocol(self) -> int:
+        return self._stats.protocol
+
+    @property
+    def syn_count(self) -> int:
+        return self._stats.syn_count
+
+    @property
+    def ack_count(self) -> int:
+        return self._stats.ack_count
+
+    @property
+    def rst_count(self) -> int:
+        return self._stats.rst_count
+
+    @property
+    def fin_count(self) -> int:
+        return self._stats.fin_count
+
+    @property
+    def syn_ratio(self) -> float:
+        stats = self._stats
+        return stats.syn_count / stats.total_packets if stats.total_packets > 0 else 0.0
+
+    @property
+    def rst_ratio(self) -> float:
+        stats = self._stats
+        return stats.rst_count / stats.total_packets if stats.total_packets > 0 else 0.0
+
+    def materialize(self) -> FlowSlidingWindowSnapshot:
+        """Frozen snapshot của window tại thời điểm gọi."""
+        return FlowSlidingWindowSnapshot(
+            flow_key=self.flow_key,
+            window_start=self.window_start,
+            window_end=self.window_end,
+            window_duration=self.window_duration,
+
+            packet_count=self.packet_count,
+            byte_count=self.byte_count,
+            packets_per_sec=self.packets_per_sec,
+            bytes_per_sec=self.bytes_per_sec,
+
+            flow_duration=self.flow_duration,
+            inter_arrival_mean=self.inter_arrival_mean,
+            inter_arrival_variance=self.inter_arrival_variance,
+
+            syn_count=self.syn_count,
+            ack_count=self.ack_count,
+            rst_count=self.rst_count,
+            fin_count=self.fin_count,
+
+            syn_ratio=self.syn_ratio,
+            rst_ratio=self.rst_ratio,
+            protocol=self.protocol,
+        )
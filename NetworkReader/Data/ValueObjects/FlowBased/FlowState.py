@@ -0,0 +1,16 @@
+from dataclasses import dataclass, field
+
+from NetworkReader.Data.ValueObjects.FlowBased.FlowStats import FlowStats
+from NetworkReader.Data.ValueObjects.WindowBuffer import FlowWindowBuffer
+
+
+@dataclass(slots=True)
+class FlowState:
+    """
+    Toàn bộ state của một flow trong PacketStateEngine (một dict entry):
+    lifetime stats (FlowTableService) + sliding window (FlowSlidingWindowService).
+    """
+    table: FlowStats
+    window: FlowStats
+    buffer: FlowWindowBuffer = field(default_factory=FlowWindowBuffer)
+    last_emit_ts: float = 0.0
@@ -1,5 +1,6 @@
 from dataclasses import dataclass
+from typing import Union
 
 @dataclass(frozen=True, slots=True)
 class HostKey:
-    src_ip: str
+    src_ip: Union[str, int]
@@ -0,0 +1,222 @@
+import math
+from abc import ABC, abstractmethod
+from typing import Dict, Optional, Union
+
+from NetworkReader.Data.ValueObjects.HostBased.HostSlidingWindowSnapshot import HostSlidingWindowSnapshot
+from NetworkReader.Data.ValueObjects.HostBased.HostStats import HostStats
+from NetworkReader.Data.ValueObjects.HostBased.HostWindowStats import HostWindowStats
+
+
+def port_entropy(port_counter: Dict[int, int]) -> float:
+    """Shannon entropy (bit) của phân bố dst port."""
+    total = sum(port_counter.values())
+    if total == 0:
+        return 0.0
+    entropy = 0.0
+    for cnt in port_counter.values():
+        p = cnt / total
+        entropy -= p * math.log2(p)
+    return entropy
+
+
+class HostSnapshotHandle(ABC):
+    """
+    Snapshot lazy của một host window: cùng field với
+    HostSlidingWindowSnapshot, field dẫn xuất chỉ được tính khi consumer
+    đọc. port_entropy được memoize trong handle (tick mode dùng chung
+    một handle host cho mọi flow của host đó).
+
+    Handle chỉ đúng tới lần update kế tiếp của host; cần giữ lâu hơn
+    thì gọi materialize(). Subclass đọc HostWindowStats (incremental)
+    hoặc HostStats (rebuild) và cài các field phụ thuộc loại stats
+    (abstract bên dưới).
+    """
+
+    __slots__ = ("src_ip", "window_start", "window_end", "_stats", "_port_entropy")
+
+    def __init__(
+        self,
+        src_ip: Union[str, int],
+        stats: Union[HostWindowStats, HostStats],
+        window_start: float,
+        window_end: float,
+    ):
+        self.src_ip = src_ip
+        self.window_start = window_start
+        self.window_end = window_end
+        self._stats = stats
+        self._port_entropy: Optional[float] = None
+
+    @property
+    def window_duration(self) -> float:
+        return self.window_end - self.window_start
+
+    @property
+    def packet_count(self) -> int:
+        return self._stats.total_packets
+
+    @property
+    def byte_count(self) -> int:
+        return self._stats.total_bytes
+
+    @property
+    def packets_per_sec(self) -> float:
+        duration = self.window_end - self.window_start
+        return self._stats.total_packets / duration if duration > 0 else 0.0
+
+    @property
+    def port_entropy(self) -> float:
+        if self._port_entropy is None:
+            self._port_entropy = self._compute_port_entropy()
+        return self._port_entropy
+
+    @property
+    def connection_rate(self) -> float:
+        duration = self.window_end - self.window_start
+        return self.connection_attempts / duration if duration > 0 else 0.0
+
+    @property
+    def syn_count(self) -> int:
+        return self._stats.syn_count
+
+    @property
+    def ack_count(self) -> int:
+        return self._stats.ack_count
+
+    @property
+    def rst_count(self) -> int:
+        return self._stats.rst_count
+
+    @property
+    def syn_only_ratio(self) -> float:
+        stats = self._stats
+        return stats.syn_only_count / stats.syn_count if stats.syn_count > 0 else 0.0
+
+    @property
+    @abstractmethod
+    def unique_dst_ips(self) -> int:
+        ...
+
+    @property
+    @abstractmethod
+    def unique_dst_ports(self) -> int:
+        ...
+
+    @property
+    @abstractmethod
+    def connection_attempts(self) -> int:
+        ...
+
+    @property
+    @abstractmethod
+    def failed_connection_ratio(self) -> float:
+        ...
+
+    @property
+    @abstractmethod
+    def mean_flow_duration(self) -> float:
+        ...
+
+    @abstractmethod
+    def _compute_port_entropy(self) -> float:
+        """Entropy dst port của window, gọi tối đa một lần mỗi handle."""
+        ...
+
+    def materialize(self) -> HostSlidingWindowSnapshot:
+        """Frozen snapshot của window tại thời điểm gọi."""
+        return HostSlidingWindowSnapshot(
+            src_ip=self.src_ip,
+
+            window_start=self.window_start,
+            window_end=self.window_end,
+            window_duration=self.window_duration,
+
+            packet_count=self.packet_count,
+            byte_count=self.byte_count,
+            packets_per_sec=self.packets_per_sec,
+
+            unique_dst_ips=self.unique_dst_ips,
+            unique_dst_ports=self.unique_dst_ports,
+            port_entropy=self.port_entropy,
+
+            connection_attempts=self.connection_attempts,
+            connection_rate=self.connection_rate,
+            failed_connection_ratio=self.failed_connection_ratio,
+
+            syn_count=self.syn_count,
+            ack_count=self.ack_count,
+            rst_count=self.rst_count,
+            syn_only_ratio=self.syn_only_ratio,
+
+            mean_flow_duration=self.mean_flow_duration,
+        )
+
+
+class HostWindowHandle(HostSnapshotHandle):
+    """Handle trên HostWindowStats (incremental window)."""
+
+    __slots__ = ()
+
+    @property
+    def unique_dst_ips(self) -> int:
+        return len(self._stats.dst_ip_refs)
+
+    @property
+    def unique_dst_ports(self) -> int:
+        return len(self._stats.dst_port_refs)
+
+    @property
+    def connection_attempts(self) -> int:
+        return self._stats.syn_only_count
+
+    @property
+    def failed_connection_ratio(self) -> float:
+        stats = self._stats
+        if stats.syn_only_count == 0:
+            return 0.0
+        unmatched_rst = 0
+        if stats.balance_max:
+            unmatched_rst = max(0, stats.balance_max[0][1] - stats.rst_syn_base)
+        return (stats.rst_count - unmatched_rst) / stats.syn_only_count
+
+    @property
+    def mean_flow_duration(self) -> float:
+        stats = self._stats
+        return stats.close_offset_sum / stats.flow_count if stats.flow_count > 0 else 0.0
+
+    def _compute_port_entropy(self) -> float:
+        # H = log2(N) - Σ c·log2(c) / N, giữ liên tục trong HostWindowStats
+        n = self._stats.total_packets
+        if n == 0:
+            return 0.0
+        return max(0.0, math.log2(n) - self._stats.port_clogc_sum / n)
+
+
+class HostStatsHandle(HostSnapshotHandle):
+    """Handle trên HostStats dựng lại từ buffer (rebuild path)."""
+
+    __slots__ = ()
+
+    @property
+    def unique_dst_ips(self) -> int:
+        return len(self._stats.distinct_dst_ips)
+
+    @property
+    def unique_dst_ports(self) -> int:
+        return len(self._stats.distinct_dst_ports)
+
+    @property
+    def connection_attempts(self) -> int:
+        return self._stats.conn_attempts
+
+    @property
+    def failed_connection_ratio(self) -> float:
+        stats = self._stats
+        return stats.failed_conn / stats.conn_attempts if stats.conn_attempts > 0 else 0.0
+
+    @property
+    def mean_flow_duration(self) -> float:
+        return self._stats.flow_duration_mean
+
+    def _compute_port_entropy(self) -> float:
+        return port_entropy(self._stats.dst_port_counter)
@@ -0,0 +1,16 @@
+from dataclasses import dataclass, field
+
+from NetworkReader.Data.ValueObjects.HostBased.HostStats import HostStats
+from NetworkReader.Data.ValueObjects.HostBased.HostWindowStats import HostWindowStats
+from NetworkReader.Data.ValueObjects.WindowBuffer import HostWindowBuffer
+
+
+@dataclass(slots=True)
+class HostState:
+    """
+    Toàn bộ state của một host trong PacketStateEngine (một dict entry):
+    lifetime stats (HostBehaviorService) + sliding window (HostSlidingWindowService).
+    """
+    behavior: HostStats
+    window: HostWindowStats
+    buffer: HostWindowBuffer = field(default_factory=HostWindowBuffer)
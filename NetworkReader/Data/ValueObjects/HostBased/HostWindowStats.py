@@ -0,0 +1,43 @@
+from collections import deque
+from dataclasses import dataclass, field
+
+
+@dataclass(slots=True)
+class HostWindowStats:
+    """
+    Running aggregates of one host sliding window (incremental mode).
+
+    Mọi field đều cộng khi packet vào window và trừ khi packet hết hạn,
+    nên không cần rebuild từ buffer.
+    """
+    first_seen: float
+    last_seen: float
+
+    total_packets: int = 0
+    total_bytes: int = 0
+
+    # fan-out (reference-counted multisets)
+    dst_ip_refs: dict[str, int] = field(default_factory=dict)
+    dst_port_refs: dict[int, int] = field(default_factory=dict)
+
+    # port entropy: H = log2(N) - Σ c·log2(c) / N
+    port_clogc_sum: float = 0.0
+
+    # TCP behavior
+    syn_count: int = 0
+    syn_only_count: int = 0
+    ack_count: int = 0
+    rst_count: int = 0
+    fin_count: int = 0
+
+    # failed connections = RST khớp với SYN-only đứng trước trong window.
+    # unmatched RST = max prefix của (rst - syn_only), giữ bằng monotonic deque.
+    rst_syn_balance: int = 0
+    rst_syn_base: int = 0
+    appended_seq: int = 0
+    evicted_seq: int = 0
+    balance_max: deque = field(default_factory=deque)
+
+    # flow duration: Σ (close_ts - first_seen) của packet FIN/RST
+    close_offset_sum: float = 0.0
+    flow_count: int = 0
@@ -0,0 +1,22 @@
+import numpy as np
+
+# Một packet đã parse = một row; cùng ý nghĩa với PacketMeta nhưng dạng cột.
+# src_ip / dst_ip: IPv4 dạng uint32 (host order), dst_port: port phía remote
+# giống PacketMeta.dst_port, direction: Direction.value (1 / -1),
+# tcp_flags: byte flags TCP gốc (FIN 0x01, SYN 0x02, RST 0x04, ACK 0x10), 0 với UDP.
+PACKET_DTYPE = np.dtype([
+    ("timestamp", np.float64),
+    ("src_ip", np.uint32),
+    ("dst_ip", np.uint32),
+    ("src_port", np.uint16),
+    ("dst_port", np.uint16),
+    ("protocol", np.uint8),
+    ("direction", np.int8),
+    ("tcp_flags", np.uint8),
+    ("packet_size", np.uint16),
+])
+
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_ACK = 0x10
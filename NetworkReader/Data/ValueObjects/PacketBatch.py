@@ -0,0 +1,14 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+
+@dataclass(slots=True)
+class PacketBatch:
+    # (raw IPv4 buffer, timestamp); buffer có thể là memoryview vào buffer pool
+    packets: List[Tuple[object, float]]
+
+    # slot của buffer pool đang giữ các packet (None nếu backend không dùng pool)
+    slot_ids: Optional[List[int]] = field(default=None)
+
+    def __len__(self) -> int:
+        return len(self.packets)
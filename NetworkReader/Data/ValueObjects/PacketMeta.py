@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Optional, Union
 from NetworkReader.Data.Enums.L4Protocol import L4Protocol
 from NetworkReader.Data.Enums.Direction import Direction
 
@@ -9,9 +9,10 @@ class PacketMeta:
     timestamp: float
     direction: Direction
 
-    src_ip: str
+    # dotted string, hoặc int khi parser chạy với int_ips=True
+    src_ip: Union[str, int]
     src_port: int
-    dst_ip: str
+    dst_ip: Union[str, int]
     dst_port: int
     protocol: L4Protocol
 
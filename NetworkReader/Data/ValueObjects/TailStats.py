@@ -0,0 +1,35 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class TailStats:
+    """
+    Aggregate chung của các entity bị bỏ khỏi table (evict khi đầy, hoặc
+    expire khi quá nhỏ): mất chi tiết từng entity nhưng flood vẫn thấy được.
+    """
+    entities: int = 0
+    total_packets: int = 0
+    total_bytes: int = 0
+
+    syn_count: int = 0
+    ack_count: int = 0
+    rst_count: int = 0
+    fin_count: int = 0
+
+    first_seen: float | None = None
+    last_seen: float | None = None
+
+    def add(self, stats) -> None:
+        """Cộng lifetime stats (FlowStats / HostStats) của một entity."""
+        self.entities += 1
+        self.total_packets += stats.total_packets
+        self.total_bytes += stats.total_bytes
+        self.syn_count += stats.syn_count
+        self.ack_count += stats.ack_count
+        self.rst_count += stats.rst_count
+        self.fin_count += stats.fin_count
+
+        if self.first_seen is None or stats.first_seen < self.first_seen:
+            self.first_seen = stats.first_seen
+        if self.last_seen is None or stats.last_seen > self.last_seen:
+            self.last_seen = stats.last_seen
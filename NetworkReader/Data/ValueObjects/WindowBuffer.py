@@ -0,0 +1,184 @@
+from array import array
+from typing import Optional, Tuple
+
+from NetworkReader.Data.Enums.Direction import Direction
+from NetworkReader.Data.ValueObjects.PacketArray import TCP_ACK, TCP_FIN, TCP_RST, TCP_SYN
+
+# flag mask của một packet trong window: TCP flags (bit gốc) + direction
+WINDOW_FORWARD = 0x80
+
+# một phần tử 0 mỗi typecode; column mới = template * capacity (nhanh hơn array(bytes))
+_ZERO = {typecode: array(typecode, [0]) for typecode in ("d", "H", "B", "I")}
+
+
+def _column(typecode: Optional[str], capacity: int, compact: bool):
+    """Cột ring: array typecode khi compact, list khi không (hoặc typecode None)."""
+    if typecode is None:
+        return [None] * capacity
+    if compact:
+        return _ZERO[typecode] * capacity
+    return [_ZERO[typecode][0]] * capacity
+
+
+def window_flags(pkt) -> int:
+    """Flag mask cho PacketMeta (UDP: flags None → 0)."""
+    flags = WINDOW_FORWARD if pkt.direction == Direction.FORWARD else 0
+    if pkt.syn:
+        flags |= TCP_SYN
+    if pkt.ack:
+        flags |= TCP_ACK
+    if pkt.rst:
+        flags |= TCP_RST
+    if pkt.fin:
+        flags |= TCP_FIN
+    return flags
+
+
+class FlowWindowBuffer:
+    """
+    Buffer sliding window của một flow: ring các cột song song (timestamp,
+    size, flag mask) thay vì một PacketMeta mỗi packet.
+
+    compact=True (mặc định): cột array (float64, uint32, uint8), 13 byte mỗi
+    packet. size là uint32 vì với MSG_TRUNC packet_size là độ dài frame
+    thật, có thể vượt 65535. compact=False: cột list, ~5-8x tốn bộ nhớ hơn
+    array nhưng append nhanh hơn (không box/unbox mỗi lần đọc ghi cột).
+
+    Capacity là lũy thừa của 2, đầy thì gấp đôi. append(..., window_start)
+    bỏ luôn các packet hết hạn (timestamp < window_start) trong cùng lần
+    gọi và trả về số packet đã bỏ: head dời một lần, first_ts đọc lại một
+    lần. Packet vừa bỏ vẫn nằm nguyên ở n slot ngay trước head tới lần
+    append kế tiếp → caller đọc thẳng cột (index (head - n + k) & mask) để
+    trừ aggregate, không tạo tuple nào.
+    head / tail là counter tăng dần (index = counter & mask).
+    first_ts: timestamp packet cũ nhất.
+    """
+
+    __slots__ = ("timestamps", "sizes", "flags", "first_ts", "head", "_tail", "mask", "compact")
+
+    def __init__(self, capacity: int = 4, compact: bool = True):
+        capacity = 1 << max(capacity - 1, 0).bit_length()
+        self.compact = compact
+        self.timestamps = _column("d", capacity, compact)
+        self.sizes = _column("I", capacity, compact)
+        self.flags = _column("B", capacity, compact)
+        self.first_ts = 0.0
+        self.head = 0
+        self._tail = 0
+        self.mask = capacity - 1
+
+    def __len__(self) -> int:
+        return self._tail - self.head
+
+    @property
+    def capacity(self) -> int:
+        return self.mask + 1
+
+    def timestamp_at(self, offset: int = 0) -> float:
+        """Timestamp packet thứ offset tính từ packet cũ nhất."""
+        return self.timestamps[(self.head + offset) & self.mask]
+
+    def append(self, ts: float, size: int, flags: int, window_start: Optional[float] = None) -> int:
+        """Thêm packet; có window_start thì evict luôn, trả về số packet đã evict."""
+        tail = self._tail
+        if tail == self.head:
+            self.first_ts = ts
+        elif tail - self.head > self.mask:
+            self._grow()
+            tail = self._tail
+        i = tail & self.mask
+        self.timestamps[i] = ts
+        self.sizes[i] = size
+        self.flags[i] = flags
+        self._tail = tail + 1
+        if window_start is None or self.first_ts >= window_start:
+            return 0
+        return self._evict(window_start)
+
+    def _evict(self, window_start: float) -> int:
+        # gọi khi packet cũ nhất đã hết hạn; packet vừa thêm thì không bao
+        # giờ hết hạn (ts > window_start) nên vòng lặp dừng trước tail
+        timestamps = self.timestamps
+        mask = self.mask
+        start = self.head
+        head = start + 1
+        tail = self._tail
+        while head < tail and timestamps[head & mask] < window_start:
+            head += 1
+        self.head = head
+        self.first_ts = timestamps[head & mask]
+        return head - start
+
+    def popleft(self) -> Tuple[float, int, int]:
+        """Bỏ packet cũ nhất, trả về (timestamp, size, flags)."""
+        mask = self.mask
+        head = self.head
+        i = head & mask
+        self.head = head + 1
+        # buffer rỗng: first_ts là rác, append kế tiếp ghi lại
+        self.first_ts = self.timestamps[(head + 1) & mask]
+        return self.timestamps[i], self.sizes[i], self.flags[i]
+
+    def _columns(self) -> Tuple[str, ...]:
+        return ("timestamps", "sizes", "flags")
+
+    def _grow(self) -> None:
+        # xoay cột để packet cũ nhất về index 0, rồi gấp đôi
+        h = self.head & self.mask
+        for name in self._columns():
+            column = getattr(self, name)
+            setattr(self, name, (column[h:] + column[:h]) * 2)
+        self._tail -= self.head
+        self.head = 0
+        self.mask = 2 * self.mask + 1
+
+
+class HostWindowBuffer(FlowWindowBuffer):
+    """
+    FlowWindowBuffer thêm cột dst_ip và port (port phía remote, xem
+    HostSlidingWindowService._host_dst_port). dst_ip là cột uint32 khi
+    IP dạng int, list khi IP là string (chọn theo packet đầu tiên).
+    """
+
+    __slots__ = ("dst_ips", "ports")
+
+    def __init__(self, capacity: int = 4, compact: bool = True):
+        super().__init__(capacity, compact)
+        self.dst_ips = None
+        self.ports = _column("H", self.capacity, compact)
+
+    def append(
+        self, ts: float, size: int, flags: int, dst_ip=0, port: int = 0,
+        window_start: Optional[float] = None,
+    ) -> int:
+        if self.dst_ips is None:
+            self.dst_ips = _column("I" if isinstance(dst_ip, int) else None, self.capacity, self.compact)
+        tail = self._tail
+        if tail == self.head:
+            self.first_ts = ts
+        elif tail - self.head > self.mask:
+            self._grow()
+            tail = self._tail
+        i = tail & self.mask
+        self.timestamps[i] = ts
+        self.sizes[i] = size
+        self.flags[i] = flags
+        self.dst_ips[i] = dst_ip
+        self.ports[i] = port
+        self._tail = tail + 1
+        if window_start is None or self.first_ts >= window_start:
+            return 0
+        return self._evict(window_start)
+
+    def popleft(self) -> Tuple[float, int, int, object, int]:
+        """Bỏ packet cũ nhất, trả về (timestamp, size, flags, dst_ip, port)."""
+        mask = self.mask
+        head = self.head
+        i = head & mask
+        self.head = head + 1
+        # buffer rỗng: first_ts là rác, append kế tiếp ghi lại
+        self.first_ts = self.timestamps[(head + 1) & mask]
+        return self.timestamps[i], self.sizes[i], self.flags[i], self.dst_ips[i], self.ports[i]
+
+    def _columns(self) -> Tuple[str, ...]:
+        return ("timestamps", "sizes", "flags", "dst_ips", "ports")
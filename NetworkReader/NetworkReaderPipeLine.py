@@ -1,4 +1,7 @@
-﻿from NetworkReader.Services.PacketCaptureService import PacketCaptureService
+﻿import time
+from typing import List, Optional, Tuple
+
+from NetworkReader.Services.PacketCaptureService import PacketCaptureService
 from NetworkReader.Services.PacketParserService import PacketParserService
 from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
 
@@ -10,6 +13,8 @@ from NetworkReader.Services.HostBased.HostBehaviorService import HostBehaviorSer
 from NetworkReader.Services.HostBased.HostSlidingWindowService import HostSlidingWindowService
 from NetworkReader.Services.HostBased.HostFeatureExtractService import HostFeatureExtractService
 
+from NetworkReader.Services.PacketStateEngine import PacketStateEngine
+
 
 class NetworkReader:
     """
@@ -21,6 +26,17 @@ class NetworkReader:
     - Update state
     - Nếu có snapshot hoàn chỉnh → extract feature
     - Return (host_features, flow_features)
+
+    read_many() làm giống read() cho cả một batch packet lấy từ ring
+    (một lần khóa cho nhiều packet) và trả list các kết quả.
+
+    Nếu có engine (PacketStateEngine), state được cập nhật một lần qua
+    engine; 4 service flow/host khi đó là view của engine.
+
+    Engine có emit_interval (tick mode): read_many() chỉ trả kết quả khi
+    timestamp packet qua tick mới, một kết quả cho mỗi flow dirty trong
+    tick trước. emit_due() / flush_dirty() cho caller emit khi không có
+    packet. read() luôn là per-packet.
     """
 
     def __init__(
@@ -33,6 +49,7 @@ class NetworkReader:
         host_behavior: HostBehaviorService,
         host_window: HostSlidingWindowService,
         host_extractor: HostFeatureExtractService,
+        engine: Optional[PacketStateEngine] = None,
     ):
         # I/O
         self.capture = capture
@@ -48,15 +65,96 @@ class NetworkReader:
         self.host_window = host_window
         self.host_extractor = host_extractor
 
+        # Fused state update
+        self.engine = engine
+
     # MAIN ENTRY
-    def read(self):
+    def read(self, timeout: float = 1.0):
 
-        packet = self.capture.next_packet(timeout=1.0)
+        packet = self.capture.next_packet(timeout=timeout)
 
         if packet is None:
             return None
 
         raw_bytes, ts = packet
+        return self._process(raw_bytes, ts)
+
+    def read_many(
+        self,
+        max_packets: int = 256,
+        max_latency: float = 0.005,
+        timeout: float = 1.0,
+    ) -> List[Tuple]:
+        """
+        Chờ tối đa timeout giây cho packet đầu tiên, sau đó gom thêm tới
+        max_packets packet hoặc tới khi packet đầu đã chờ max_latency giây,
+        rồi xử lý cả batch. Trả list (host_features, flow_features).
+        """
+        packets = self.capture.next_packets(max_packets, timeout=timeout)
+        if not packets:
+            return []
+
+        deadline = time.monotonic() + max_latency
+        results = self._process_many(packets)
+        count = len(packets)
+
+        while count < max_packets:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # next_packets() release buffer của lần gọi trước → parse xong mới lấy tiếp
+            packets = self.capture.next_packets(max_packets - count, timeout=remaining)
+            if not packets:
+                break
+            results += self._process_many(packets)
+            count += len(packets)
+
+        return results
+
+    def _process_many(self, packets) -> List[Tuple]:
+        results = []
+        if self.engine is not None and self.engine.emit_interval is not None:
+            for raw_bytes, ts in packets:
+                results += self._process_tick(raw_bytes, ts)
+            return results
+
+        for raw_bytes, ts in packets:
+            result = self._process(raw_bytes, ts)
+            if result is not None:
+                results.append(result)
+        return results
+
+    # ================================
+    # TICK MODE
+    # ================================
+    def emit_due(self, now: float) -> List[Tuple]:
+        """Nếu now đã qua tick kế tiếp: extract feature cho mọi flow dirty."""
+        if not self.engine.emit_due(now):
+            return []
+        return self._extract_pairs(self.engine.emit_dirty(now))
+
+    def flush_dirty(self, now: float) -> List[Tuple]:
+        """Emit mọi flow dirty ngay (ví dụ hết file replay)."""
+        return self._extract_pairs(self.engine.emit_dirty(now))
+
+    def _process_tick(self, raw_bytes, ts: float) -> List[Tuple]:
+        # packet qua mốc tick → emit tick cũ trước khi packet này làm dirty
+        results = self.emit_due(ts)
+
+        if raw_bytes is not None:
+            pkt = self.parser.parse(raw_bytes, ts)
+            if pkt is not None:
+                self.engine.update(pkt)
+
+        return results
+
+    def _extract_pairs(self, snapshots) -> List[Tuple]:
+        return [
+            (self.host_extractor.extract(host_snap), self.flow_extractor.extract(flow_snap))
+            for flow_snap, host_snap in snapshots
+        ]
+
+    def _process(self, raw_bytes, ts: float) -> Optional[Tuple]:
 
         if raw_bytes is None:
             return None
@@ -66,6 +164,13 @@ class NetworkReader:
         if pkt is None:
             return None
 
+        if self.engine is not None:
+            flow_snap, host_snap = self.engine.process_packet(pkt)
+            return (
+                self.host_extractor.extract(host_snap),
+                self.flow_extractor.extract(flow_snap),
+            )
+
         # Update state
         self.flow_table.on_packet(pkt)
         self.host_behavior.on_packet(pkt)
@@ -87,4 +192,4 @@ class NetworkReader:
         if flow_features is None and host_features is None:
             return None
 
-        return host_features, flow_features
\ No newline at end of file
+        return host_features, flow_features
@@ -0,0 +1,148 @@
+import select
+import socket
+import struct
+import time
+from collections import deque
+from typing import Iterator, List, Optional, Tuple
+
+from NetworkReader.Data.ValueObjects.PacketBatch import PacketBatch
+from NetworkReader.Services.Capture.CaptureBackend import CaptureBackend
+from NetworkReader.Services.Capture.LinkLayer import ethernet_ipv4_offset
+
+ETH_P_IP = 0x0800
+
+# <linux/if_packet.h>
+SOL_PACKET = 263
+PACKET_STATISTICS = 6
+_TPACKET_STATS = struct.Struct("II")
+
+
+class AfPacketBackend(CaptureBackend):
+    """
+    Live capture trên Linux qua AF_PACKET raw socket.
+
+    Frame được recv_into thẳng vào buffer pool cấp phát sẵn (pool_size slot
+    x snaplen byte), Ethernet/VLAN header bị bỏ qua bằng memoryview nên
+    parser nhận IPv4 buffer giống WinDivert, không copy. Mỗi lần socket
+    sẵn sàng, backend rút tối đa max_packets frame thành một PacketBatch.
+    Slot chỉ được dùng lại sau khi consumer release(batch).
+
+    Frame dài hơn snaplen (GRO/TSO gộp segment, thường > 2048 byte) bị cắt:
+    slot chỉ chứa header, recv MSG_TRUNC cho biết độ dài thật và được đếm ở
+    truncated_frames. Parser lấy packet_size từ IPv4 total_length nên byte
+    count / feature theo size không bị thiếu; chỉ cần snaplen đủ chứa header.
+    """
+
+    def __init__(
+        self,
+        iface: str,
+        snaplen: int = 2048,
+        pool_size: int = 8192,
+        poll_timeout: float = 0.1,
+        rcvbuf: int = 8 * 1024 * 1024,
+    ):
+        self.iface = iface
+        self.snaplen = snaplen
+        self.pool_size = pool_size
+        self.poll_timeout = poll_timeout
+        self.rcvbuf = rcvbuf
+
+        self._sock: Optional[socket.socket] = None
+
+        # buffer pool cấp phát trong open() để backend chưa open pickle được
+        # (ProcessCaptureService chuyển backend sang capture process)
+        self._arena: Optional[bytearray] = None
+        self._slots: List[memoryview] = []
+        self._free_slots: deque = deque()
+
+        # số lần hết slot (consumer chậm) → kernel buffer phải gánh
+        self.pool_stalls = 0
+        # frame dài hơn snaplen (chỉ header nằm trong slot)
+        self.truncated_frames = 0
+
+    def open(self) -> None:
+        # buffer pool: một arena liên tục, slot i = arena[i*snaplen:(i+1)*snaplen]
+        if self._arena is None:
+            snaplen = self.snaplen
+            self._arena = bytearray(self.pool_size * snaplen)
+            arena_view = memoryview(self._arena)
+            self._slots = [
+                arena_view[i * snaplen:(i + 1) * snaplen] for i in range(self.pool_size)
+            ]
+            self._free_slots = deque(range(self.pool_size))
+
+        sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_IP))
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+        sock.bind((self.iface, 0))
+        self._sock = sock
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    @property
+    def kernel_drops(self) -> int:
+        """Packets dropped by the kernel since the last call (PACKET_STATISTICS resets)."""
+        if self._sock is None:
+            return 0
+        raw = self._sock.getsockopt(SOL_PACKET, PACKET_STATISTICS, _TPACKET_STATS.size)
+        _, drops = _TPACKET_STATS.unpack(raw)
+        return drops
+
+    def packets(self) -> Iterator[Tuple[memoryview, float]]:
+        for batch in self.batches(1):
+            yield from batch.packets
+            self.release(batch)
+
+    def batches(self, max_packets: int) -> Iterator[PacketBatch]:
+        while self._sock is not None:
+            sock = self._sock
+            ready, _, _ = select.select([sock], [], [], self.poll_timeout)
+            if not ready:
+                continue
+
+            batch = self._drain(sock, max_packets)
+            if batch.packets:
+                yield batch
+            elif not self._free_slots:
+                # pool cạn: chờ consumer release thay vì spin trên select
+                time.sleep(0.001)
+
+    def release(self, batch: PacketBatch) -> None:
+        if batch.slot_ids:
+            self._free_slots.extend(batch.slot_ids)
+            batch.slot_ids = None
+
+    def _drain(self, sock: socket.socket, max_packets: int) -> PacketBatch:
+        packets = []
+        slot_ids = []
+        free_slots = self._free_slots
+
+        while len(packets) < max_packets:
+            if not free_slots:
+                self.pool_stalls += 1
+                break
+
+            slot_id = free_slots.popleft()
+            slot = self._slots[slot_id]
+            try:
+                # MSG_TRUNC: trả về độ dài thật của frame kể cả khi bị cắt
+                n = sock.recv_into(slot, self.snaplen, socket.MSG_DONTWAIT | socket.MSG_TRUNC)
+            except BlockingIOError:
+                free_slots.appendleft(slot_id)
+                break
+            if n > self.snaplen:
+                self.truncated_frames += 1
+                n = self.snaplen
+
+            ts = time.time()
+            offset = ethernet_ipv4_offset(slot, 0, n)
+            if offset is None:
+                free_slots.appendleft(slot_id)
+                continue
+
+            packets.append((slot[offset:n], ts))
+            slot_ids.append(slot_id)
+
+        return PacketBatch(packets, slot_ids)
@@ -0,0 +1,41 @@
+from abc import ABC, abstractmethod
+from typing import Iterator, Tuple
+
+from NetworkReader.Data.ValueObjects.PacketBatch import PacketBatch
+
+
+class CaptureBackend(ABC):
+    """
+    Nguồn packet cho PacketCaptureService.
+
+    packets() yield (raw_ipv4_bytes, timestamp); raw bytes luôn bắt đầu từ
+    IPv4 header (giống WinDivert) để PacketParserService dùng chung.
+    Generator kết thúc = hết nguồn (ví dụ hết file pcap).
+
+    batches() là đường handoff chính: mỗi PacketBatch được đẩy sang
+    consumer một lần. Buffer trong batch thuộc về backend cho tới khi
+    release(batch) được gọi (consumer đã parse xong hoặc batch bị drop).
+    """
+
+    # True → capture loop chờ khi queue đầy thay vì drop (replay offline)
+    lossless: bool = False
+
+    @abstractmethod
+    def open(self) -> None:
+        ...
+
+    @abstractmethod
+    def close(self) -> None:
+        ...
+
+    @abstractmethod
+    def packets(self) -> Iterator[Tuple[bytes, float]]:
+        ...
+
+    def batches(self, max_packets: int) -> Iterator[PacketBatch]:
+        # mặc định: mỗi packet một batch, không chờ gom (live backend không có batching)
+        for item in self.packets():
+            yield PacketBatch([item])
+
+    def release(self, batch: PacketBatch) -> None:
+        pass
@@ -0,0 +1,79 @@
+import struct
+from typing import Optional
+
+# pcap LINKTYPE_* values
+LINKTYPE_NULL = 0
+LINKTYPE_ETHERNET = 1
+LINKTYPE_RAW = 101
+LINKTYPE_LINUX_SLL = 113
+LINKTYPE_IPV4 = 228
+LINKTYPE_LINUX_SLL2 = 276
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_VLAN = (0x8100, 0x88A8, 0x9100)
+
+ETH_HEADER_LEN = 14
+VLAN_TAG_LEN = 4
+SLL_HEADER_LEN = 16
+SLL2_HEADER_LEN = 20
+NULL_HEADER_LEN = 4
+
+AF_INET = 2
+
+_U16 = struct.Struct("!H")
+
+
+def ethernet_ipv4_offset(frame, start: int = 0, end: Optional[int] = None) -> Optional[int]:
+    """Offset of the IPv4 header inside an Ethernet frame (VLAN tags skipped)."""
+    end = len(frame) if end is None else end
+    offset = start + ETH_HEADER_LEN - 2
+
+    while offset + 2 <= end:
+        ethertype = _U16.unpack_from(frame, offset)[0]
+        if ethertype == ETHERTYPE_IPV4:
+            return offset + 2
+        if ethertype not in ETHERTYPE_VLAN:
+            return None
+        offset += VLAN_TAG_LEN
+
+    return None
+
+
+def ipv4_offset(linktype: int, frame, start: int = 0, end: Optional[int] = None) -> Optional[int]:
+    """
+    Trả về offset bắt đầu IPv4 header trong frame theo link type,
+    hoặc None nếu không phải IPv4 / link type không hỗ trợ.
+    """
+    end = len(frame) if end is None else end
+
+    if linktype == LINKTYPE_ETHERNET:
+        return ethernet_ipv4_offset(frame, start, end)
+
+    if linktype in (LINKTYPE_RAW, LINKTYPE_IPV4):
+        offset = start
+
+    elif linktype == LINKTYPE_LINUX_SLL:
+        if end - start < SLL_HEADER_LEN or _U16.unpack_from(frame, start + 14)[0] != ETHERTYPE_IPV4:
+            return None
+        offset = start + SLL_HEADER_LEN
+
+    elif linktype == LINKTYPE_LINUX_SLL2:
+        if end - start < SLL2_HEADER_LEN or _U16.unpack_from(frame, start)[0] != ETHERTYPE_IPV4:
+            return None
+        offset = start + SLL2_HEADER_LEN
+
+    elif linktype == LINKTYPE_NULL:
+        # address family ở host byte order của máy capture
+        if end - start < NULL_HEADER_LEN:
+            return None
+        family = bytes(frame[start:start + NULL_HEADER_LEN])
+        if AF_INET not in (family[0], family[3]):
+            return None
+        offset = start + NULL_HEADER_LEN
+
+    else:
+        return None
+
+    if offset >= end or frame[offset] >> 4 != 4:
+        return None
+    return offset
@@ -0,0 +1,103 @@
+import threading
+from typing import List, Sequence, Tuple
+
+
+class PacketRing:
+    """
+    Ring buffer có giới hạn giữa capture thread (producer) và analysis
+    thread (consumer), một producer / một consumer.
+
+    Khác queue.Queue: mỗi lần put_many / get_many lấy lock một lần cho cả
+    batch, nên lock + condition variable tính theo batch chứ không theo
+    packet. Slot là list cấp phát sẵn; head / tail là bộ đếm tăng dần
+    (index thật = counter % capacity).
+    """
+
+    def __init__(self, capacity: int):
+        if capacity < 1:
+            raise ValueError("capacity must be >= 1")
+
+        self.capacity = capacity
+        self._buf: List[Tuple[object, float]] = [None] * capacity
+        self._head = 0  # tổng số packet đã đọc
+        self._tail = 0  # tổng số packet đã ghi
+
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def __len__(self) -> int:
+        return self._tail - self._head
+
+    @property
+    def written(self) -> int:
+        """Tổng số packet đã ghi vào ring (từ lúc tạo)."""
+        return self._tail
+
+    @property
+    def consumed(self) -> int:
+        """Tổng số packet consumer đã lấy ra (từ lúc tạo)."""
+        return self._head
+
+    def put_many(self, items: Sequence[Tuple[object, float]], timeout: float = 0.0) -> int:
+        """
+        Ghi nhiều packet nhất có thể; trả về số packet đã ghi.
+
+        timeout > 0: chờ tối đa timeout giây cho tới khi có ít nhất một slot trống.
+        """
+        if not items:
+            return 0
+
+        with self._lock:
+            if timeout > 0 and self._tail - self._head >= self.capacity:
+                self._not_full.wait_for(
+                    lambda: self._tail - self._head < self.capacity, timeout
+                )
+
+            n = min(len(items), self.capacity - (self._tail - self._head))
+            if n <= 0:
+                return 0
+
+            start = self._tail % self.capacity
+            first = min(n, self.capacity - start)
+            self._buf[start:start + first] = items[:first]
+            if first < n:
+                self._buf[:n - first] = items[first:n]
+
+            self._tail += n
+            self._not_empty.notify()
+            return n
+
+    def get_many(self, max_items: int, timeout: float = 0.0) -> List[Tuple[object, float]]:
+        """
+        Lấy tối đa max_items packet theo thứ tự ghi.
+
+        timeout > 0: chờ tối đa timeout giây nếu ring đang rỗng.
+        """
+        with self._lock:
+            if timeout > 0 and self._tail == self._head:
+                self._not_empty.wait_for(lambda: self._tail != self._head, timeout)
+
+            n = min(max_items, self._tail - self._head)
+            if n <= 0:
+                return []
+
+            start = self._head % self.capacity
+            first = min(n, self.capacity - start)
+            items = self._buf[start:start + first]
+            # bỏ reference để buffer (memoryview vào pool) không bị giữ lại
+            self._buf[start:start + first] = [None] * first
+            if first < n:
+                items += self._buf[:n - first]
+                self._buf[:n - first] = [None] * (n - first)
+
+            self._head += n
+            self._not_full.notify()
+            return items
+
+    def put_all(self, items: Sequence[Tuple[object, float]], stop: threading.Event) -> int:
+        """Ghi toàn bộ items (chờ khi đầy), dừng sớm nếu stop được set."""
+        done = 0
+        while done < len(items) and not stop.is_set():
+            done += self.put_many(items[done:] if done else items, timeout=0.1)
+        return done
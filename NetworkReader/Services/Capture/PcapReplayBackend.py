@@ -0,0 +1,197 @@
+import mmap
+import struct
+import time
+from typing import Iterator, Optional, Tuple
+
+from NetworkReader.Data.ValueObjects.PacketBatch import PacketBatch
+from NetworkReader.Services.Capture.CaptureBackend import CaptureBackend
+from NetworkReader.Services.Capture.LinkLayer import ipv4_offset
+
+# pcap magic numbers (as read little-endian)
+PCAP_MAGIC_US = 0xA1B2C3D4
+PCAP_MAGIC_NS = 0xA1B23C4D
+PCAP_MAGIC_US_SWAPPED = 0xD4C3B2A1
+PCAP_MAGIC_NS_SWAPPED = 0x4D3CB2A1
+
+PCAP_GLOBAL_HEADER_LEN = 24
+PCAP_RECORD_HEADER_LEN = 16
+
+# pcapng block types
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_IDB = 0x00000001
+PCAPNG_SPB = 0x00000003
+PCAPNG_EPB = 0x00000006
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+PCAPNG_OPT_IF_TSRESOL = 9
+
+
+class PcapReplayBackend(CaptureBackend):
+    """
+    Offline capture từ file pcap / pcapng (memory-mapped).
+
+    realtime=False: replay nhanh nhất có thể, throughput chỉ bị giới hạn
+    bởi tốc độ phân tích (lossless, không drop khi queue đầy).
+    realtime=True: giữ nhịp inter-arrival gốc (chia cho speed).
+
+    Timestamp luôn là timestamp gốc trong file; dùng SimulatedClock để các
+    deadline phía sau chạy theo thời gian của trace.
+    """
+
+    lossless = True
+
+    def __init__(self, path: str, realtime: bool = False, speed: float = 1.0):
+        if speed <= 0:
+            raise ValueError("speed must be > 0")
+
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+
+        self._file = None
+        self._mm: Optional[mmap.mmap] = None
+
+    def open(self) -> None:
+        self._file = open(self.path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # file rỗng không mmap được
+            self._mm = None
+
+    def close(self) -> None:
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def packets(self) -> Iterator[Tuple[bytes, float]]:
+        mm = self._mm
+        if mm is None:
+            return
+
+        wall_start = None
+        trace_start = None
+
+        for linktype, ts, start, end in self._frames(mm):
+            offset = ipv4_offset(linktype, mm, start, end)
+            if offset is None:
+                continue
+
+            if self.realtime:
+                if wall_start is None:
+                    wall_start, trace_start = time.monotonic(), ts
+                delay = wall_start + (ts - trace_start) / self.speed - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+
+            yield mm[offset:end], ts
+
+    def batches(self, max_packets: int) -> Iterator[PacketBatch]:
+        batch = []
+        for item in self.packets():
+            batch.append(item)
+            # realtime: giao ngay từng packet để giữ nhịp gốc
+            if self.realtime or len(batch) >= max_packets:
+                yield PacketBatch(batch)
+                batch = []
+        if batch:
+            yield PacketBatch(batch)
+
+    # ================================
+    # FILE FORMATS
+    # ================================
+    @staticmethod
+    def _frames(mm) -> Iterator[Tuple[int, float, int, int]]:
+        """Yield (linktype, timestamp, start, end) for every captured frame."""
+        if len(mm) < 4:
+            return
+
+        magic = struct.unpack_from("<I", mm, 0)[0]
+        if magic == PCAPNG_SHB:
+            yield from PcapReplayBackend._pcapng_frames(mm)
+        else:
+            yield from PcapReplayBackend._pcap_frames(mm)
+
+    @staticmethod
+    def _pcap_frames(mm) -> Iterator[Tuple[int, float, int, int]]:
+        magic = struct.unpack_from("<I", mm, 0)[0]
+        if magic in (PCAP_MAGIC_US, PCAP_MAGIC_NS):
+            endian = "<"
+        elif magic in (PCAP_MAGIC_US_SWAPPED, PCAP_MAGIC_NS_SWAPPED):
+            endian = ">"
+        else:
+            raise ValueError("Not a pcap/pcapng file")
+
+        frac_scale = 1e-9 if magic in (PCAP_MAGIC_NS, PCAP_MAGIC_NS_SWAPPED) else 1e-6
+        linktype = struct.unpack_from(endian + "I", mm, 20)[0] & 0x0FFFFFFF
+        record = struct.Struct(endian + "IIII")
+
+        pos = PCAP_GLOBAL_HEADER_LEN
+        size = len(mm)
+        while pos + PCAP_RECORD_HEADER_LEN <= size:
+            ts_sec, ts_frac, incl_len, _ = record.unpack_from(mm, pos)
+            start = pos + PCAP_RECORD_HEADER_LEN
+            end = start + incl_len
+            if end > size:
+                break  # truncated record
+
+            yield linktype, ts_sec + ts_frac * frac_scale, start, end
+            pos = end
+
+    @staticmethod
+    def _pcapng_frames(mm) -> Iterator[Tuple[int, float, int, int]]:
+        size = len(mm)
+        pos = 0
+        endian = "<"
+        interfaces = []  # (linktype, ts_scale)
+        last_ts = 0.0
+
+        while pos + 12 <= size:
+            block_type = struct.unpack_from(endian + "I", mm, pos)[0]
+
+            if block_type == PCAPNG_SHB:
+                bom = struct.unpack_from("<I", mm, pos + 8)[0]
+                endian = "<" if bom == PCAPNG_BYTE_ORDER_MAGIC else ">"
+                interfaces = []
+
+            block_len = struct.unpack_from(endian + "I", mm, pos + 4)[0]
+            if block_len < 12 or pos + block_len > size:
+                break  # truncated / corrupt block
+            body = pos + 8
+            block_end = pos + block_len - 4
+
+            if block_type == PCAPNG_IDB:
+                linktype = struct.unpack_from(endian + "H", mm, body)[0]
+                ts_scale = PcapReplayBackend._pcapng_ts_scale(mm, body + 8, block_end, endian)
+                interfaces.append((linktype, ts_scale))
+
+            elif block_type == PCAPNG_EPB:
+                if_id, ts_high, ts_low, cap_len = struct.unpack_from(endian + "IIII", mm, body)
+                if if_id < len(interfaces):
+                    linktype, ts_scale = interfaces[if_id]
+                    start = body + 20
+                    last_ts = ((ts_high << 32) | ts_low) * ts_scale
+                    yield linktype, last_ts, start, min(start + cap_len, block_end)
+
+            elif block_type == PCAPNG_SPB:
+                # Simple Packet Block không có timestamp → dùng timestamp trước đó
+                if interfaces:
+                    linktype, _ = interfaces[0]
+                    yield linktype, last_ts, body + 4, block_end
+
+            pos += block_len
+
+    @staticmethod
+    def _pcapng_ts_scale(mm, pos: int, end: int, endian: str) -> float:
+        scale = 1e-6
+        while pos + 4 <= end:
+            code, length = struct.unpack_from(endian + "HH", mm, pos)
+            if code == 0:
+                break
+            if code == PCAPNG_OPT_IF_TSRESOL and length >= 1:
+                resol = mm[pos + 4]
+                scale = 2.0 ** -(resol & 0x7F) if resol & 0x80 else 10.0 ** -resol
+            pos += 4 + ((length + 3) & ~3)
+        return scale
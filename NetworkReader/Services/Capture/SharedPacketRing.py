@@ -0,0 +1,169 @@
+import struct
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# header: 4 counter uint64 (head, tail, dropped, eof), pad tới 64 byte
+_HEADER_LEN = 64
+_HEAD, _TAIL, _DROPPED, _EOF = range(4)
+
+# slot: [timestamp float64][length uint32][pad 4][data ...]
+_SLOT_HEADER = struct.Struct("=dI4x")
+
+
+class SharedPacketRing:
+    """
+    Ring buffer packet trên multiprocessing.shared_memory, một producer
+    (capture process) / một consumer (analysis process).
+
+    Mỗi slot cố định slot_size byte; packet dài hơn slot_size - 16 bị cắt
+    (giống snaplen). head / tail là counter uint64 tăng dần trong header,
+    ghi bằng một store 8 byte qua numpy; producer ghi data slot trước rồi
+    mới publish tail, consumer chỉ publish head khi đã dùng xong các slot.
+
+    read_many() trả memoryview trỏ thẳng vào slot (không copy); view còn
+    hợp lệ cho tới lần release() kế tiếp.
+    """
+
+    def __init__(
+        self,
+        name: Optional[str] = None,
+        slot_count: int = 65536,
+        slot_size: int = 2048,
+        create: bool = True,
+    ):
+        if slot_count < 1:
+            raise ValueError("slot_count must be >= 1")
+        if slot_size <= _SLOT_HEADER.size:
+            raise ValueError(f"slot_size must be > {_SLOT_HEADER.size}")
+
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self.data_size = slot_size - _SLOT_HEADER.size
+
+        self._shm = shared_memory.SharedMemory(
+            name=name, create=create, size=_HEADER_LEN + slot_count * slot_size
+        )
+        self._buf = self._shm.buf
+        self._counters = np.ndarray((4,), dtype=np.uint64, buffer=self._buf)
+        if create:
+            self._counters[:] = 0
+
+        # vị trí cục bộ: producer giữ tail, consumer giữ head đã đọc (chưa release)
+        self._tail = int(self._counters[_TAIL])
+        self._read = int(self._counters[_HEAD])
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @classmethod
+    def attach(cls, name: str, slot_count: int, slot_size: int) -> "SharedPacketRing":
+        return cls(name=name, slot_count=slot_count, slot_size=slot_size, create=False)
+
+    def close(self, unlink: bool = False) -> None:
+        self._counters = None
+        self._buf = None
+        try:
+            self._shm.close()
+        except BufferError:
+            # consumer còn giữ memoryview vào slot → để GC đóng sau
+            pass
+        if unlink:
+            self._shm.unlink()
+
+    def __len__(self) -> int:
+        return int(self._counters[_TAIL]) - self._read
+
+    # ================================
+    # SHARED FLAGS
+    # ================================
+    @property
+    def dropped(self) -> int:
+        return int(self._counters[_DROPPED])
+
+    def add_dropped(self, n: int) -> None:
+        # chỉ producer ghi
+        self._counters[_DROPPED] += n
+
+    @property
+    def eof(self) -> bool:
+        return bool(self._counters[_EOF])
+
+    def mark_eof(self) -> None:
+        self._counters[_EOF] = 1
+
+    # ================================
+    # PRODUCER
+    # ================================
+    def write_many(self, items: Sequence[Tuple[object, float]]) -> int:
+        """Copy nhiều packet nhất có thể vào slot trống; trả về số packet đã ghi."""
+        tail = self._tail
+        free = self.slot_count - (tail - int(self._counters[_HEAD]))
+        n = min(len(items), free)
+        if n <= 0:
+            return 0
+
+        buf = self._buf
+        slot_count, slot_size, data_size = self.slot_count, self.slot_size, self.data_size
+        pack_into = _SLOT_HEADER.pack_into
+
+        for raw, ts in items[:n]:
+            off = _HEADER_LEN + (tail % slot_count) * slot_size
+            length = min(len(raw), data_size)
+            pack_into(buf, off, ts, length)
+            data = off + _SLOT_HEADER.size
+            buf[data:data + length] = raw[:length]
+            tail += 1
+
+        # publish sau khi data đã nằm trong slot
+        self._tail = tail
+        self._counters[_TAIL] = tail
+        return n
+
+    def write_all(
+        self,
+        items: Sequence[Tuple[object, float]],
+        stop: threading.Event,
+        poll_interval: float = 0.0005,
+    ) -> int:
+        """Ghi toàn bộ items (chờ consumer khi ring đầy), dừng sớm nếu stop được set."""
+        done = 0
+        while done < len(items) and not stop.is_set():
+            written = self.write_many(items[done:] if done else items)
+            done += written
+            if not written:
+                time.sleep(poll_interval)
+        return done
+
+    # ================================
+    # CONSUMER
+    # ================================
+    def read_many(self, max_items: int) -> List[Tuple[memoryview, float]]:
+        """Lấy tối đa max_items packet dưới dạng memoryview vào slot (không copy)."""
+        start = self._read
+        n = min(max_items, int(self._counters[_TAIL]) - start)
+        if n <= 0:
+            return []
+
+        buf = self._buf
+        slot_count, slot_size = self.slot_count, self.slot_size
+        unpack_from = _SLOT_HEADER.unpack_from
+        items = []
+
+        for seq in range(start, start + n):
+            off = _HEADER_LEN + (seq % slot_count) * slot_size
+            ts, length = unpack_from(buf, off)
+            data = off + _SLOT_HEADER.size
+            items.append((buf[data:data + length], ts))
+
+        self._read = start + n
+        return items
+
+    def release(self) -> None:
+        """Trả mọi slot đã đọc cho producer (memoryview cũ không còn hợp lệ)."""
+        if int(self._counters[_HEAD]) != self._read:
+            self._counters[_HEAD] = self._read
@@ -0,0 +1,19 @@
+class SimulatedClock:
+    """
+    Clock chạy theo timestamp của packet thay vì wall time.
+
+    Dùng khi replay pcap: now() trả về timestamp của packet mới nhất đã
+    được tiêu thụ, nên mọi deadline (batch, timeout) tính theo thời gian
+    của trace và replay có thể chạy nhanh nhất có thể.
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+
+    def now(self) -> float:
+        return self._now
+
+    def advance_to(self, ts: float) -> None:
+        # không lùi clock khi packet đến lệch thứ tự
+        if ts > self._now:
+            self._now = ts
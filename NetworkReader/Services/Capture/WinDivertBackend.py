@@ -0,0 +1,32 @@
+import time
+from typing import Iterator, Tuple
+
+from NetworkReader.Services.Capture.CaptureBackend import CaptureBackend
+
+
+class WinDivertBackend(CaptureBackend):
+    """
+    Live capture trên Windows qua pydivert.WinDivert (SNIFF mode).
+    pydivert chỉ được import khi open(), nên module này load được trên Linux.
+    """
+
+    def __init__(self, filter_str: str = "ip and (tcp or udp)"):
+        self.filter_str = filter_str
+        self._divert = None
+
+    def open(self) -> None:
+        import pydivert
+
+        self._divert = pydivert.WinDivert(self.filter_str, flags=pydivert.Flag.SNIFF)
+        self._divert.open()
+
+    def close(self) -> None:
+        if self._divert:
+            self._divert.close()
+            self._divert = None
+
+    def packets(self) -> Iterator[Tuple[bytes, float]]:
+        assert self._divert is not None
+
+        for packet in self._divert:
+            yield packet.raw, time.time()
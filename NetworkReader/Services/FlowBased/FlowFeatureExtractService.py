@@ -1,7 +1,12 @@
+from functools import lru_cache
+from typing import Union
+
 from NetworkReader.Data.ValueObjects.FlowBased.FlowSlidingWindowSnapshot import (
     FlowSlidingWindowSnapshot
 )
 from NetworkReader.Data.ValueObjects.FlowBased.FlowFeatureVector import FlowFeatureVector
+from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey
+from NetworkReader.Services.LocalNetworkService import ip_to_str
 
 
 class FlowFeatureExtractService:
@@ -17,7 +22,7 @@ class FlowFeatureExtractService:
         return FlowFeatureVector(
             timestamp=snapshot.window_end,
             window_size=self.window_size,
-            flow_key=snapshot.flow_key,
+            flow_key=self._output_key(snapshot.flow_key),
 
             packet_count=int(snapshot.packet_count),
             byte_count=int(snapshot.byte_count),
@@ -34,3 +39,24 @@ class FlowFeatureExtractService:
             rst_ratio=float(snapshot.rst_ratio),
             protocol=snapshot.protocol
         )
+
+    @staticmethod
+    def _output_key(key: Union[FlowKey, int]) -> FlowKey:
+        if isinstance(key, int):
+            return _packed_output_key(key)
+        # IP dạng int (int_ips) chỉ được đổi sang string ở output
+        if isinstance(key.src_ip, str):
+            return key
+        return FlowKey(
+            src_ip=ip_to_str(key.src_ip),
+            dst_ip=ip_to_str(key.dst_ip),
+            dst_port=key.dst_port,
+            protocol=key.protocol,
+            direction=key.direction,
+        )
+
+
+@lru_cache(maxsize=65536)
+def _packed_output_key(key: int) -> FlowKey:
+    # flow lặp lại liên tục → cache FlowKey đã dựng cho packed key
+    return FlowFeatureExtractService._output_key(FlowKey.from_packed(key))
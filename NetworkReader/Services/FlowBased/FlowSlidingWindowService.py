@@ -1,12 +1,19 @@
-from typing import Dict, List
+from typing import Dict, List, Mapping, Union
 from collections import deque
 
-from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey
+from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey, pack_flow_key
 from NetworkReader.Data.ValueObjects.FlowBased.FlowStats import FlowStats
 from NetworkReader.Data.ValueObjects.FlowBased.FlowSlidingWindowSnapshot import (
     FlowSlidingWindowSnapshot
 )
+from NetworkReader.Data.ValueObjects.FlowBased.FlowSnapshotHandle import FlowSnapshotHandle
 from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
+from NetworkReader.Data.ValueObjects.PacketArray import TCP_ACK, TCP_FIN, TCP_RST, TCP_SYN
+from NetworkReader.Data.ValueObjects.WindowBuffer import (
+    WINDOW_FORWARD,
+    FlowWindowBuffer,
+    window_flags,
+)
 from NetworkReader.Data.Enums.Direction import Direction
 
 
@@ -19,12 +26,54 @@ class FlowSlidingWindowService:
         2. Remove packet quá hạn
         3. Rebuild stats từ buffer hiện tại
         4. Emit snapshot realtime
+
+    incremental=True giữ FlowStats chạy liên tục cho mỗi flow: packet mới
+    được cộng vào, packet hết hạn được trừ ra (kể cả Welford ngược cho
+    inter-arrival), nên mỗi packet chỉ tốn O(1) amortized thay vì replay
+    toàn bộ buffer. Snapshot giống hệt rebuild path (sai số float).
+    Buffer khi đó là FlowWindowBuffer (cột timestamp / size / flags)
+    thay cho deque[PacketMeta].
+
+    packed_keys=True: mọi dict dùng int từ pack_flow_key làm key (cần IP
+    dạng int); snapshot mang key int đó, FlowFeatureExtractService mới
+    dựng FlowKey khi tạo feature vector.
+
+    lazy=True: snapshot là FlowSnapshotHandle trên stats đang chạy (field
+    dẫn xuất tính khi đọc), chỉ đúng tới packet kế tiếp của flow; consumer
+    cần giữ snapshot thì gọi materialize().
     """
 
-    def __init__(self, window_size: float):
+    def __init__(
+        self,
+        window_size: float,
+        incremental: bool = False,
+        packed_keys: bool = False,
+        lazy: bool = False,
+    ):
         self.window_size = window_size
-        self._buffers: Dict[FlowKey, deque[PacketMeta]] = {}
-        self._last_emit_ts: Dict[FlowKey, float] = {}
+        self.incremental = incremental
+        self.packed_keys = packed_keys
+        self.lazy = lazy
+        self._buffers: Dict[Union[FlowKey, int], Union[deque[PacketMeta], FlowWindowBuffer]] = {}
+        self._last_emit_ts: Dict[Union[FlowKey, int], float] = {}
+        self._stats: Dict[Union[FlowKey, int], FlowStats] = {}
+
+    @classmethod
+    def view(
+        cls,
+        window_size: float,
+        buffers: Mapping,
+        stats: Mapping,
+        last_emit_ts: Mapping,
+        packed_keys: bool = False,
+        lazy: bool = False,
+    ) -> "FlowSlidingWindowService":
+        """View trên state của PacketStateEngine (packet không đi qua process_packet)."""
+        service = cls(window_size, incremental=True, packed_keys=packed_keys, lazy=lazy)
+        service._buffers = buffers
+        service._stats = stats
+        service._last_emit_ts = last_emit_ts
+        return service
 
     # ================================
     # MAIN ENTRY
@@ -32,35 +81,43 @@ class FlowSlidingWindowService:
     def process_packet(self, pkt: PacketMeta) -> List[FlowSlidingWindowSnapshot]:
         snapshots: List[FlowSlidingWindowSnapshot] = []
 
-        flow_key = FlowKey(
-            src_ip=pkt.src_ip,
-            dst_ip=pkt.dst_ip,
-            dst_port=pkt.dst_port,
-            protocol=pkt.protocol,
-            direction=pkt.direction,
-        )
+        if self.packed_keys:
+            flow_key = pack_flow_key(pkt)
+        else:
+            flow_key = FlowKey(
+                src_ip=pkt.src_ip,
+                dst_ip=pkt.dst_ip,
+                dst_port=pkt.dst_port,
+                protocol=pkt.protocol,
+                direction=pkt.direction,
+            )
 
         ts = pkt.timestamp
 
         # init buffer nếu flow mới
         if flow_key not in self._buffers:
-            self._buffers[flow_key] = deque()
+            self._buffers[flow_key] = FlowWindowBuffer() if self.incremental else deque()
             self._last_emit_ts[flow_key] = ts
 
         buffer = self._buffers[flow_key]
-        buffer.append(pkt)
-
-        # 🔥 remove packet hết hạn (core sliding window)
         window_start = ts - self.window_size
-        while buffer and buffer[0].timestamp < window_start:
-            buffer.popleft()
 
-        # rebuild stats từ buffer hiện tại
-        stats = FlowStats(first_seen=buffer[0].timestamp, last_seen=ts)
-        stats.last_pkt_ts = None  # VERY IMPORTANT for Welford replay
+        if self.incremental:
+            expired = buffer.append(ts, pkt.packet_size, window_flags(pkt), window_start)
+            stats = self._slide_stats(flow_key, buffer, pkt, expired)
+        else:
+            buffer.append(pkt)
+
+            # 🔥 remove packet hết hạn (core sliding window)
+            while buffer and buffer[0].timestamp < window_start:
+                buffer.popleft()
 
-        for p in buffer:
-            self._update_stats(stats, p)
+            # rebuild stats từ buffer hiện tại
+            stats = FlowStats(first_seen=buffer[0].timestamp, last_seen=ts)
+            stats.last_pkt_ts = None  # VERY IMPORTANT for Welford replay
+
+            for p in buffer:
+                self._update_stats(stats, p)
 
         snapshots.append(
             self._emit_snapshot_from_stats(
@@ -73,6 +130,86 @@ class FlowSlidingWindowService:
 
         return snapshots
 
+    # ================================
+    # INCREMENTAL WINDOW
+    # ================================
+    def _slide_stats(
+        self,
+        flow_key: Union[FlowKey, int],
+        buffer: FlowWindowBuffer,
+        pkt: PacketMeta,
+        expired: int,
+    ) -> FlowStats:
+        stats = self._stats.get(flow_key)
+        if stats is None:
+            stats = FlowStats(first_seen=pkt.timestamp, last_seen=pkt.timestamp)
+            self._stats[flow_key] = stats
+
+        # last_pkt_ts vẫn là packet cuối trong buffer → delta mới đúng như replay
+        self._update_stats(stats, pkt)
+
+        if expired:
+            self._evict_stats(stats, buffer, expired)
+
+        stats.first_seen = buffer.first_ts
+        return stats
+
+    @staticmethod
+    def _evict_stats(stats: FlowStats, buffer: FlowWindowBuffer, n: int) -> None:
+        """
+        Reverse of _update_stats for the n oldest packets vừa bị
+        buffer.append evict (vẫn nằm ở n slot ngay trước buffer.head).
+        """
+        timestamps = buffer.timestamps
+        sizes = buffer.sizes
+        flags = buffer.flags
+        mask = buffer.mask
+        start = buffer.head - n
+
+        count = stats.inter_arrival_count
+        mean = stats.inter_arrival_mean
+        m2 = stats.inter_arrival_m2
+        for k in range(start, start + n):
+            i = k & mask
+            f = flags[i]
+            stats.total_packets -= 1
+            stats.total_bytes -= sizes[i]
+            if f & WINDOW_FORWARD:
+                stats.fwd_packets -= 1
+            else:
+                stats.bwd_packets -= 1
+
+            # inter-arrival: bỏ delta giữa packet bị evict và packet kế tiếp
+            # (packet vừa append luôn còn trong buffer → luôn có packet kế)
+            count -= 1
+            if count == 0:
+                mean = m2 = 0.0
+            elif count == 1:
+                # chỉ còn 1 delta → lấy lại giá trị chính xác, chặn drift
+                mean = timestamps[(k + 2) & mask] - timestamps[(k + 1) & mask]
+                m2 = 0.0
+            else:
+                delta = timestamps[(k + 1) & mask] - timestamps[i]
+                old_mean = mean
+                mean = old_mean - (delta - old_mean) / count
+                m2 -= (delta - mean) * (delta - old_mean)
+                if m2 < 0.0:
+                    m2 = 0.0
+
+            # TCP flags
+            if f & TCP_SYN:
+                stats.syn_count -= 1
+            if f & TCP_ACK:
+                stats.ack_count -= 1
+            if f & TCP_RST:
+                stats.rst_count -= 1
+            if f & TCP_FIN:
+                stats.fin_count -= 1
+
+        stats.inter_arrival_count = count
+        stats.inter_arrival_mean = mean
+        stats.inter_arrival_m2 = m2
+
     # ================================
     # STATS UPDATE (reusable)
     # ================================
@@ -120,52 +257,10 @@ class FlowSlidingWindowService:
     # ================================
     def _emit_snapshot_from_stats(
         self,
-        flow_key: FlowKey,
+        flow_key: Union[FlowKey, int],
         stats: FlowStats,
         window_start: float,
         window_end: float,
-    ) -> FlowSlidingWindowSnapshot:
-
-        window_duration = window_end - window_start
-
-        return FlowSlidingWindowSnapshot(
-            flow_key=flow_key,
-            window_start=window_start,
-            window_end=window_end,
-            window_duration=window_duration,
-
-            packet_count=stats.total_packets,
-            byte_count=stats.total_bytes,
-
-            packets_per_sec=(
-                stats.total_packets / window_duration
-                if window_duration > 0 else 0.0
-            ),
-            bytes_per_sec=(
-                stats.total_bytes / window_duration
-                if window_duration > 0 else 0.0
-            ),
-
-            flow_duration=stats.last_seen - stats.first_seen,
-
-            inter_arrival_mean=stats.inter_arrival_mean,
-            inter_arrival_variance=(
-                stats.inter_arrival_m2 / (stats.inter_arrival_count - 1)
-                if stats.inter_arrival_count > 1 else 0.0
-            ),
-
-            syn_count=stats.syn_count,
-            ack_count=stats.ack_count,
-            rst_count=stats.rst_count,
-            fin_count=stats.fin_count,
-
-            syn_ratio=(
-                stats.syn_count / stats.total_packets
-                if stats.total_packets > 0 else 0.0
-            ),
-            rst_ratio=(
-                stats.rst_count / stats.total_packets
-                if stats.total_packets > 0 else 0.0
-            ),
-            protocol=stats.protocol,
-        )
+    ) -> Union[FlowSlidingWindowSnapshot, FlowSnapshotHandle]:
+        handle = FlowSnapshotHandle(flow_key, stats, window_start, window_end)
+        return handle if self.lazy else handle.materialize()
@@ -1,25 +1,46 @@
-from typing import Dict
+from typing import Dict, Mapping, Union
 
 from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
-from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey
+from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey, pack_flow_key
 from NetworkReader.Data.ValueObjects.FlowBased.FlowStats import FlowStats
 from NetworkReader.Data.Enums.Direction import Direction
 from NetworkReader.Data.Enums.L4Protocol import L4Protocol
 
 
 class FlowTableService:
-    def __init__(self, flow_timeout: float):
+    """
+    packed_keys=True: dict key là int từ pack_flow_key (cần IP dạng int),
+    FlowKey chỉ được tạo khi get_active_flows() trả kết quả ra ngoài.
+    """
+
+    def __init__(self, flow_timeout: float, packed_keys: bool = False):
         self.flow_timeout = flow_timeout
-        self._flows: Dict[FlowKey, FlowStats] = {}
+        self.packed_keys = packed_keys
+        self._flows: Dict[Union[FlowKey, int], FlowStats] = {}
+
+    @classmethod
+    def view(
+        cls,
+        flow_timeout: float,
+        flows: Mapping[Union[FlowKey, int], FlowStats],
+        packed_keys: bool = False,
+    ) -> "FlowTableService":
+        """View trên state của PacketStateEngine (packet không đi qua on_packet)."""
+        service = cls(flow_timeout, packed_keys=packed_keys)
+        service._flows = flows
+        return service
 
     def on_packet(self, pkt: PacketMeta) -> None:
-        flow_key = FlowKey(
-            src_ip=pkt.src_ip,
-            dst_ip=pkt.dst_ip,
-            dst_port=pkt.dst_port,
-            protocol=pkt.protocol,
-            direction=pkt.direction,
-        )
+        if self.packed_keys:
+            flow_key = pack_flow_key(pkt)
+        else:
+            flow_key = FlowKey(
+                src_ip=pkt.src_ip,
+                dst_ip=pkt.dst_ip,
+                dst_port=pkt.dst_port,
+                protocol=pkt.protocol,
+                direction=pkt.direction,
+            )
 
         ts = pkt.timestamp
         stats = self._flows.get(flow_key)
@@ -40,6 +61,8 @@ class FlowTableService:
 
     def get_active_flows(self) -> Dict[FlowKey, FlowStats]:
         # return shallow copy to protect internal state
+        if self.packed_keys:
+            return {FlowKey.from_packed(fk): stats for fk, stats in self._flows.items()}
         return dict(self._flows)
 
     @staticmethod
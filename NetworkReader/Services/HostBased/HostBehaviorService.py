@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Mapping
 from collections import defaultdict
 
 from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
@@ -11,6 +11,16 @@ class HostBehaviorService:
     def __init__(self, host_timeout: float):
         self.host_timeout = host_timeout
         self._hosts: Dict[HostKey, HostStats] = {}
+        # view: _hosts là StateView của engine, key là src_ip thô
+        self._raw_keys = False
+
+    @classmethod
+    def view(cls, host_timeout: float, hosts: Mapping) -> "HostBehaviorService":
+        """View trên state của PacketStateEngine (key theo src_ip, packet không đi qua on_packet)."""
+        service = cls(host_timeout)
+        service._hosts = hosts
+        service._raw_keys = True
+        return service
 
     def on_packet(self, packet: PacketMeta) -> None:
         key = HostKey(src_ip=packet.src_ip)
@@ -25,6 +35,11 @@ class HostBehaviorService:
         self._update_host(host, packet)
 
     def cleanup(self, now: float) -> None:
+        """
+        Xóa host idle quá host_timeout. Ở view mode, del đi qua
+        StateView.__delitem__ và xóa cả entity của engine (lifetime lẫn
+        sliding window), không chỉ phần lifetime stats.
+        """
         expired = [
             hk for hk, h in self._hosts.items()
             if now - h.last_seen > self.host_timeout
@@ -33,6 +48,9 @@ class HostBehaviorService:
             del self._hosts[hk]
 
     def get_active_hosts(self) -> Dict[HostKey, HostStats]:
+        # return shallow copy to protect internal state
+        if self._raw_keys:
+            return {HostKey(src_ip=ip): stats for ip, stats in self._hosts.items()}
         return dict(self._hosts)
 
     @staticmethod
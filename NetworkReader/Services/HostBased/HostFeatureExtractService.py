@@ -1,5 +1,6 @@
 from NetworkReader.Data.ValueObjects.HostBased.HostSlidingWindowSnapshot import HostSlidingWindowSnapshot
 from NetworkReader.Data.ValueObjects.HostBased.HostFeatureVector import HostFeatureVector
+from NetworkReader.Services.LocalNetworkService import ip_to_str
 
 
 class HostFeatureExtractService:
@@ -14,7 +15,7 @@ class HostFeatureExtractService:
             # identity
             timestamp=snap.window_end,
             window_size=self.window_size,
-            src_ip=snap.src_ip,
+            src_ip=ip_to_str(snap.src_ip),
 
             # traffic
             packet_count=snap.packet_count,
@@ -1,10 +1,14 @@
-from typing import Dict, List
+from typing import Dict, List, Mapping, Union
 import math
 from collections import deque, defaultdict
 
 from NetworkReader.Data.ValueObjects.HostBased.HostStats import HostStats
+from NetworkReader.Data.ValueObjects.HostBased.HostWindowStats import HostWindowStats
 from NetworkReader.Data.ValueObjects.HostBased.HostSlidingWindowSnapshot import HostSlidingWindowSnapshot
+from NetworkReader.Data.ValueObjects.HostBased.HostSnapshotHandle import HostStatsHandle, HostWindowHandle
 from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
+from NetworkReader.Data.ValueObjects.PacketArray import TCP_ACK, TCP_FIN, TCP_RST, TCP_SYN
+from NetworkReader.Data.ValueObjects.WindowBuffer import HostWindowBuffer, window_flags
 from NetworkReader.Data.Enums.Direction import Direction
 
 
@@ -17,11 +21,37 @@ class HostSlidingWindowService:
         2. Remove packet quá hạn (window_size)
         3. Rebuild stats từ buffer hiện tại
         4. Emit snapshot realtime
+
+    incremental=True thay bước 3 bằng HostWindowStats chạy liên tục:
+    multiset IP/port có reference count và entropy giữ qua Σ c·log2(c),
+    nên chi phí mỗi packet không tăng theo số port bị scan. Buffer khi đó
+    là HostWindowBuffer (cột timestamp / size / flags / dst_ip / port).
+
+    lazy=True: snapshot là HostSnapshotHandle trên stats (field dẫn xuất
+    tính khi đọc, port entropy memoize trong handle), chỉ đúng tới packet
+    kế tiếp của host; cần giữ thì gọi materialize().
     """
 
-    def __init__(self, window_size: float):
+    def __init__(self, window_size: float, incremental: bool = False, lazy: bool = False):
         self.window_size = window_size
-        self._buffers: Dict[str, deque[PacketMeta]] = {}
+        self.incremental = incremental
+        self.lazy = lazy
+        self._buffers: Dict[str, Union[deque[PacketMeta], HostWindowBuffer]] = {}
+        self._window_stats: Dict[str, HostWindowStats] = {}
+
+    @classmethod
+    def view(
+        cls,
+        window_size: float,
+        buffers: Mapping,
+        window_stats: Mapping,
+        lazy: bool = False,
+    ) -> "HostSlidingWindowService":
+        """View trên state của PacketStateEngine (packet không đi qua process_packet)."""
+        service = cls(window_size, incremental=True, lazy=lazy)
+        service._buffers = buffers
+        service._window_stats = window_stats
+        return service
 
     # ================================
     # MAIN ENTRY
@@ -32,13 +62,25 @@ class HostSlidingWindowService:
         ts = pkt.timestamp
 
         if host_ip not in self._buffers:
-            self._buffers[host_ip] = deque()
+            self._buffers[host_ip] = HostWindowBuffer() if self.incremental else deque()
 
         buffer = self._buffers[host_ip]
+        window_start = ts - self.window_size
+
+        if self.incremental:
+            expired = buffer.append(
+                ts, pkt.packet_size, window_flags(pkt), pkt.dst_ip, self._host_dst_port(pkt),
+                window_start,
+            )
+            wstats = self._slide_window(host_ip, buffer, pkt, expired)
+            snapshots.append(
+                self._emit_snapshot_from_window(host_ip, wstats, window_start, ts)
+            )
+            return snapshots
+
         buffer.append(pkt)
 
         # 🔥 remove packet hết hạn (sliding window)
-        window_start = ts - self.window_size
         while buffer and buffer[0].timestamp < window_start:
             buffer.popleft()
 
@@ -84,50 +126,149 @@ class HostSlidingWindowService:
         return stats
 
     # ================================
-    # SNAPSHOT EMITTER
+    # INCREMENTAL WINDOW
     # ================================
-    def _emit_snapshot(self, host_ip: str, stats: HostStats, window_start: float, window_end: float) -> HostSlidingWindowSnapshot:
-        duration = window_end - window_start
-        return HostSlidingWindowSnapshot(
-            src_ip=host_ip,
+    def _slide_window(
+        self,
+        host_ip: str,
+        buffer: HostWindowBuffer,
+        pkt: PacketMeta,
+        expired: int,
+    ) -> HostWindowStats:
+        stats = self._window_stats.get(host_ip)
+        if stats is None:
+            stats = HostWindowStats(first_seen=pkt.timestamp, last_seen=pkt.timestamp)
+            self._window_stats[host_ip] = stats
 
-            window_start=window_start,
-            window_end=window_end,
-            window_duration=duration,
+        self._insert_window(stats, pkt)
 
-            packet_count=stats.total_packets,
-            byte_count=stats.total_bytes,
-            packets_per_sec=(stats.total_packets / duration if duration > 0 else 0.0),
+        old_first = stats.first_seen
+        if expired:
+            self._evict_window(stats, buffer, expired)
 
-            unique_dst_ips=len(stats.distinct_dst_ips),
-            unique_dst_ports=len(stats.distinct_dst_ports),
-            port_entropy=self._port_entropy(stats.dst_port_counter),
+        # flow duration được đo từ đầu window → dời mốc cho mọi close packet
+        stats.first_seen = buffer.first_ts
+        if stats.first_seen != old_first:
+            stats.close_offset_sum -= stats.flow_count * (stats.first_seen - old_first)
 
-            connection_attempts=stats.conn_attempts,
-            connection_rate=(stats.conn_attempts / duration if duration > 0 else 0.0),
-            failed_connection_ratio=(stats.failed_conn / stats.conn_attempts if stats.conn_attempts > 0 else 0.0),
+        return stats
 
-            syn_count=stats.syn_count,
-            ack_count=stats.ack_count,
-            rst_count=stats.rst_count,
-            syn_only_ratio=(stats.syn_only_count / stats.syn_count if stats.syn_count > 0 else 0.0),
+    @staticmethod
+    def _insert_window(stats: HostWindowStats, pkt: PacketMeta) -> None:
+        stats.last_seen = pkt.timestamp
+        stats.total_packets += 1
+        stats.total_bytes += pkt.packet_size
 
-            mean_flow_duration=stats.flow_duration_mean,
-        )
+        refs = stats.dst_ip_refs
+        refs[pkt.dst_ip] = refs.get(pkt.dst_ip, 0) + 1
+
+        port = HostSlidingWindowService._host_dst_port(pkt)
+        ports = stats.dst_port_refs
+        c = ports.get(port, 0)
+        ports[port] = c + 1
+        stats.port_clogc_sum += _xlog2x(c + 1) - _xlog2x(c)
+
+        syn_only = bool(pkt.syn and not pkt.ack)
+        if pkt.syn:
+            stats.syn_count += 1
+        if syn_only:
+            stats.syn_only_count += 1
+        if pkt.ack:
+            stats.ack_count += 1
+        if pkt.rst:
+            stats.rst_count += 1
+        if pkt.fin:
+            stats.fin_count += 1
+
+        # prefix balance (rst - syn_only) + sliding max
+        stats.rst_syn_balance += int(bool(pkt.rst)) - int(syn_only)
+        seq = stats.appended_seq
+        stats.appended_seq += 1
+        balance_max = stats.balance_max
+        while balance_max and balance_max[-1][1] <= stats.rst_syn_balance:
+            balance_max.pop()
+        balance_max.append((seq, stats.rst_syn_balance))
+
+        if pkt.fin or pkt.rst:
+            stats.flow_count += 1
+            stats.close_offset_sum += pkt.timestamp - stats.first_seen
+
+    @staticmethod
+    def _evict_window(stats: HostWindowStats, buffer: HostWindowBuffer, n: int) -> None:
+        # n packet vừa bị HostWindowBuffer.append evict, nằm ngay trước buffer.head
+        timestamps = buffer.timestamps
+        sizes = buffer.sizes
+        flags = buffer.flags
+        dst_ips = buffer.dst_ips
+        ports = buffer.ports
+        mask = buffer.mask
+        start = buffer.head - n
+
+        refs = stats.dst_ip_refs
+        port_refs = stats.dst_port_refs
+        balance_max = stats.balance_max
+        for k in range(start, start + n):
+            i = k & mask
+            stats.total_packets -= 1
+            stats.total_bytes -= sizes[i]
+
+            dst_ip = dst_ips[i]
+            c = refs[dst_ip] - 1
+            if c:
+                refs[dst_ip] = c
+            else:
+                del refs[dst_ip]
+
+            port = ports[i]
+            c = port_refs[port]
+            if c > 1:
+                port_refs[port] = c - 1
+            else:
+                del port_refs[port]
+            stats.port_clogc_sum -= _xlog2x(c) - _xlog2x(c - 1)
+
+            f = flags[i]
+            rst = bool(f & TCP_RST)
+            syn_only = f & (TCP_SYN | TCP_ACK) == TCP_SYN
+            if f & TCP_SYN:
+                stats.syn_count -= 1
+            if syn_only:
+                stats.syn_only_count -= 1
+            if f & TCP_ACK:
+                stats.ack_count -= 1
+            if rst:
+                stats.rst_count -= 1
+            if f & TCP_FIN:
+                stats.fin_count -= 1
+
+            stats.rst_syn_base += int(rst) - int(syn_only)
+            if balance_max and balance_max[0][0] == stats.evicted_seq:
+                balance_max.popleft()
+            stats.evicted_seq += 1
+
+            if f & (TCP_FIN | TCP_RST):
+                # first_seen chưa dời trong vòng evict → offset tính theo mốc cũ
+                stats.flow_count -= 1
+                stats.close_offset_sum -= timestamps[i] - stats.first_seen
+
+    def _emit_snapshot_from_window(
+        self,
+        host_ip: str,
+        stats: HostWindowStats,
+        window_start: float,
+        window_end: float,
+    ) -> Union[HostSlidingWindowSnapshot, HostWindowHandle]:
+        handle = HostWindowHandle(host_ip, stats, window_start, window_end)
+        return handle if self.lazy else handle.materialize()
 
     # ================================
-    # PORT ENTROPY
+    # SNAPSHOT EMITTER
     # ================================
-    @staticmethod
-    def _port_entropy(port_counter: Dict[int, int]) -> float:
-        total = sum(port_counter.values())
-        if total == 0:
-            return 0.0
-        entropy = 0.0
-        for cnt in port_counter.values():
-            p = cnt / total
-            entropy -= p * math.log2(p)
-        return entropy
+    def _emit_snapshot(
+        self, host_ip: str, stats: HostStats, window_start: float, window_end: float
+    ) -> Union[HostSlidingWindowSnapshot, HostStatsHandle]:
+        handle = HostStatsHandle(host_ip, stats, window_start, window_end)
+        return handle if self.lazy else handle.materialize()
 
     # ================================
     # STATS UPDATE
@@ -139,16 +280,7 @@ class HostSlidingWindowService:
         stats.total_packets += 1
         stats.total_bytes += pkt.packet_size
 
-        # Use the original destination port for host-level fan-out metrics.
-        # PacketMeta.dst_port may contain the "flow" destination port used by
-        # flow-level normalization (it's set to src_port for BACKWARD packets).
-        # For host metrics we want the actual destination port seen in the packet:
-        # - if direction is FORWARD, the packet.dst_port is the true dst port
-        # - if direction is BACKWARD, the original dst port is stored in pkt.src_port
-        if pkt.direction == Direction.FORWARD:
-            dst_port_for_host = pkt.dst_port
-        else:
-            dst_port_for_host = pkt.src_port
+        dst_port_for_host = HostSlidingWindowService._host_dst_port(pkt)
 
         stats.distinct_dst_ips.add(pkt.dst_ip)
         stats.distinct_dst_ports.add(dst_port_for_host)
@@ -178,3 +310,19 @@ class HostSlidingWindowService:
             diff = duration - stats.flow_duration_mean
             stats.flow_duration_mean += diff / stats.flow_count
             stats.flow_duration_m2 += diff * (duration - stats.flow_duration_mean)
+
+    @staticmethod
+    def _host_dst_port(pkt: PacketMeta) -> int:
+        # Use the original destination port for host-level fan-out metrics.
+        # PacketMeta.dst_port may contain the "flow" destination port used by
+        # flow-level normalization (it's set to src_port for BACKWARD packets).
+        # For host metrics we want the actual destination port seen in the packet:
+        # - if direction is FORWARD, the packet.dst_port is the true dst port
+        # - if direction is BACKWARD, the original dst port is stored in pkt.src_port
+        if pkt.direction == Direction.FORWARD:
+            return pkt.dst_port
+        return pkt.src_port
+
+
+def _xlog2x(c: int) -> float:
+    return c * math.log2(c) if c > 1 else 0.0
@@ -0,0 +1,58 @@
+import ipaddress
+import socket
+import struct
+from functools import lru_cache
+from typing import Dict, Iterable, Set, Union
+
+import numpy as np
+
+_U32 = struct.Struct("!I")
+
+
+def ip_to_int(ip: str) -> int:
+    return _U32.unpack(socket.inet_aton(ip))[0]
+
+
+@lru_cache(maxsize=65536)
+def ip_to_str(ip: Union[int, str]) -> str:
+    """Dotted string của IPv4 int (string giữ nguyên); cache vì IP lặp lại rất nhiều."""
+    if isinstance(ip, str):
+        return ip
+    return socket.inet_ntoa(_U32.pack(ip))
+
+
+class LocalNetworkService:
+    """
+    Tập mạng local dạng CIDR ("192.168.1.0/24") hoặc IP đơn ("10.0.0.5" = /32).
+
+    Mỗi prefix length có một mask int và một set network address; một IP
+    thuộc local nếu (ip & mask) nằm trong set của mask đó. Số prefix length
+    khác nhau thường chỉ 1-2 nên mỗi lần kiểm tra chỉ vài phép AND + lookup.
+    """
+
+    def __init__(self, networks: Iterable[str]):
+        self._by_mask: Dict[int, Set[int]] = {}
+
+        for entry in networks:
+            net = ipaddress.IPv4Network(entry, strict=False)
+            mask = int(net.netmask)
+            self._by_mask.setdefault(mask, set()).add(int(net.network_address))
+
+        # mask dài (cụ thể) trước; list để duyệt nhanh
+        self._masks = sorted(
+            ((mask, frozenset(nets)) for mask, nets in self._by_mask.items()),
+            reverse=True,
+        )
+
+    def contains(self, ip: int) -> bool:
+        for mask, nets in self._masks:
+            if ip & mask in nets:
+                return True
+        return False
+
+    def contains_array(self, ips: np.ndarray) -> np.ndarray:
+        """contains() cho cả mảng uint32."""
+        result = np.zeros(ips.shape, dtype=bool)
+        for mask, nets in self._masks:
+            result |= np.isin(ips & np.uint32(mask), np.fromiter(nets, dtype=np.uint32))
+        return result
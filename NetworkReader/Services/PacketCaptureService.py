@@ -1,25 +1,57 @@
-import queue
 import threading
-import time
-from typing import Optional, Tuple
+from collections import deque
+from typing import List, Optional, Tuple
 
-import pydivert
+from NetworkReader.Data.ValueObjects.PacketBatch import PacketBatch
+from NetworkReader.Services.Capture.CaptureBackend import CaptureBackend
+from NetworkReader.Services.Capture.PacketRing import PacketRing
+from NetworkReader.Services.Capture.SimulatedClock import SimulatedClock
+from NetworkReader.Services.Capture.WinDivertBackend import WinDivertBackend
 
 
 class PacketCaptureService:
+    """
+    Capture thread: đọc PacketBatch từ CaptureBackend và ghi vào PacketRing,
+    mỗi batch một lần put_many (không phải mỗi packet).
+
+    Mặc định dùng WinDivertBackend (live, Windows). Backend khác (ví dụ
+    PcapReplayBackend, AfPacketBackend) được truyền qua tham số backend.
+    Nếu có clock (SimulatedClock), clock được đẩy tới timestamp của mỗi
+    packet khi packet được lấy ra.
+
+    queue_size là sức chứa ring (số packet); batch_size là số packet tối
+    đa mỗi batch backend gom được. Buffer của batch được release cho backend
+    khi consumer đã lấy hết packet của batch và gọi next_packets lần kế tiếp.
+    """
+
+    def __init__(
+        self,
+        filter_str: str = "ip and (tcp or udp)",
+        queue_size: int = 10000,
+        backend: Optional[CaptureBackend] = None,
+        clock: Optional[SimulatedClock] = None,
+        batch_size: int = 64,
+    ):
+        if backend is None:
+            backend = WinDivertBackend(filter_str)
 
-    def __init__(self, filter_str: str = "ip and (tcp or udp)", queue_size: int = 10000):
         self.filter_str = filter_str
-        self._queue: queue.Queue[Tuple[bytes, float]] = queue.Queue(maxsize=queue_size)
+        self.backend = backend
+        self.clock = clock
+        self.batch_size = batch_size
+        self._ring = PacketRing(queue_size)
         self._stop_event = threading.Event()
+        self._eof_event = threading.Event()
         self._thread: Optional[threading.Thread] = None
-        self._divert: Optional[pydivert.WinDivert] = None
         self.dropped_packets = 0
 
+        # batch còn giữ buffer của backend: (ring.written sau khi ghi, batch)
+        self._in_flight: deque[Tuple[int, PacketBatch]] = deque()
+
     def start(self) -> None:
         self._stop_event.clear()
-        self._divert = pydivert.WinDivert(self.filter_str, flags=pydivert.Flag.SNIFF)
-        self._divert.open()
+        self._eof_event.clear()
+        self.backend.open()
 
         self._thread = threading.Thread(target=self._capture_loop, daemon=True)
         self._thread.start()
@@ -27,32 +59,67 @@ class PacketCaptureService:
     def stop(self) -> None:
         self._stop_event.set()
 
-        if self._divert:
-            self._divert.close()
-            self._divert = None
+        # close trước để unblock capture thread đang chờ packet
+        self.backend.close()
 
         if self._thread:
             self._thread.join()
             self._thread = None
 
-    def next_packet(self, timeout: float = 1.0) -> Optional[Tuple[bytes, float]]:
-        try:
-            return self._queue.get(timeout=timeout)
-        except queue.Empty:
-            return None
+    @property
+    def exhausted(self) -> bool:
+        """True khi backend đã hết packet (EOF) và mọi packet đã được lấy ra."""
+        return self._eof_event.is_set() and len(self._ring) == 0
+
+    def next_packets(self, max_packets: int, timeout: float = 1.0) -> List[Tuple[object, float]]:
+        """
+        Lấy tối đa max_packets packet trong một lần khóa ring.
+
+        Chờ tối đa timeout giây nếu ring rỗng. Clock (nếu có) được đẩy tới
+        timestamp của packet cuối.
+        """
+        # packet của các lần gọi trước đã được parse xong → trả buffer cho backend
+        self._release_consumed()
+
+        items = self._ring.get_many(max_packets, timeout=timeout)
+
+        if items and self.clock is not None:
+            self.clock.advance_to(items[-1][1])
+        return items
+
+    def next_packet(self, timeout: float = 1.0) -> Optional[Tuple[object, float]]:
+        items = self.next_packets(1, timeout=timeout)
+        return items[0] if items else None
+
+    def _release_consumed(self) -> None:
+        consumed = self._ring.consumed
+        in_flight = self._in_flight
+        while in_flight and in_flight[0][0] <= consumed:
+            _, batch = in_flight.popleft()
+            self.backend.release(batch)
 
     def _capture_loop(self) -> None:
-        assert self._divert is not None
+        ring = self._ring
+        try:
+            for batch in self.backend.batches(self.batch_size):
+                if self._stop_event.is_set():
+                    break
 
-        for packet in self._divert:
-            if self._stop_event.is_set():
-                break
+                if self.backend.lossless:
+                    written = ring.put_all(batch.packets, self._stop_event)
+                else:
+                    written = ring.put_many(batch.packets)
+                    self.dropped_packets += len(batch) - written
 
-            try:
-                raw_bytes = packet.raw
-                timestamp = time.time()
+                if written == 0:
+                    self.backend.release(batch)
+                elif batch.slot_ids:
+                    self._in_flight.append((ring.written, batch))
 
-                self._queue.put_nowait((raw_bytes, timestamp))
+        except Exception:
+            # backend bị close giữa chừng bởi stop() → không phải lỗi
+            if not self._stop_event.is_set():
+                raise
 
-            except queue.Full:
-                self.dropped_packets += 1
\ No newline at end of file
+        finally:
+            self._eof_event.set()
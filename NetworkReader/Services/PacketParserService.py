@@ -1,94 +1,105 @@
 import struct
 import socket
-from typing import Optional, Set
+from typing import Optional, Sequence, Set
+
+import numpy as np
 
 from NetworkReader.Data.Enums.L4Protocol import L4Protocol
 from NetworkReader.Data.Enums.Direction import Direction
+from NetworkReader.Data.ValueObjects.PacketArray import PACKET_DTYPE
 from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
-from NetworkReader.Services.PacketCaptureService import PacketCaptureService
+from NetworkReader.Services.LocalNetworkService import LocalNetworkService, ip_to_str
 
 IP_MIN_HEADER_LEN = 20
 TCP_MIN_HEADER_LEN = 20
 UDP_HEADER_LEN = 8
 
+# Precompiled headers, đọc thẳng từ buffer bằng unpack_from (không slice)
+# IPv4: version_ihl, total_length, frag, protocol, src, dst (bỏ qua các field không dùng)
+_IPV4_HEADER = struct.Struct("!B1xH2xH1xB2xII")
+# TCP: src_port, dst_port, data_offset, flags
+_TCP_HEADER = struct.Struct("!HH8xBB6x")
+# UDP: src_port, dst_port
+_UDP_HEADER = struct.Struct("!HH4x")
+
+_TCP = L4Protocol.TCP.value
+_UDP = L4Protocol.UDP.value
+
+# parse_batch: số byte đầu mỗi packet được gom vào ma trận header
+# (IPv4 header tối đa 60 byte + TCP header cố định 20 byte)
+_BATCH_HEADER_LEN = 60 + TCP_MIN_HEADER_LEN
+
 
 class PacketParserService:
+    """
+    Parse IPv4 TCP/UDP packet thành PacketMeta.
 
-    def __init__(self, local_ips: Set[str]):
-        self._local_ips = local_ips
+    raw_packet có thể là bytes hoặc memoryview (buffer pool / shared memory):
+    header được đọc bằng struct.Struct.unpack_from nên không copy.
 
-    def _resolve_direction(self, src_ip: str, dst_ip: str) -> Optional[Direction]:
-        src_local = src_ip in self._local_ips
-        dst_local = dst_ip in self._local_ips
+    local_ips nhận IP đơn hoặc CIDR ("192.168.1.0/24"); direction được xác
+    định trên địa chỉ int bằng mask trước mọi chuyển đổi sang string.
+    int_ips=True: PacketMeta giữ src_ip / dst_ip dạng int, các extract
+    service đổi sang dotted string ở output.
 
-        if src_local and not dst_local:
-            return Direction.FORWARD
-        if not src_local and dst_local:
-            return Direction.BACKWARD
+    parse_batch() làm cùng việc cho cả batch bằng NumPy và trả structured
+    array (PACKET_DTYPE) thay vì PacketMeta.
+    """
 
-        return None
+    def __init__(self, local_ips: Set[str], int_ips: bool = False):
+        self._local_ips = local_ips
+        self._local = LocalNetworkService(local_ips)
+        self.int_ips = int_ips
 
-    def parse(self, raw_packet: bytes, timestamp: float) -> Optional[PacketMeta]:
+    def parse(self, raw_packet, timestamp: float) -> Optional[PacketMeta]:
 
         # WinDivert: raw_packet bắt đầu từ IPv4 header
-        if len(raw_packet) < IP_MIN_HEADER_LEN:
+        length = len(raw_packet)
+        if length < IP_MIN_HEADER_LEN:
             return None
 
-        iph = struct.unpack(
-            "!BBHHHBBH4s4s",
-            raw_packet[:IP_MIN_HEADER_LEN]
-        )
+        (
+            version_ihl, total_length, flags_frag, protocol, src_ip, dst_ip
+        ) = _IPV4_HEADER.unpack_from(raw_packet)
 
-        version_ihl = iph[0]
-        version = version_ihl >> 4
-        if version != 4:
+        if version_ihl >> 4 != 4:
             return None
 
-        ihl = (version_ihl & 0x0F) * 4
-        total_length = iph[2]
-        protocol = iph[6]
-
         # Drop fragmented packets
-        flags_frag = iph[4]
-        fragment_offset = flags_frag & 0x1FFF
-        if fragment_offset != 0:
+        if flags_frag & 0x1FFF:
             return None
 
-        if len(raw_packet) < ihl:
+        if protocol != _TCP and protocol != _UDP:
             return None
 
-        src_ip = socket.inet_ntoa(iph[8])
-        dst_ip = socket.inet_ntoa(iph[9])
+        # Direction trên địa chỉ int, trước mọi chuyển đổi sang string
+        is_local = self._local.contains
+        src_local = is_local(src_ip)
+        if src_local == is_local(dst_ip):
+            return None
+        direction = Direction.FORWARD if src_local else Direction.BACKWARD
+
+        if not self.int_ips:
+            src_ip = ip_to_str(src_ip)
+            dst_ip = ip_to_str(dst_ip)
 
-        direction = self._resolve_direction(src_ip, dst_ip)
-        if direction is None:
+        ihl = (version_ihl & 0x0F) * 4
+        if length < ihl:
             return None
 
-        packet_size = min(total_length, len(raw_packet))
+        # total_length là kích thước thật cả khi capture bị cắt ở snaplen
+        # (AF_PACKET, pcap); 0 = TSO chưa điền → dùng độ dài capture
+        packet_size = total_length if total_length else length
 
         # ================= TCP =================
-        if protocol == L4Protocol.TCP.value:
+        if protocol == _TCP:
 
-            tcp_start = ihl
-            if len(raw_packet) < tcp_start + TCP_MIN_HEADER_LEN:
+            if length < ihl + TCP_MIN_HEADER_LEN:
                 return None
 
-            tcph = struct.unpack(
-                "!HHLLBBHHH",
-                raw_packet[tcp_start:tcp_start + TCP_MIN_HEADER_LEN]
-            )
-
-            src_port = tcph[0]
-            dst_port = tcph[1]
-
-            flow_dst_port = (
-                dst_port if direction == Direction.FORWARD else src_port
-            )
-
-            data_offset = (tcph[4] >> 4) * 4
-            flags = tcph[5]
+            src_port, dst_port, offset_byte, flags = _TCP_HEADER.unpack_from(raw_packet, ihl)
 
-            if len(raw_packet) < tcp_start + data_offset:
+            if length < ihl + (offset_byte >> 4) * 4:
                 return None
 
             return PacketMeta(
@@ -97,7 +108,7 @@ class PacketParserService:
                 src_ip=src_ip,
                 dst_ip=dst_ip,
                 src_port=src_port,
-                dst_port=flow_dst_port,
+                dst_port=dst_port if src_local else src_port,
                 protocol=L4Protocol.TCP,
                 packet_size=packet_size,
                 syn=bool(flags & 0x02),
@@ -107,40 +118,107 @@ class PacketParserService:
             )
 
         # ================= UDP =================
-        if protocol == L4Protocol.UDP.value:
+        if length < ihl + UDP_HEADER_LEN:
+            return None
 
-            udp_start = ihl
-            if len(raw_packet) < udp_start + UDP_HEADER_LEN:
-                return None
+        src_port, dst_port = _UDP_HEADER.unpack_from(raw_packet, ihl)
+
+        return PacketMeta(
+            timestamp=timestamp,
+            direction=direction,
+            src_ip=src_ip,
+            dst_ip=dst_ip,
+            src_port=src_port,
+            dst_port=dst_port if src_local else src_port,
+            protocol=L4Protocol.UDP,
+            packet_size=packet_size,
+            syn=None,
+            ack=None,
+            rst=None,
+            fin=None,
+        )
 
-            udph = struct.unpack(
-                "!HHHH",
-                raw_packet[udp_start:udp_start + UDP_HEADER_LEN]
+    def parse_batch(self, buffers: Sequence, timestamps: Sequence[float]) -> np.ndarray:
+        """
+        Parse cả batch packet IPv4 thành structured array PACKET_DTYPE.
+
+        Cùng điều kiện lọc với parse(): packet bị parse() trả None thì không
+        có row; các row còn lại giữ thứ tự của buffers.
+        """
+        n = len(buffers)
+        if n == 0:
+            return np.empty(0, dtype=PACKET_DTYPE)
+
+        lengths = np.fromiter(map(len, buffers), dtype=np.int64, count=n)
+        # chỉ copy phần header của mỗi packet, không copy payload
+        data = np.frombuffer(
+            b"".join([b[:_BATCH_HEADER_LEN] for b in buffers]), dtype=np.uint8
+        )
+        if data.size == 0:
+            return np.empty(0, dtype=PACKET_DTYPE)
+
+        header_lengths = np.minimum(lengths, _BATCH_HEADER_LEN)
+        starts = np.zeros(n, dtype=np.int64)
+        np.cumsum(header_lengths[:-1], out=starts[1:])
+
+        def gather(offset, width):
+            # ma trận (n, width) byte bắt đầu từ offset của mỗi packet; ngoài packet = 0
+            cols = offset[:, None] + np.arange(width)
+            out = data[np.minimum(starts[:, None] + cols, data.size - 1)]
+            out[cols >= header_lengths[:, None]] = 0
+            return out
+
+        ip = gather(np.zeros(n, dtype=np.int64), IP_MIN_HEADER_LEN)
+        version_ihl = ip[:, 0]
+        ihl = (version_ihl & 0x0F).astype(np.int64) * 4
+        total_length = _be16(ip, 2)
+        frag = _be16(ip, 6) & 0x1FFF
+        protocol = ip[:, 9]
+        src_ip = (_be16(ip, 12) << 16) | _be16(ip, 14)
+        dst_ip = (_be16(ip, 16) << 16) | _be16(ip, 18)
+
+        src_local = self._local.contains_array(src_ip)
+        dst_local = self._local.contains_array(dst_ip)
+        is_tcp = protocol == _TCP
+        is_udp = protocol == _UDP
+
+        # port / data offset / flags nằm trong 14 byte đầu của L4 header (offset ihl)
+        l4 = gather(ihl, 14)
+        src_port = _be16(l4, 0)
+        dst_port = _be16(l4, 2)
+        data_offset = (l4[:, 12] >> 4).astype(np.int64) * 4
+        flags = l4[:, 13]
+
+        valid = (
+            (lengths >= IP_MIN_HEADER_LEN)
+            & (version_ihl >> 4 == 4)
+            & (frag == 0)
+            & (src_local != dst_local)
+            & (lengths >= ihl)
+            & (
+                (is_tcp & (lengths >= ihl + TCP_MIN_HEADER_LEN) & (lengths >= ihl + data_offset))
+                | (is_udp & (lengths >= ihl + UDP_HEADER_LEN))
             )
+        )
 
-            src_port = udph[0]
-            dst_port = udph[1]
-
-            flow_dst_port = (
-                dst_port if direction == Direction.FORWARD else src_port
-            )
+        out = np.empty(int(valid.sum()), dtype=PACKET_DTYPE)
+        out["timestamp"] = np.asarray(timestamps, dtype=np.float64)[valid]
+        out["src_ip"] = src_ip[valid]
+        out["dst_ip"] = dst_ip[valid]
+        out["src_port"] = src_port[valid]
+        out["dst_port"] = np.where(src_local, dst_port, src_port)[valid]
+        out["protocol"] = protocol[valid]
+        out["direction"] = np.where(
+            src_local, Direction.FORWARD.value, Direction.BACKWARD.value
+        )[valid]
+        out["tcp_flags"] = np.where(is_tcp, flags, 0)[valid]
+        out["packet_size"] = np.where(total_length > 0, total_length, lengths)[valid]
+        return out
 
-            return PacketMeta(
-                timestamp=timestamp,
-                direction=direction,
-                src_ip=src_ip,
-                dst_ip=dst_ip,
-                src_port=src_port,
-                dst_port=flow_dst_port,
-                protocol=L4Protocol.UDP,
-                packet_size=packet_size,
-                syn=None,
-                ack=None,
-                rst=None,
-                fin=None,
-            )
 
-        return None
+def _be16(header: np.ndarray, col: int) -> np.ndarray:
+    """Big-endian uint16 ở cột col của ma trận byte, trả uint32."""
+    return (header[:, col].astype(np.uint32) << 8) | header[:, col + 1]
 
 
 def debug_dump_packet( raw_packet: bytes):
@@ -197,6 +275,8 @@ def debug_dump_packet( raw_packet: bytes):
 
     print("=================================\n")
 if __name__ == "__main__":
+    from NetworkReader.Services.PacketCaptureService import PacketCaptureService
+
     capture = PacketCaptureService(filter_str="tcp.Syn == 1 and tcp.Ack == 0")
     capture.start()
 
@@ -0,0 +1,575 @@
+import sys
+from array import array
+from collections import OrderedDict, defaultdict, deque
+from collections.abc import Mapping
+from itertools import islice
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
+
+from NetworkReader.Data.Enums.EvictionPolicy import EvictionPolicy
+from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey, pack_flow_key
+from NetworkReader.Data.ValueObjects.FlowBased.FlowSlidingWindowSnapshot import (
+    FlowSlidingWindowSnapshot
+)
+from NetworkReader.Data.ValueObjects.FlowBased.FlowState import FlowState
+from NetworkReader.Data.ValueObjects.FlowBased.FlowStats import FlowStats
+from NetworkReader.Data.ValueObjects.HostBased.HostSlidingWindowSnapshot import HostSlidingWindowSnapshot
+from NetworkReader.Data.ValueObjects.HostBased.HostState import HostState
+from NetworkReader.Data.ValueObjects.HostBased.HostStats import HostStats
+from NetworkReader.Data.ValueObjects.HostBased.HostWindowStats import HostWindowStats
+from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
+from NetworkReader.Data.ValueObjects.PacketArray import TCP_ACK, TCP_FIN, TCP_RST, TCP_SYN
+from NetworkReader.Data.ValueObjects.TailStats import TailStats
+from NetworkReader.Data.ValueObjects.WindowBuffer import (
+    WINDOW_FORWARD,
+    FlowWindowBuffer,
+    HostWindowBuffer,
+)
+from NetworkReader.Services.FlowBased.FlowSlidingWindowService import FlowSlidingWindowService
+from NetworkReader.Services.FlowBased.FlowTableService import FlowTableService
+from NetworkReader.Services.HostBased.HostBehaviorService import HostBehaviorService
+from NetworkReader.Services.HostBased.HostSlidingWindowService import (
+    HostSlidingWindowService,
+    _xlog2x,
+)
+from NetworkReader.Services.TimingWheel import TimingWheel
+
+
+def _state_bytes(state) -> int:
+    # object + stats / buffer con + container rỗng của chúng (dict / set / deque / array)
+    size = sys.getsizeof(state)
+    for name in state.__slots__:
+        value = getattr(state, name)
+        size += sys.getsizeof(value)
+        for cls in type(value).__mro__:
+            for sub in getattr(cls, "__slots__", ()):
+                field_value = getattr(value, sub)
+                if isinstance(field_value, (dict, set, deque, array)):
+                    size += sys.getsizeof(field_value)
+    return size
+
+
+# ước lượng bộ nhớ (byte) cho gauge: entry rỗng + dict slot, mỗi packet trong
+# buffer (cột của FlowWindowBuffer / HostWindowBuffer; ring dư tối đa 2x)
+_DICT_SLOT_BYTES = 64
+_FLOW_ENTRY_BYTES = _DICT_SLOT_BYTES + _state_bytes(
+    FlowState(table=FlowStats(0.0, 0.0), window=FlowStats(0.0, 0.0))
+)
+_HOST_ENTRY_BYTES = _DICT_SLOT_BYTES + _state_bytes(
+    HostState(behavior=HostStats(0.0, 0.0), window=HostWindowStats(0.0, 0.0))
+)
+_FLOW_SLOT_BYTES = 8 + 4 + 1  # timestamp, size (uint32), flags
+_HOST_SLOT_BYTES = _FLOW_SLOT_BYTES + 4 + 2  # + dst_ip (uint32), port
+# compact_windows=False: cột list → pointer 8 byte mỗi cột + object được box
+# (float 24, int 28 / 32 byte; flags < 256 là small int dùng chung)
+_FLOW_LIST_SLOT_BYTES = 3 * 8 + 24 + 28
+_HOST_LIST_SLOT_BYTES = _FLOW_LIST_SLOT_BYTES + 2 * 8 + 32 + 28
+
+
+class StateView(Mapping):
+    """
+    Mapping key → một field của entry trong dict state của engine.
+
+    Cho các service cũ đọc (và xóa entity qua cleanup) trên state dùng chung
+    mà không cần dict riêng.
+    """
+
+    def __init__(self, entries: dict, attr: str, on_delete: Optional[Callable] = None):
+        self._entries = entries
+        self._attr = attr
+        self._on_delete = on_delete
+
+    def __getitem__(self, key):
+        return getattr(self._entries[key], self._attr)
+
+    def __iter__(self) -> Iterator:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key) -> bool:
+        return key in self._entries
+
+    def __delitem__(self, key) -> None:
+        # xóa cả entity (lifetime + window)
+        state = self._entries.pop(key)
+        if self._on_delete is not None:
+            self._on_delete(state)
+
+
+class PacketStateEngine:
+    """
+    Fused per-packet state update cho cả flow và host.
+
+    Mỗi packet: một lần lookup flow entry, một lần lookup host entry, decode
+    direction / TCP flags một lần, rồi cập nhật cùng lúc lifetime stats
+    (FlowTableService / HostBehaviorService) và incremental sliding window
+    (FlowSlidingWindowService / HostSlidingWindowService).
+
+    Bốn service cũ vẫn dùng được dưới dạng view trên state chung
+    (flow_table, flow_window, host_behavior, host_window): đọc stats,
+    cleanup, dựng snapshot. Packet chỉ đi qua engine.process_packet.
+    Host view key theo src_ip (không bọc HostKey).
+
+    Flow / host idle quá flow_timeout / host_timeout (theo timestamp
+    packet, nên replay cũng đúng) bị xóa khỏi state qua TimingWheel:
+    mỗi entity chỉ được kiểm tra lại khi deadline của nó tới, trễ tối đa
+    expire_tick giây. expired_flows / expired_hosts đếm số entity đã xóa.
+
+    max_flows / max_hosts giới hạn số entity (chống state-exhaustion flood,
+    ví dụ SYN flood spoof source): table đầy thì evict theo evict_policy
+    (LRU, hoặc ít packet nhất trong eviction_sample entity LRU nhất).
+    Entity bị evict, hoặc expire khi có ít hơn tail_min_packets packet,
+    được cộng vào flow_tail / host_tail. flow_memory_bytes /
+    host_memory_bytes là gauge bộ nhớ xấp xỉ (không tính set / multiset
+    fan-out của host).
+
+    Tick mode (emit_interval, giây theo timestamp packet): packet đi qua
+    update() chỉ đánh dấu flow dirty; mỗi tick caller gọi emit_dirty() để
+    lấy snapshot một lần cho mỗi flow / host đã đổi, thay vì một cặp
+    snapshot cho mỗi packet. FlowState.last_emit_ts là lần emit cuối.
+
+    lazy_snapshots=True: snapshot là handle trên stats đang chạy
+    (FlowSnapshotHandle / HostWindowHandle), chỉ đúng tới update kế tiếp
+    của entity đó → consumer phải đọc ngay (hoặc materialize()).
+
+    compact_windows=False: buffer window dùng cột list thay vì array, đổi
+    ~5-8x bộ nhớ mỗi packet trong window lấy append nhanh hơn (xem
+    FlowWindowBuffer).
+    """
+
+    def __init__(
+        self,
+        window_size: float,
+        flow_timeout: float,
+        host_timeout: float,
+        packed_keys: bool = False,
+        expire_tick: float = 1.0,
+        max_flows: Optional[int] = None,
+        max_hosts: Optional[int] = None,
+        evict_policy: EvictionPolicy = EvictionPolicy.LRU,
+        eviction_sample: int = 8,
+        tail_min_packets: int = 2,
+        emit_interval: Optional[float] = None,
+        lazy_snapshots: bool = False,
+        compact_windows: bool = True,
+    ):
+        if flow_timeout < window_size or host_timeout < window_size:
+            raise ValueError("flow_timeout and host_timeout must be >= window_size")
+        if (max_flows is not None and max_flows < 1) or (max_hosts is not None and max_hosts < 1):
+            raise ValueError("max_flows and max_hosts must be >= 1")
+        if emit_interval is not None and emit_interval <= 0:
+            raise ValueError("emit_interval must be > 0")
+
+        self.window_size = window_size
+        self.flow_timeout = flow_timeout
+        self.host_timeout = host_timeout
+        self.packed_keys = packed_keys
+        self.max_flows = max_flows
+        self.max_hosts = max_hosts
+        self.evict_policy = EvictionPolicy(evict_policy)
+        self.eviction_sample = eviction_sample
+        self.tail_min_packets = tail_min_packets
+        self.emit_interval = emit_interval
+        self.compact_windows = compact_windows
+        self._flow_slot_bytes = _FLOW_SLOT_BYTES if compact_windows else _FLOW_LIST_SLOT_BYTES
+        self._host_slot_bytes = _HOST_SLOT_BYTES if compact_windows else _HOST_LIST_SLOT_BYTES
+
+        # có giới hạn → OrderedDict giữ thứ tự LRU (move_to_end mỗi packet)
+        self._flows: Dict[Union[FlowKey, int], FlowState] = (
+            OrderedDict() if max_flows is not None else {}
+        )
+        self._hosts: Dict[Union[str, int], HostState] = (
+            OrderedDict() if max_hosts is not None else {}
+        )
+
+        self.flow_tail = TailStats()
+        self.host_tail = TailStats()
+        self.evicted_flows = 0
+        self.evicted_hosts = 0
+        # tổng số packet đang nằm trong các buffer window
+        self._flow_buffered = 0
+        self._host_buffered = 0
+
+        # expiration: wheel giữ (key, state); entry bị thay / xóa ngoài engine thì bỏ qua
+        self._flow_wheel = TimingWheel(expire_tick)
+        self._host_wheel = TimingWheel(expire_tick)
+        self._next_expire_ts = float("-inf")
+        self.expired_flows = 0
+        self.expired_hosts = 0
+
+        # tick mode: flow_key → (flow, host_ip, host) đã đổi từ lần emit trước
+        self._dirty: Dict = {}
+        self._next_emit_ts = float("-inf")
+
+        self.flow_table = FlowTableService.view(
+            flow_timeout,
+            StateView(self._flows, "table", self._forget_flow),
+            packed_keys=packed_keys,
+        )
+        self.flow_window = FlowSlidingWindowService.view(
+            window_size,
+            buffers=StateView(self._flows, "buffer", self._forget_flow),
+            stats=StateView(self._flows, "window", self._forget_flow),
+            last_emit_ts=StateView(self._flows, "last_emit_ts", self._forget_flow),
+            packed_keys=packed_keys,
+            lazy=lazy_snapshots,
+        )
+        self.host_behavior = HostBehaviorService.view(
+            host_timeout, StateView(self._hosts, "behavior", self._forget_host)
+        )
+        self.host_window = HostSlidingWindowService.view(
+            window_size,
+            buffers=StateView(self._hosts, "buffer", self._forget_host),
+            window_stats=StateView(self._hosts, "window", self._forget_host),
+            lazy=lazy_snapshots,
+        )
+
+    @property
+    def live_flows(self) -> int:
+        return len(self._flows)
+
+    @property
+    def live_hosts(self) -> int:
+        return len(self._hosts)
+
+    @property
+    def flow_memory_bytes(self) -> int:
+        return len(self._flows) * _FLOW_ENTRY_BYTES + self._flow_buffered * self._flow_slot_bytes
+
+    @property
+    def host_memory_bytes(self) -> int:
+        return len(self._hosts) * _HOST_ENTRY_BYTES + self._host_buffered * self._host_slot_bytes
+
+    # ================================
+    # MAIN ENTRY
+    # ================================
+    def process_packet(
+        self, pkt: PacketMeta
+    ) -> Tuple[FlowSlidingWindowSnapshot, HostSlidingWindowSnapshot]:
+        """Per-packet mode: cập nhật state và trả snapshot flow / host của packet."""
+        flow_key, flow, host_ip, host = self._update(pkt)
+        ts = pkt.timestamp
+        window_start = ts - self.window_size
+        return (
+            self.flow_window._emit_snapshot_from_stats(flow_key, flow.window, window_start, ts),
+            self.host_window._emit_snapshot_from_window(host_ip, host.window, window_start, ts),
+        )
+
+    def update(self, pkt: PacketMeta) -> None:
+        """Tick mode: cập nhật state và đánh dấu flow dirty, snapshot chờ emit_dirty()."""
+        flow_key, flow, host_ip, host = self._update(pkt)
+        self._dirty[flow_key] = (flow, host_ip, host)
+
+    def emit_due(self, now: float) -> bool:
+        return now >= self._next_emit_ts
+
+    def emit_dirty(
+        self, now: float
+    ) -> List[Tuple[FlowSlidingWindowSnapshot, HostSlidingWindowSnapshot]]:
+        """
+        Snapshot (flow, host của src_ip) cho mỗi flow dirty từ lần emit
+        trước, theo thứ tự flow bị dirty. Mỗi flow / host được dựng snapshot
+        một lần, tại packet cuối cùng của nó (giống snapshot per-packet của
+        packet đó). Flow đã bị expire / evict trong tick vẫn được emit.
+        """
+        window_size = self.window_size
+        host_snapshots = {}
+        snapshots = []
+
+        for flow_key, (flow, host_ip, host) in self._dirty.items():
+            host_snapshot = host_snapshots.get(host_ip)
+            if host_snapshot is None:
+                end = host.window.last_seen
+                host_snapshot = self.host_window._emit_snapshot_from_window(
+                    host_ip, host.window, end - window_size, end
+                )
+                host_snapshots[host_ip] = host_snapshot
+
+            end = flow.window.last_seen
+            snapshots.append((
+                self.flow_window._emit_snapshot_from_stats(
+                    flow_key, flow.window, end - window_size, end
+                ),
+                host_snapshot,
+            ))
+            flow.last_emit_ts = now
+
+        self._dirty = {}
+        if self.emit_interval is not None:
+            self._next_emit_ts = (now // self.emit_interval + 1) * self.emit_interval
+        return snapshots
+
+    def _update(self, pkt: PacketMeta) -> Tuple:
+        ts = pkt.timestamp
+        size = pkt.packet_size
+        window_start = ts - self.window_size
+
+        if ts >= self._next_expire_ts:
+            self.expire(ts)
+
+        # decode một lần (UDP: flags là None → False)
+        fwd = pkt.direction > 0
+        syn = pkt.syn is True
+        ack = pkt.ack is True
+        rst = pkt.rst is True
+        fin = pkt.fin is True
+        syn_only = syn and not ack
+        flags = (
+            (WINDOW_FORWARD if fwd else 0) | (TCP_SYN if syn else 0) | (TCP_ACK if ack else 0)
+            | (TCP_RST if rst else 0) | (TCP_FIN if fin else 0)
+        )
+
+        # ================= FLOW =================
+        if self.packed_keys:
+            flow_key = pack_flow_key(pkt)
+        else:
+            flow_key = FlowKey(
+                src_ip=pkt.src_ip,
+                dst_ip=pkt.dst_ip,
+                dst_port=pkt.dst_port,
+                protocol=pkt.protocol,
+                direction=pkt.direction,
+            )
+
+        flows = self._flows
+        flow = flows.get(flow_key)
+        if flow is None:
+            if self.max_flows is not None and len(flows) >= self.max_flows:
+                victim = self._evict(flows, "table")
+                self._flow_buffered -= len(victim.buffer)
+                self.flow_tail.add(victim.table)
+                self.evicted_flows += 1
+            flow = FlowState(
+                table=FlowStats(first_seen=ts, last_seen=ts),
+                window=FlowStats(first_seen=ts, last_seen=ts),
+                buffer=FlowWindowBuffer(compact=self.compact_windows),
+                last_emit_ts=ts,
+            )
+            flows[flow_key] = flow
+            self._flow_wheel.schedule(ts + self.flow_timeout, (flow_key, flow))
+        elif self.max_flows is not None:
+            flows.move_to_end(flow_key)
+
+        for stats in (flow.table, flow.window):
+            stats.total_packets += 1
+            stats.total_bytes += size
+            stats.last_seen = ts
+            if fwd:
+                stats.fwd_packets += 1
+            else:
+                stats.bwd_packets += 1
+
+            # inter-arrival (Welford); count == 1 → mean = delta ở cả hai công thức
+            if stats.last_pkt_ts is not None:
+                delta = ts - stats.last_pkt_ts
+                count = stats.inter_arrival_count + 1
+                stats.inter_arrival_count = count
+                if count == 1:
+                    stats.inter_arrival_mean = delta
+                    stats.inter_arrival_m2 = 0.0
+                else:
+                    diff = delta - stats.inter_arrival_mean
+                    stats.inter_arrival_mean += diff / count
+                    stats.inter_arrival_m2 += diff * (delta - stats.inter_arrival_mean)
+            stats.last_pkt_ts = ts
+
+            if syn:
+                stats.syn_count += 1
+            if ack:
+                stats.ack_count += 1
+            if rst:
+                stats.rst_count += 1
+            if fin:
+                stats.fin_count += 1
+
+        wstats = flow.window
+        wstats.protocol = pkt.protocol.value
+
+        buffer = flow.buffer
+        expired = buffer.append(ts, size, flags, window_start)
+        self._flow_buffered += 1
+        if expired:
+            FlowSlidingWindowService._evict_stats(wstats, buffer, expired)
+            self._flow_buffered -= expired
+        wstats.first_seen = buffer.first_ts
+
+        # ================= HOST =================
+        host_ip = pkt.src_ip
+        hosts = self._hosts
+        host = hosts.get(host_ip)
+        if host is None:
+            if self.max_hosts is not None and len(hosts) >= self.max_hosts:
+                victim = self._evict(hosts, "behavior")
+                self._host_buffered -= len(victim.buffer)
+                self.host_tail.add(victim.behavior)
+                self.evicted_hosts += 1
+            behavior = HostStats(first_seen=ts, last_seen=ts)
+            behavior.dst_port_counter = defaultdict(int)
+            host = HostState(
+                behavior=behavior,
+                window=HostWindowStats(first_seen=ts, last_seen=ts),
+                buffer=HostWindowBuffer(compact=self.compact_windows),
+            )
+            hosts[host_ip] = host
+            self._host_wheel.schedule(ts + self.host_timeout, (host_ip, host))
+        elif self.max_hosts is not None:
+            hosts.move_to_end(host_ip)
+
+        dst_ip = pkt.dst_ip
+        self._update_behavior(host.behavior, pkt, ts, size, dst_ip, syn, ack, rst, fin, syn_only)
+        self._host_buffered += self._update_host_window(
+            host, pkt, ts, size, dst_ip, fwd, syn, ack, rst, fin, syn_only, flags, window_start
+        )
+
+        return flow_key, flow, host_ip, host
+
+    # ================================
+    # EXPIRATION
+    # ================================
+    def expire(self, now: float) -> None:
+        """Xóa flow / host có now - last_seen > timeout (gọi tự động theo timestamp packet)."""
+        flows = self._flows
+        for key, flow in self._flow_wheel.advance(now):
+            if flows.get(key) is not flow:
+                continue
+            deadline = flow.table.last_seen + self.flow_timeout
+            if now > deadline:
+                del flows[key]
+                self._flow_buffered -= len(flow.buffer)
+                if flow.table.total_packets < self.tail_min_packets:
+                    self.flow_tail.add(flow.table)
+                self.expired_flows += 1
+            else:
+                self._flow_wheel.schedule(deadline, (key, flow))
+
+        hosts = self._hosts
+        for key, host in self._host_wheel.advance(now):
+            if hosts.get(key) is not host:
+                continue
+            deadline = host.behavior.last_seen + self.host_timeout
+            if now > deadline:
+                del hosts[key]
+                self._host_buffered -= len(host.buffer)
+                if host.behavior.total_packets < self.tail_min_packets:
+                    self.host_tail.add(host.behavior)
+                self.expired_hosts += 1
+            else:
+                self._host_wheel.schedule(deadline, (key, host))
+
+        self._next_expire_ts = self._flow_wheel.next_tick_time
+
+    # ================================
+    # CAPACITY
+    # ================================
+    def _forget_flow(self, flow: FlowState) -> None:
+        # flow bị xóa qua view (cleanup)
+        self._flow_buffered -= len(flow.buffer)
+
+    def _forget_host(self, host: HostState) -> None:
+        self._host_buffered -= len(host.buffer)
+
+    def _evict(self, entries: OrderedDict, stats_attr: str):
+        """Chọn và bỏ một entity khỏi table đầy; trả về state của nó."""
+        if self.evict_policy is EvictionPolicy.LRU:
+            key = next(iter(entries))
+        else:
+            # chỉ xét vài entity LRU nhất → O(eviction_sample), không quét cả table
+            key = min(
+                islice(entries, self.eviction_sample),
+                key=lambda k: getattr(entries[k], stats_attr).total_packets,
+            )
+
+        # entry cũ trong timing wheel bị bỏ qua nhờ so identity
+        return entries.pop(key)
+
+    # ================================
+    # HOST UPDATES
+    # ================================
+    @staticmethod
+    def _update_behavior(
+        host: HostStats, pkt: PacketMeta, ts: float, size: int, dst_ip,
+        syn: bool, ack: bool, rst: bool, fin: bool, syn_only: bool,
+    ) -> None:
+        # giống HostBehaviorService._update_host
+        host.last_seen = ts
+        host.total_packets += 1
+        host.total_bytes += size
+
+        dst_port = pkt.dst_port
+        host.distinct_dst_ips.add(dst_ip)
+        host.distinct_dst_ports.add(dst_port)
+        host.dst_port_counter[dst_port] += 1
+
+        if syn:
+            host.syn_count += 1
+        if syn_only:
+            host.syn_only_count += 1
+            host.conn_attempts += 1
+        if ack:
+            host.ack_count += 1
+        if rst and not ack:
+            host.rst_count += 1
+            if host.syn_only_count > host.failed_conn:
+                host.failed_conn += 1
+        if fin:
+            host.fin_count += 1
+
+    @staticmethod
+    def _update_host_window(
+        host: HostState, pkt: PacketMeta, ts: float, size: int, dst_ip, fwd: bool,
+        syn: bool, ack: bool, rst: bool, fin: bool, syn_only: bool, flags: int,
+        window_start: float,
+    ) -> int:
+        # giống HostSlidingWindowService._slide_window + _insert_window;
+        # trả về số packet buffer tăng thêm (1 - số packet hết hạn)
+        stats = host.window
+        stats.last_seen = ts
+        stats.total_packets += 1
+        stats.total_bytes += size
+
+        refs = stats.dst_ip_refs
+        refs[dst_ip] = refs.get(dst_ip, 0) + 1
+
+        port = pkt.dst_port if fwd else pkt.src_port
+        ports = stats.dst_port_refs
+        c = ports.get(port, 0)
+        ports[port] = c + 1
+        stats.port_clogc_sum += _xlog2x(c + 1) - _xlog2x(c)
+
+        if syn:
+            stats.syn_count += 1
+        if syn_only:
+            stats.syn_only_count += 1
+        if ack:
+            stats.ack_count += 1
+        if rst:
+            stats.rst_count += 1
+        if fin:
+            stats.fin_count += 1
+
+        stats.rst_syn_balance += int(rst) - int(syn_only)
+        seq = stats.appended_seq
+        stats.appended_seq += 1
+        balance_max = stats.balance_max
+        while balance_max and balance_max[-1][1] <= stats.rst_syn_balance:
+            balance_max.pop()
+        balance_max.append((seq, stats.rst_syn_balance))
+
+        if fin or rst:
+            stats.flow_count += 1
+            stats.close_offset_sum += ts - stats.first_seen
+
+        buffer = host.buffer
+        expired = buffer.append(ts, size, flags, dst_ip, port, window_start)
+
+        old_first = stats.first_seen
+        added = 1
+        if expired:
+            HostSlidingWindowService._evict_window(stats, buffer, expired)
+            added -= expired
+
+        stats.first_seen = buffer.first_ts
+        if stats.first_seen != old_first:
+            stats.close_offset_sum -= stats.flow_count * (stats.first_seen - old_first)
+        return added
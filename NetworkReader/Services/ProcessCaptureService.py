@@ -0,0 +1,153 @@
+import multiprocessing
+import signal
+import time
+from typing import List, Optional, Tuple
+
+from NetworkReader.Services.Capture.CaptureBackend import CaptureBackend
+from NetworkReader.Services.Capture.SharedPacketRing import SharedPacketRing
+from NetworkReader.Services.Capture.SimulatedClock import SimulatedClock
+from NetworkReader.Services.Capture.WinDivertBackend import WinDivertBackend
+
+
+def _capture_process_main(
+    backend: CaptureBackend,
+    ring_name: str,
+    slot_count: int,
+    slot_size: int,
+    batch_size: int,
+    stop_event,
+) -> None:
+    # Ctrl+C do process cha xử lý, capture process chỉ dừng qua stop_event
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    ring = SharedPacketRing.attach(ring_name, slot_count, slot_size)
+    try:
+        backend.open()
+        for batch in backend.batches(batch_size):
+            if stop_event.is_set():
+                break
+
+            if backend.lossless:
+                ring.write_all(batch.packets, stop_event)
+            else:
+                written = ring.write_many(batch.packets)
+                if written < len(batch):
+                    ring.add_dropped(len(batch) - written)
+
+            # packet đã được copy vào shared memory
+            backend.release(batch)
+
+    finally:
+        ring.mark_eof()
+        backend.close()
+        ring.close()
+
+
+class ProcessCaptureService:
+    """
+    Giống PacketCaptureService nhưng capture chạy trong process riêng
+    (không tranh GIL với parse / window / inference).
+
+    Capture process copy packet vào SharedPacketRing; analysis process đọc
+    memoryview trỏ thẳng vào shared memory và đưa thẳng cho parser. Slot
+    được trả lại cho capture process ở lần next_packets() kế tiếp; caller
+    không được giữ memoryview sau đó (và phải bỏ hết trước stop()).
+
+    backend phải chưa open và pickle được (được chuyển sang capture process).
+    """
+
+    def __init__(
+        self,
+        filter_str: str = "ip and (tcp or udp)",
+        queue_size: int = 65536,
+        backend: Optional[CaptureBackend] = None,
+        clock: Optional[SimulatedClock] = None,
+        batch_size: int = 64,
+        slot_size: int = 2048,
+        poll_interval: float = 0.0005,
+    ):
+        if backend is None:
+            backend = WinDivertBackend(filter_str)
+
+        self.filter_str = filter_str
+        self.backend = backend
+        self.clock = clock
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.slot_size = slot_size
+        self.poll_interval = poll_interval
+
+        self._ring: Optional[SharedPacketRing] = None
+        self._process: Optional[multiprocessing.Process] = None
+        self._stop_event = multiprocessing.Event()
+
+    @property
+    def dropped_packets(self) -> int:
+        return self._ring.dropped if self._ring is not None else 0
+
+    def start(self) -> None:
+        self._stop_event.clear()
+        self._ring = SharedPacketRing(slot_count=self.queue_size, slot_size=self.slot_size)
+
+        self._process = multiprocessing.Process(
+            target=_capture_process_main,
+            args=(
+                self.backend,
+                self._ring.name,
+                self._ring.slot_count,
+                self._ring.slot_size,
+                self.batch_size,
+                self._stop_event,
+            ),
+            daemon=True,
+        )
+        self._process.start()
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+        if self._process:
+            # backend live có thể đang block chờ packet → không chờ mãi
+            self._process.join(timeout=1.0)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+            self._process = None
+
+        if self._ring is not None:
+            self._ring.close(unlink=True)
+            self._ring = None
+
+    @property
+    def exhausted(self) -> bool:
+        """True khi capture process đã hết packet (EOF) và mọi packet đã được lấy ra."""
+        # trước start() / sau stop() chưa có ring → chưa hết gì cả
+        return self._ring is not None and self._ring.eof and len(self._ring) == 0
+
+    def next_packets(self, max_packets: int, timeout: float = 1.0) -> List[Tuple[memoryview, float]]:
+        """
+        Lấy tối đa max_packets packet (memoryview vào shared memory).
+
+        Slot của lần gọi trước được release trước khi đọc; không có
+        condition variable giữa process nên ring rỗng thì poll tới timeout.
+        """
+        ring = self._ring
+        ring.release()
+
+        items = ring.read_many(max_packets)
+        if not items and timeout > 0:
+            deadline = time.monotonic() + timeout
+            while not items and not ring.eof and time.monotonic() < deadline:
+                time.sleep(self.poll_interval)
+                items = ring.read_many(max_packets)
+            if not items:
+                # eof được set sau packet cuối → đọc lại một lần
+                items = ring.read_many(max_packets)
+
+        if items and self.clock is not None:
+            self.clock.advance_to(items[-1][1])
+        return items
+
+    def next_packet(self, timeout: float = 1.0) -> Optional[Tuple[memoryview, float]]:
+        items = self.next_packets(1, timeout=timeout)
+        return items[0] if items else None
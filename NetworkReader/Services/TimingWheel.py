@@ -0,0 +1,105 @@
+from typing import List, Optional, Tuple
+
+
+class TimingWheel:
+    """
+    Hierarchical timing wheel cho expiration theo thời gian packet.
+
+    Thời gian được chia thành tick (giây); tầng L có 2**slot_bits slot, mỗi
+    slot dài 2**(slot_bits*L) tick. Item được đặt ở tầng thấp nhất còn
+    chứa được deadline của nó; khi tầng dưới quay hết một vòng, slot kế
+    tiếp của tầng trên được cascade xuống. schedule() và mỗi item hết hạn
+    đều O(1) amortized, không phụ thuộc số entry đang sống.
+
+    Item không bao giờ hết hạn sớm: advance(now) chỉ trả item có
+    deadline < now, trễ tối đa một tick. Deadline vượt quá tầm của
+    wheel nằm trong overflow cho tới khi tầng trên cùng quay hết vòng.
+    """
+
+    def __init__(self, tick: float = 1.0, slot_bits: int = 6, levels: int = 4):
+        if tick <= 0:
+            raise ValueError("tick must be > 0")
+        if levels < 1:
+            raise ValueError("levels must be >= 1")
+
+        self.tick = tick
+        self._bits = slot_bits
+        self._mask = (1 << slot_bits) - 1
+        self._levels: List[List[list]] = [
+            [[] for _ in range(1 << slot_bits)] for _ in range(levels)
+        ]
+        self._overflow: List[Tuple[int, object]] = []
+        self._now: Optional[int] = None  # tick hiện tại
+        self._count = 0
+
+    def __len__(self) -> int:
+        """Số item đang chờ hết hạn."""
+        return self._count
+
+    @property
+    def next_tick_time(self) -> float:
+        """Thời điểm tick kế tiếp bắt đầu; advance() trước mốc này không làm gì."""
+        if self._now is None:
+            return float("-inf")
+        return (self._now + 1) * self.tick
+
+    def schedule(self, deadline: float, item) -> None:
+        """Hết hạn item khi thời gian vượt quá deadline."""
+        t = int(deadline // self.tick) + 1
+        if self._now is None:
+            self._now = t - 1
+        # slot của tick hiện tại đã chạy → deadline đã qua hết hạn ở tick kế tiếp
+        self._insert(max(t, self._now + 1), item)
+        self._count += 1
+
+    def advance(self, now: float) -> list:
+        """Đưa wheel tới now, trả về các item đã hết hạn (theo thứ tự tick)."""
+        target = int(now // self.tick)
+        if self._now is None or (not self._count and target > self._now):
+            # không có gì chờ → nhảy thẳng (gap dài trong file replay)
+            self._now = target
+            return []
+
+        expired = []
+        levels = self._levels
+        bits, mask = self._bits, self._mask
+        top = len(levels)
+
+        while self._now < target and self._count:
+            now_tick = self._now + 1
+            self._now = now_tick
+
+            # cascade từ tầng cao xuống khi tầng dưới vừa quay hết vòng
+            if not now_tick & ((1 << (bits * top)) - 1) and self._overflow:
+                pending, self._overflow = self._overflow, []
+                for t, item in pending:
+                    self._insert(t, item)
+            for level in range(top - 1, 0, -1):
+                if not now_tick & ((1 << (bits * level)) - 1):
+                    slot = levels[level][(now_tick >> (bits * level)) & mask]
+                    if slot:
+                        pending = slot[:]
+                        slot.clear()
+                        for t, item in pending:
+                            self._insert(t, item)
+
+            slot = levels[0][now_tick & mask]
+            if slot:
+                expired += [item for _, item in slot]
+                self._count -= len(slot)
+                slot.clear()
+
+        if self._now < target:
+            self._now = target
+        return expired
+
+    def _insert(self, t: int, item) -> None:
+        # t >= now; t == now chỉ xảy ra khi cascade, ngay trước khi slot now chạy
+        delta = t - self._now
+        bits = self._bits
+        for level, wheel in enumerate(self._levels):
+            if delta < 1 << (bits * (level + 1)):
+                wheel[(t >> (bits * level)) & self._mask].append((t, item))
+                return
+
+        self._overflow.append((t, item))
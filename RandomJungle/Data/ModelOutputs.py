@@ -193,4 +193,24 @@ class FlowMultiModelOutput:
             label=label,
             confidence=confidence,
             probabilities=probabilities
-        )
\ No newline at end of file
+        )
+
+@dataclass(slots=True)
+class HybridModelOutput:
+    """
+    Raw outputs of the four models for one (host, flow) feature pair.
+    Fusion / heuristics run afterwards on top of this.
+    """
+    host_features: object
+    flow_features: object
+
+    host_bin_output: BinaryModelOutput
+    flow_bin_output: BinaryModelOutput
+    host_multi_output: Optional[HostMultiModelOutput]
+    flow_multi_output: Optional[FlowMultiModelOutput]
+
+    # preprocessed model-input rows (for logging)
+    host_multi_row: np.ndarray
+    flow_multi_row: np.ndarray
+
+    queue_delay: float = 0.0
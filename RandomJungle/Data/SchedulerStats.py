@@ -0,0 +1,20 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class SchedulerStats:
+    batches: int = 0
+    rows: int = 0
+    max_batch_size: int = 0
+
+    # queueing delay (seconds) từ lúc submit đến lúc batch được chạy
+    total_queue_delay: float = 0.0
+    max_queue_delay: float = 0.0
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.rows / self.batches if self.batches > 0 else 0.0
+
+    @property
+    def mean_queue_delay(self) -> float:
+        return self.total_queue_delay / self.rows if self.rows > 0 else 0.0
@@ -0,0 +1,18 @@
+from dataclasses import dataclass
+
+
+@dataclass(slots=True)
+class VerdictCacheStats:
+    # hit: verdict cũ được dùng lại, model không chạy cho row đó
+    delta_hits: int = 0  # feature lệch < rel_tol so với lần chấm gần nhất
+    ttl_hits: int = 0    # verdict Benign còn trẻ hơn benign_ttl
+    misses: int = 0      # row phải chạy model
+
+    @property
+    def hits(self) -> int:
+        return self.delta_hits + self.ttl_hits
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.0
@@ -0,0 +1,253 @@
+import time
+from dataclasses import replace
+from typing import Callable, List, Optional, Tuple
+
+import numpy as np
+
+from NetworkReader.Data.ValueObjects.FlowBased.FlowFeatureVector import FlowFeatureVector
+from NetworkReader.Data.ValueObjects.HostBased.HostFeatureVector import HostFeatureVector
+
+from RandomJungle.Data.Labels import BinaryLabel
+from RandomJungle.Data.ModelOutputs import (
+    BinaryModelOutput,
+    HostMultiModelOutput,
+    FlowMultiModelOutput,
+    HybridModelOutput,
+)
+from RandomJungle.Data.SchedulerStats import SchedulerStats
+from RandomJungle.Models.BaseRFModel import BaseRFModel
+from RandomJungle.Models.CascadePrefilter import CascadePrefilter
+from RandomJungle.Preprocessor import Preprocessor
+from RandomJungle.VerdictCache import VerdictCache
+
+
+class InferenceScheduler:
+    """
+    Micro-batching giữa NetworkReader và 4 model RandomJungle.
+
+    Feature rows được gom lại tới max_batch_size rows hoặc max_delay_ms
+    (tính từ row cũ nhất), sau đó mỗi model chỉ chạy một predict_proba
+    trên cả ma trận. Multi-class model chỉ nhận các row mà binary model
+    tương ứng báo Attack (giống predict_hybrid).
+
+    host_cache / flow_cache (VerdictCache): row có feature gần như không
+    đổi so với lần chấm trước của cùng entity, hoặc có verdict Benign còn
+    mới, dùng lại output cũ thay vì chạy model.
+
+    host_prefilter / flow_prefilter (CascadePrefilter): tree nông chạy
+    trước binary forest; row nó clear được là Benign luôn, chỉ phần còn
+    lại chạy forest.
+
+    Không có thread riêng: caller gọi submit() khi có row mới và poll()
+    khi rảnh để flush batch đã quá hạn.
+    """
+
+    def __init__(
+        self,
+        host_bin: BaseRFModel,
+        flow_bin: BaseRFModel,
+        host_multi: BaseRFModel,
+        flow_multi: BaseRFModel,
+        preprocessor: Preprocessor,
+        max_batch_size: int = 64,
+        max_delay_ms: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+        host_cache: Optional[VerdictCache] = None,
+        flow_cache: Optional[VerdictCache] = None,
+        host_prefilter: Optional[CascadePrefilter] = None,
+        flow_prefilter: Optional[CascadePrefilter] = None,
+    ):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be >= 1")
+        if max_delay_ms < 0:
+            raise ValueError("max_delay_ms must be >= 0")
+
+        self.host_bin = host_bin
+        self.flow_bin = flow_bin
+        self.host_multi = host_multi
+        self.flow_multi = flow_multi
+        self.preprocessor = preprocessor
+
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay_ms / 1000.0
+        self.clock = clock
+
+        # verdict cache theo host IP / flow key (None = luôn chạy model)
+        self.host_cache = host_cache
+        self.flow_cache = flow_cache
+
+        # cascade stage trước binary forest (None = mọi row chạy forest)
+        self.host_prefilter = host_prefilter
+        self.flow_prefilter = flow_prefilter
+
+        self._pending: List[Tuple[HostFeatureVector, FlowFeatureVector, float]] = []
+        self.stats = SchedulerStats()
+
+    # ================================
+    # QUEUE API
+    # ================================
+    def submit(
+        self,
+        host_features: HostFeatureVector,
+        flow_features: FlowFeatureVector,
+    ) -> List[HybridModelOutput]:
+        """Queue one row; return outputs of any batch flushed by this call."""
+        self._pending.append((host_features, flow_features, self.clock()))
+
+        if len(self._pending) >= self.max_batch_size:
+            return self.flush()
+        return self.poll()
+
+    def submit_many(
+        self,
+        rows: List[Tuple[HostFeatureVector, FlowFeatureVector]],
+    ) -> List[HybridModelOutput]:
+        """Queue rows (e.g. every dirty entity of one tick) and run them as one batch."""
+        if not rows:
+            return self.poll()
+
+        now = self.clock()
+        self._pending += [(host_features, flow_features, now) for host_features, flow_features in rows]
+        return self.flush()
+
+    def poll(self) -> List[HybridModelOutput]:
+        """Flush the pending batch if its oldest row has waited max_delay."""
+        if self._pending and self.clock() - self._pending[0][2] >= self.max_delay:
+            return self.flush()
+        return []
+
+    def time_until_deadline(self) -> Optional[float]:
+        """Seconds until the pending batch must be flushed (None if empty)."""
+        if not self._pending:
+            return None
+        return max(0.0, self._pending[0][2] + self.max_delay - self.clock())
+
+    def flush(self) -> List[HybridModelOutput]:
+        if not self._pending:
+            return []
+
+        batch = self._pending
+        self._pending = []
+
+        now = self.clock()
+        outputs = self.predict([(h, f) for h, f, _ in batch])
+
+        for out, (_, _, enqueued_at) in zip(outputs, batch):
+            out.queue_delay = now - enqueued_at
+
+        self._record(outputs)
+        return outputs
+
+    # ================================
+    # BATCH INFERENCE
+    # ================================
+    def predict(
+        self,
+        rows: List[Tuple[HostFeatureVector, FlowFeatureVector]],
+    ) -> List[HybridModelOutput]:
+        """Run the four models on a batch of rows, one predict_proba per model."""
+        if not rows:
+            return []
+
+        host_bin_x, flow_bin_x, host_multi_x, flow_multi_x = self.preprocessor.transform_rows(rows)
+
+        host_bin_outputs, host_multi_outputs = self._score(
+            self.host_cache, self.host_prefilter, [h for h, _ in rows], "src_ip",
+            self.host_bin, host_bin_x, self.host_multi, host_multi_x, HostMultiModelOutput,
+        )
+        flow_bin_outputs, flow_multi_outputs = self._score(
+            self.flow_cache, self.flow_prefilter, [f for _, f in rows], "flow_key",
+            self.flow_bin, flow_bin_x, self.flow_multi, flow_multi_x, FlowMultiModelOutput,
+        )
+
+        return [
+            HybridModelOutput(
+                host_features=host_features,
+                flow_features=flow_features,
+                host_bin_output=host_bin_outputs[i],
+                flow_bin_output=flow_bin_outputs[i],
+                host_multi_output=host_multi_outputs[i],
+                flow_multi_output=flow_multi_outputs[i],
+                host_multi_row=host_multi_x[i],
+                flow_multi_row=flow_multi_x[i],
+            )
+            for i, (host_features, flow_features) in enumerate(rows)
+        ]
+
+    def _score(self, cache, prefilter, features, key_attr, bin_model, bin_x, multi_model, multi_x, output_cls):
+        """(binary outputs, multi outputs) của một phía; cache bỏ qua row đã có verdict."""
+        if cache is None:
+            bin_outputs = self._predict_bin(bin_model, prefilter, bin_x)
+            # Multi-class chỉ chạy trên các row binary báo Attack
+            return bin_outputs, self._predict_multi(multi_model, multi_x, bin_outputs, output_cls)
+
+        entity_keys = [getattr(f, key_attr) for f in features]
+        timestamps = [f.timestamp for f in features]
+        X = np.hstack((bin_x, multi_x))
+        verdicts, miss_idx, alias = cache.partition(entity_keys, X, timestamps)
+
+        if miss_idx:
+            bin_outputs, multi_outputs = self._score(
+                None, prefilter, None, None, bin_model, bin_x[miss_idx], multi_model, multi_x[miss_idx], output_cls
+            )
+            for i, bin_out, multi_out in zip(miss_idx, bin_outputs, multi_outputs):
+                cache.store(entity_keys[i], X[i], timestamps[i], self._copy_verdict(bin_out, multi_out))
+                verdicts[i] = (bin_out, multi_out)
+            for i, j in alias.items():
+                verdicts[i] = verdicts[j]
+
+        scored = set(miss_idx)
+        return (
+            [v[0] for v in verdicts],
+            [v[1] if i in scored else self._copy_verdict(*v)[1] for i, v in enumerate(verdicts)],
+        )
+
+    @staticmethod
+    def _predict_bin(model, prefilter, X) -> List[BinaryModelOutput]:
+        """Binary output mỗi row; row prefilter clear được không chạy forest."""
+        if prefilter is None:
+            return [BinaryModelOutput.from_proba(p, model.classes_) for p in model.predict_proba(X)]
+
+        cleared, cleared_proba = prefilter.partition(X)
+        outputs: List[Optional[BinaryModelOutput]] = [None] * len(X)
+        for i, p in zip(np.flatnonzero(cleared), cleared_proba):
+            outputs[i] = BinaryModelOutput.from_proba(p)
+
+        rest = np.flatnonzero(~cleared)
+        if len(rest):
+            for i, p in zip(rest, model.predict_proba(X[rest])):
+                outputs[i] = BinaryModelOutput.from_proba(p, model.classes_)
+        return outputs
+
+    @staticmethod
+    def _copy_verdict(bin_out, multi_out) -> tuple:
+        # decide() ghi đè label của multi output → mỗi row giữ bản riêng
+        return bin_out, None if multi_out is None else replace(multi_out)
+
+    @staticmethod
+    def _predict_multi(model, X, bin_outputs, output_cls) -> list:
+        outputs = [None] * len(bin_outputs)
+
+        attack_idx = [
+            i for i, out in enumerate(bin_outputs)
+            if out.label == BinaryLabel.Attack
+        ]
+        if not attack_idx:
+            return outputs
+
+        probs = model.predict_proba(X[attack_idx])
+        for i, p in zip(attack_idx, probs):
+            outputs[i] = output_cls.from_proba(p, model.classes_)
+
+        return outputs
+
+    def _record(self, outputs: List[HybridModelOutput]) -> None:
+        n = len(outputs)
+        self.stats.batches += 1
+        self.stats.rows += n
+        self.stats.max_batch_size = max(self.stats.max_batch_size, n)
+
+        for out in outputs:
+            self.stats.total_queue_delay += out.queue_delay
+            if out.queue_delay > self.stats.max_queue_delay:
+                self.stats.max_queue_delay = out.queue_delay
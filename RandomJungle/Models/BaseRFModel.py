@@ -1,11 +1,15 @@
 from abc import ABC
-from typing import List
+from typing import List, Tuple
 import numpy as np
 import joblib
 
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score
 
+from RandomJungle.Models.FlatForest import FlatForest
+
+BACKENDS = ("sklearn", "flat")
+
 
 class BaseRFModel(ABC):
 
@@ -35,34 +39,164 @@ class BaseRFModel(ABC):
 
         self._is_fitted = False
 
+        # inference backend: "sklearn" hoặc "flat" (FlatForest)
+        self.backend = "sklearn"
+        self._flat: FlatForest | None = None
+
+        # early exit (xem set_early_exit); None = duyệt hết mọi tree
+        self._early_exit: Tuple[int, float | None, int] | None = None
+        self.last_trees_evaluated: np.ndarray | None = None
+        self.early_exit_rows = 0
+        self.early_exit_trees = 0
+
     def fit(self, X: np.ndarray, y: np.ndarray) -> None:
         self._validate_input(X)
         self.model.fit(X, y)
         self._is_fitted = True
+        self._rebuild_backend()
 
     def predict(self, X: np.ndarray) -> np.ndarray:
         self._ensure_fitted()
         self._validate_input(X)
+        if self._flat is not None and self._early_exit is not None:
+            return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+        if self._flat is not None:
+            return self._flat.predict(X)
         return self.model.predict(X)
 
     def predict_proba(self, X: np.ndarray) -> np.ndarray:
         self._ensure_fitted()
         self._validate_input(X)
+        if self._flat is not None and self._early_exit is not None:
+            chunk_size, delta, min_batch = self._early_exit
+            if len(X) >= min_batch:
+                proba, trees = self._flat.predict_proba_early(X, chunk_size, delta)
+            else:
+                # batch nhỏ: overhead mỗi chunk lớn hơn phần tree tiết kiệm được
+                proba = self._flat.predict_proba(X)
+                trees = np.full(len(X), self._flat.n_trees)
+            self.last_trees_evaluated = trees
+            self.early_exit_rows += len(trees)
+            self.early_exit_trees += int(trees.sum())
+            return proba
+        if self._flat is not None:
+            return self._flat.predict_proba(X)
         return self.model.predict_proba(X)
 
+    def set_backend(self, backend: str) -> None:
+        """
+        Chọn inference backend cho predict / predict_proba.
+        "flat" export forest sang FlatForest (vectorized, không joblib dispatch).
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+        # kiểm tra trước khi gán: lỗi không được để lại backend nửa vời
+        if backend != "flat" and self._is_fitted and not hasattr(self.model, "estimators_"):
+            raise RuntimeError("Model was loaded from a compact artifact; only the 'flat' backend is available.")
+        self.backend = backend
+        self._rebuild_backend()
+
+    def set_early_exit(
+        self,
+        chunk_size: int | None = 32,
+        delta: float | None = None,
+        min_batch: int = 16,
+    ) -> None:
+        """
+        Early-exit inference (chỉ backend "flat"): tree được duyệt theo chunk
+        chunk_size, row dừng khi các tree còn lại không thể đổi argmax, hoặc
+        khi vượt Hoeffding bound với xác suất sai delta (xem
+        FlatForest.predict_proba_early). Probability khi đó là trung bình
+        trên các tree đã duyệt. chunk_size=None tắt early exit.
+
+        Batch ít hơn min_batch row vẫn duyệt hết forest: ở batch 1 early
+        exit chậm hơn 20-160% (bench_early_exit.py). Không có delta thì chỉ
+        dừng theo margin, hiếm khi bỏ được đủ tree để lời cả ở batch 64.
+
+        last_trees_evaluated: số tree đã duyệt mỗi row của lần predict cuối;
+        mean_trees_per_row: trung bình tích lũy.
+        """
+        if chunk_size is None:
+            self._early_exit = None
+            return
+        if self.backend != "flat":
+            raise RuntimeError("Early exit requires the 'flat' backend.")
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        if delta is not None and not 0.0 < delta < 1.0:
+            raise ValueError("delta must be in (0, 1)")
+        if min_batch < 1:
+            raise ValueError("min_batch must be >= 1")
+        self._early_exit = (chunk_size, delta, min_batch)
+
+    @property
+    def n_trees(self) -> int:
+        if self._flat is not None:
+            return self._flat.n_trees
+        return len(self.model.estimators_)
+
+    @property
+    def mean_trees_per_row(self) -> float:
+        return self.early_exit_trees / self.early_exit_rows if self.early_exit_rows > 0 else 0.0
+
     def evaluate(self, X: np.ndarray, y: np.ndarray) -> float:
         preds = self.predict(X)
         return accuracy_score(y, preds)
 
     def save(self, path: str) -> None:
+        if self._is_fitted and not hasattr(self.model, "estimators_"):
+            raise RuntimeError("Compact artifacts cannot be saved as a pickle; use save_compact().")
         joblib.dump(self.model, path)
 
     def load(self, path: str) -> None:
         self.model = joblib.load(path)
         self._is_fitted = True
+        self._rebuild_backend()
+
+    def save_compact(self, path: str, feature_names: List[str] | None = None) -> None:
+        """Save the forest as a compact FlatForest artifact (directory of .npy)."""
+        self._ensure_fitted()
+        flat = self._flat if self._flat is not None else FlatForest.from_sklearn(self.model)
+        flat.save(path, feature_names)
+
+    def load_compact(self, path: str) -> None:
+        """
+        Memory-map a compact artifact. Không có sklearn estimators phía sau,
+        nên model chỉ chạy được với backend "flat".
+        """
+        self._flat = FlatForest.load(path, mmap=True)
+        self.backend = "flat"
+        self._is_fitted = True
+
+    def warm_up(self) -> None:
+        """Run one dummy prediction so the first real packet doesn't pay for it."""
+        self._ensure_fitted()
+        self.predict_proba(np.zeros((1, self.n_features_in_), dtype=np.float32))
+
+    @property
+    def classes_(self) -> np.ndarray:
+        if self._flat is not None:
+            return self._flat.classes_
+        return self.model.classes_
+
+    @property
+    def n_features_in_(self) -> int:
+        if self._flat is not None:
+            return self._flat.n_features_in_
+        return self.model.n_features_in_
+
+    @property
+    def feature_names(self) -> List[str] | None:
+        """Tên cột lúc train (compact artifact / DataFrame), None nếu không lưu."""
+        if self._flat is not None and self._flat.feature_names is not None:
+            return list(self._flat.feature_names)
+        names = getattr(self.model, "feature_names_in_", None)
+        return list(names) if names is not None else None
 
     def feature_importance(self) -> List[float]:
         self._ensure_fitted()
+        if not hasattr(self.model, "estimators_"):
+            raise RuntimeError("Feature importance is not stored in compact artifacts.")
         return self.model.feature_importances_.tolist()
 
     @staticmethod
@@ -73,6 +207,17 @@ class BaseRFModel(ABC):
         if len(X.shape) != 2:
             raise ValueError("Input must be 2D array")
 
+    def _rebuild_backend(self) -> None:
+        has_estimators = hasattr(self.model, "estimators_")
+
+        if self.backend == "flat":
+            if has_estimators:
+                self._flat = FlatForest.from_sklearn(self.model)
+        elif not has_estimators and self._is_fitted:
+            raise RuntimeError("Model was loaded from a compact artifact; only the 'flat' backend is available.")
+        else:
+            self._flat = None
+
     def _ensure_fitted(self):
         if not self._is_fitted:
             raise RuntimeError("Model is not fitted yet.")
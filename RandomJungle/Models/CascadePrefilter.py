@@ -0,0 +1,170 @@
+import warnings
+from statistics import NormalDist
+from typing import List, Tuple
+
+import joblib
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+
+
+class CascadePrefilter:
+    """
+    Stage rẻ trước RfHostBin / RfFlowBin: một decision tree rất nông.
+
+    Chỉ row rơi vào lá "clear" được trả thẳng Benign; mọi row khác vẫn
+    chạy forest. Trên phần calibration (tách khỏi phần fit), lá được xét
+    theo cận trên (Wilson, mức confidence) của tỉ lệ attack tăng dần: lá
+    nhiều row và ít attack trước. Dừng khi cận trên Poisson của tổng số
+    attack trong các lá đã clear vượt target_fnr * tổng số attack, nên FNR
+    thêm vào nằm dưới target_fnr với xác suất ~confidence thay vì chỉ xấp
+    xỉ nó. Cái giá: lá clear đầu tiên đã tốn ~3 attack (confidence 0.95)
+    → cần khoảng 3 / target_fnr attack trong phần calibration, ít hơn thì
+    không lá nào được clear (prefilter chỉ pass-through).
+    """
+
+    def __init__(
+        self,
+        max_depth: int = 4,
+        target_fnr: float = 0.001,
+        min_samples_leaf: int = 20,
+        calibration: float = 0.3,
+        confidence: float = 0.95,
+        random_state: int = 42,
+    ):
+        self.max_depth = max_depth
+        self.target_fnr = target_fnr
+        self.min_samples_leaf = min_samples_leaf
+        self.calibration = calibration
+        self.confidence = confidence
+        self.random_state = random_state
+
+        self._arrays: dict | None = None
+        self.feature_names: List[str] | None = None
+        self.n_features_in_ = 0
+
+        # số row đã chấm / đã clear (pass-through = phần còn lại)
+        self.rows = 0
+        self.cleared = 0
+
+    def fit(self, X: np.ndarray, y: np.ndarray, feature_names: List[str] | None = None) -> None:
+        """y: 0 = Benign, 1 = Attack (giống RfTrainer)."""
+        y = np.asarray(y).astype(int)
+        order = np.random.default_rng(self.random_state).permutation(len(X))
+        cut = int(len(X) * (1.0 - self.calibration))
+        fit_idx, calib_idx = order[:cut], order[cut:]
+
+        tree = DecisionTreeClassifier(
+            max_depth=self.max_depth,
+            min_samples_leaf=self.min_samples_leaf,
+            class_weight="balanced",
+            random_state=self.random_state,
+        )
+        tree.fit(X[fit_idx], y[fit_idx])
+        t = tree.tree_
+
+        # số benign / attack của phần calibration ở mỗi lá
+        leaves = tree.apply(X[calib_idx])
+        benign = np.bincount(leaves, weights=y[calib_idx] == 0, minlength=t.node_count)
+        attack = np.bincount(leaves, weights=y[calib_idx] == 1, minlength=t.node_count)
+        seen = benign + attack
+        attack_rate = np.divide(attack, seen, out=np.ones(t.node_count), where=seen > 0)
+
+        z = NormalDist().inv_cdf(self.confidence)
+        # Wilson upper bound: lá ít row không được ưu tiên chỉ vì 0 attack
+        rate_upper = np.divide(
+            attack + z * z / 2 + z * np.sqrt(attack * benign / np.maximum(seen, 1) + z * z / 4),
+            seen + z * z,
+        )
+
+        clear = np.zeros(t.node_count, dtype=bool)
+        budget = self.target_fnr * attack.sum()
+        spent = 0.0
+        # lá chưa thấy row calibration nào không được clear (attack_rate = 1)
+        for node in np.argsort(rate_upper, kind="mergesort"):
+            if t.children_left[node] != -1 or attack_rate[node] >= 0.5:
+                continue
+            if _poisson_upper(spent + attack[node], z) > budget:
+                break
+            spent += attack[node]
+            clear[node] = True
+
+        if not clear.any():
+            warnings.warn(
+                f"CascadePrefilter cleared no leaf: {int(attack.sum())} calibration attacks "
+                f"is too few for target_fnr={self.target_fnr} (need ~{3 / self.target_fnr:.0f}); "
+                "every row will pass through to the forest",
+                RuntimeWarning,
+                stacklevel=2,
+            )
+
+        is_leaf = t.children_left == -1
+        index = np.arange(t.node_count, dtype=np.int32)
+        self._arrays = {
+            "feature": np.where(is_leaf, 0, t.feature).astype(np.int32),
+            "threshold": np.where(is_leaf, np.inf, t.threshold),
+            "left": np.where(is_leaf, index, t.children_left).astype(np.int32),
+            "right": np.where(is_leaf, index, t.children_right).astype(np.int32),
+            "clear": clear,
+            "attack_rate": attack_rate,
+            "depth": int(tree.get_depth()),
+        }
+        self.feature_names = list(feature_names) if feature_names is not None else None
+        self.n_features_in_ = X.shape[1]
+
+    def partition(self, X: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (mask row được clear, proba [Benign, Attack] của các row đó).
+        proba là tỉ lệ attack lúc calibration của lá, chỉ để điền output.
+        """
+        if self._arrays is None:
+            raise RuntimeError("Prefilter is not trained. Call fit() or load() first.")
+        a = self._arrays
+
+        # so sánh float32 giống sklearn / FlatForest
+        X = np.asarray(X, dtype=np.float32)
+        rows = np.arange(X.shape[0])
+        node = np.zeros(X.shape[0], dtype=np.int32)
+        for _ in range(a["depth"]):
+            go_left = X[rows, a["feature"][node]] <= a["threshold"][node]
+            node = np.where(go_left, a["left"][node], a["right"][node])
+
+        cleared = a["clear"][node]
+        rate = a["attack_rate"][node[cleared]]
+
+        self.rows += len(node)
+        self.cleared += int(cleared.sum())
+        return cleared, np.column_stack((1.0 - rate, rate))
+
+    @property
+    def pass_through_rate(self) -> float:
+        """Tỉ lệ row phải chạy forest."""
+        return 1.0 - self.cleared / self.rows if self.rows > 0 else 1.0
+
+    def save(self, path: str) -> None:
+        if self._arrays is None:
+            raise RuntimeError("Prefilter is not trained.")
+        joblib.dump(
+            {
+                "arrays": self._arrays,
+                "feature_names": self.feature_names,
+                "n_features": self.n_features_in_,
+                "target_fnr": self.target_fnr,
+                "confidence": self.confidence,
+            },
+            path,
+        )
+
+    def load(self, path: str) -> None:
+        state = joblib.load(path)
+        self._arrays = state["arrays"]
+        self.feature_names = state["feature_names"]
+        self.n_features_in_ = state["n_features"]
+        self.target_fnr = state["target_fnr"]
+        # artifact cũ (trước confidence bound) không lưu confidence
+        self.confidence = state.get("confidence", 0.95)
+
+
+def _poisson_upper(k: float, z: float) -> float:
+    """Cận trên một phía của kỳ vọng Poisson khi đếm được k (xấp xỉ Byar)."""
+    k += 1.0
+    return k * (1.0 - 1.0 / (9.0 * k) + z / (3.0 * np.sqrt(k))) ** 3
@@ -0,0 +1,315 @@
+import json
+import math
+import os
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from sklearn.ensemble import RandomForestClassifier
+
+FORMAT_VERSION = 1
+ARRAY_NAMES = ("feature", "threshold", "left", "right", "value", "roots")
+META_FILE = "meta.json"
+
+
+class FlatForest:
+    """
+    Random forest exported into flat NumPy arrays.
+
+    Mọi node của mọi tree nằm chung trong các mảng feature / threshold /
+    left / right / value; roots[t] là index root của tree t. Leaf trỏ về
+    chính nó (left = right = self) nên có thể duyệt level-by-level cho cả
+    batch mà không cần phân nhánh: sau max_depth bước mọi row đều ở leaf.
+    """
+
+    def __init__(
+        self,
+        feature: np.ndarray,
+        threshold: np.ndarray,
+        left: np.ndarray,
+        right: np.ndarray,
+        value: np.ndarray,
+        roots: np.ndarray,
+        max_depth: int,
+        classes: np.ndarray,
+        n_features: int,
+        feature_names: Optional[List[str]] = None,
+    ):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.max_depth = int(max_depth)
+        self.classes_ = classes
+        self.n_features_in_ = int(n_features)
+        self.feature_names = feature_names
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_classes(self) -> int:
+        return self.value.shape[1]
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def nbytes(self) -> int:
+        """Kích thước các mảng (≈ dung lượng compact artifact, không tính meta.json)."""
+        return sum(getattr(self, name).nbytes for name in ARRAY_NAMES)
+
+    def node_depths(self) -> np.ndarray:
+        """Độ sâu của mỗi node (root = 0)."""
+        depth = np.full(self.n_nodes, -1, dtype=np.int32)
+        frontier = np.asarray(self.roots, dtype=np.int64)
+        level = 0
+        while len(frontier):
+            depth[frontier] = level
+            internal = frontier[self.left[frontier] != frontier]
+            frontier = np.concatenate((self.left[internal], self.right[internal])).astype(np.int64)
+            level += 1
+        return depth
+
+    def subset(self, trees: Optional[np.ndarray] = None, max_depth: Optional[int] = None) -> "FlatForest":
+        """
+        Forest mới chỉ gồm các tree trong trees (index), cắt ở max_depth:
+        node ở độ sâu max_depth thành lá, giữ value (phân bố class) của
+        node đó. Giống hệt duyệt max_depth bước trên forest gốc.
+        """
+        trees = np.arange(self.n_trees) if trees is None else np.sort(np.asarray(trees))
+        cap = self.max_depth if max_depth is None else min(max_depth, self.max_depth)
+
+        depth = self.node_depths()
+        # roots tăng dần → tree của node i là root cuối cùng <= i
+        tree_of = np.searchsorted(self.roots, np.arange(self.n_nodes), side="right") - 1
+        keep = np.isin(tree_of, trees) & (depth >= 0) & (depth <= cap)
+
+        old = np.flatnonzero(keep)
+        new_index = (np.cumsum(keep) - 1).astype(np.int32)
+        leaf = (self.left[old] == old) | (depth[old] == cap)
+        self_index = new_index[old]
+
+        return FlatForest(
+            feature=np.where(leaf, 0, self.feature[old]).astype(np.int32),
+            threshold=np.where(leaf, np.inf, self.threshold[old]),
+            left=np.where(leaf, self_index, new_index[self.left[old]]).astype(np.int32),
+            right=np.where(leaf, self_index, new_index[self.right[old]]).astype(np.int32),
+            value=np.ascontiguousarray(self.value[old]),
+            roots=new_index[self.roots[trees]].astype(np.int32),
+            max_depth=int(depth[old].max()) if len(old) else 0,
+            classes=self.classes_,
+            n_features=self.n_features_in_,
+            feature_names=self.feature_names,
+        )
+
+    # ================================
+    # EXPORT
+    # ================================
+    @classmethod
+    def from_sklearn(cls, model: RandomForestClassifier) -> "FlatForest":
+        if getattr(model, "n_outputs_", 1) != 1:
+            raise ValueError("FlatForest only supports single-output forests")
+
+        features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+        offset = 0
+        max_depth = 0
+
+        for est in model.estimators_:
+            tree = est.tree_
+            n = tree.node_count
+            idx = np.arange(n, dtype=np.int32)
+
+            is_leaf = tree.children_left == -1
+
+            feature = np.where(is_leaf, 0, tree.feature).astype(np.int32)
+            threshold = np.where(is_leaf, np.inf, tree.threshold).astype(np.float64)
+            left = np.where(is_leaf, idx, tree.children_left).astype(np.int32) + offset
+            right = np.where(is_leaf, idx, tree.children_right).astype(np.int32) + offset
+
+            # value → xác suất lá (giống DecisionTreeClassifier.predict_proba)
+            value = tree.value[:, 0, :].astype(np.float64)
+            normalizer = value.sum(axis=1, keepdims=True)
+            normalizer[normalizer == 0.0] = 1.0
+
+            features.append(feature)
+            thresholds.append(threshold)
+            lefts.append(left)
+            rights.append(right)
+            values.append(value / normalizer)
+            roots.append(offset)
+
+            offset += n
+            max_depth = max(max_depth, tree.max_depth)
+
+        return cls(
+            feature=np.concatenate(features),
+            threshold=np.concatenate(thresholds),
+            left=np.concatenate(lefts),
+            right=np.concatenate(rights),
+            value=np.concatenate(values),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            classes=np.asarray(model.classes_),
+            n_features=model.n_features_in_,
+        )
+
+    # ================================
+    # COMPACT ARTIFACT
+    # ================================
+    def save(self, path: str, feature_names: Optional[List[str]] = None) -> None:
+        """
+        Ghi forest thành một thư mục: mỗi mảng là một file .npy liên tục
+        + meta.json nhỏ (classes, feature names, n_features, ...).
+        """
+        feature_names = feature_names if feature_names is not None else self.feature_names
+        if feature_names is not None and len(feature_names) != self.n_features_in_:
+            raise ValueError(
+                f"{len(feature_names)} feature names for {self.n_features_in_} features"
+            )
+
+        os.makedirs(path, exist_ok=True)
+        for name in ARRAY_NAMES:
+            np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(getattr(self, name)))
+
+        meta = {
+            "format_version": FORMAT_VERSION,
+            "classes": np.asarray(self.classes_).tolist(),
+            "feature_names": list(feature_names) if feature_names is not None else None,
+            "n_features": self.n_features_in_,
+            "n_trees": self.n_trees,
+            "max_depth": self.max_depth,
+        }
+        with open(os.path.join(path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> "FlatForest":
+        """Load a compact artifact; arrays are memory-mapped read-only by default."""
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        if meta.get("format_version") != FORMAT_VERSION:
+            raise ValueError(f"Unsupported forest format version: {meta.get('format_version')}")
+
+        mmap_mode = "r" if mmap else None
+        arrays = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+            for name in ARRAY_NAMES
+        }
+
+        return cls(
+            **arrays,
+            max_depth=meta["max_depth"],
+            classes=np.asarray(meta["classes"]),
+            n_features=meta["n_features"],
+            feature_names=meta["feature_names"],
+        )
+
+    # ================================
+    # INFERENCE
+    # ================================
+    def apply(self, X: np.ndarray) -> np.ndarray:
+        """Leaf index of every (row, tree) pair, shape (n_rows, n_trees)."""
+        return self._apply(self._check_input(X), self.roots)
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        leaves = self.apply(X)
+        return self.value[leaves].sum(axis=1) / self.n_trees
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1))
+
+    def predict_proba_early(
+        self,
+        X: np.ndarray,
+        chunk_size: int = 32,
+        delta: Optional[float] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Duyệt tree theo chunk, row nào đã chắc chắn thì dừng sớm.
+
+        Chunk đầu có chunk_size tree, mỗi chunk sau gấp đôi. Row dừng khi
+        khoảng cách vote giữa hai class dẫn đầu lớn hơn số tree còn lại
+        (argmax không thể đổi → label giống hệt full forest),
+        hoặc, nếu có delta, khi khoảng cách trung bình vượt Hoeffding bound
+        sqrt(2·ln(2/delta)/t) sau t tree (sai khác với full forest với xác
+        suất ~delta, dừng sớm hơn nhiều).
+
+        Trả về (proba, trees_used): proba là trung bình trên các tree đã
+        duyệt (bằng predict_proba với row duyệt hết), trees_used là số
+        tree đã duyệt của mỗi row.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be >= 1")
+        if delta is not None and not 0.0 < delta < 1.0:
+            raise ValueError("delta must be in (0, 1)")
+
+        X = self._check_input(X)
+        n_rows = X.shape[0]
+        n_trees = self.n_trees
+        if self.n_classes < 2:
+            return self.predict_proba(X), np.full(n_rows, n_trees, dtype=np.int64)
+
+        bound = 2.0 * math.log(2.0 / delta) if delta is not None else None
+        votes = np.zeros((n_rows, self.n_classes))
+        trees_used = np.zeros(n_rows, dtype=np.int64)
+        active = np.arange(n_rows)
+
+        done = 0
+        while done < n_trees:
+            roots = self.roots[done:done + chunk_size]
+            leaves = self._apply(X[active], roots)
+            votes[active] += self.value[leaves].sum(axis=1)
+
+            done += len(roots)
+            trees_used[active] = done
+            remaining = n_trees - done
+            if remaining == 0:
+                break
+            # chunk gấp đôi: row dễ dừng ở chunk đầu, row khó không tốn quá nhiều vòng
+            chunk_size *= 2
+
+            top2 = np.partition(votes[active], -2, axis=1)[:, -2:]
+            gap = top2[:, 1] - top2[:, 0]
+            # sai số cộng dồn float → cần vượt hẳn số tree còn lại
+            stop = gap > remaining + 1e-9
+            if bound is not None:
+                stop |= gap / done > math.sqrt(bound / done)
+
+            active = active[~stop]
+            if not len(active):
+                break
+
+        return votes / trees_used[:, None], trees_used
+
+    def _check_input(self, X: np.ndarray) -> np.ndarray:
+        # sklearn so sánh trên float32 → cast giống hệt để ra cùng nhánh
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim != 2 or X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f"X has shape {X.shape}, expected (n, {self.n_features_in_})"
+            )
+        return X
+
+    def _apply(self, X: np.ndarray, roots: np.ndarray, depth: Optional[int] = None) -> np.ndarray:
+        """
+        Leaf index of every (row, tree) pair for the trees rooted at roots.
+        roots (n_rows, n_trees) bắt đầu từ node riêng mỗi row; depth dừng
+        sau depth bước (node ở độ sâu depth, xem subset()).
+        """
+        rows = np.arange(X.shape[0])[:, None]
+        node = np.broadcast_to(roots, (X.shape[0], np.shape(roots)[-1]))
+
+        for _ in range(self.max_depth if depth is None else min(depth, self.max_depth)):
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            step = np.where(go_left, self.left[node], self.right[node])
+            if np.array_equal(step, node):
+                break  # mọi (row, tree) đã tới lá
+            node = step
+
+        return node
@@ -1,5 +1,8 @@
 import math
-from typing import Tuple
+from operator import attrgetter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
 
 from NetworkReader.Data.ValueObjects.FlowBased.FlowFeatureVector import FlowFeatureVector
 from NetworkReader.Data.ValueObjects.HostBased.HostFeatureVector import HostFeatureVector
@@ -12,12 +15,81 @@ from RandomJungle.Data.FeatureSets import (
 )
 
 
+# quy tắc clean theo tên feature, khớp với _build_* của Preprocessor:
+# (kind, max_val), kind ∈ numeric / int / ratio / log
+HOST_RULES = {
+    "unique_dst_ports": ("int", None),
+    "port_entropy": ("numeric", 15.0),
+    "connections_per_second": ("numeric", None),
+    "failed_connection_ratio": ("ratio", None),
+    "syn_ratio": ("ratio", None),
+    "mean_flow_duration": ("numeric", None),
+}
+FLOW_RULES = {
+    "packets_per_second": ("numeric", None),
+    "bytes_per_second": ("log", None),
+    "packet_count": ("int", None),
+    "flow_duration": ("numeric", None),
+    "forward_ratio": ("ratio", None),
+    "syn_ratio": ("ratio", None),
+    "rst_ratio": ("ratio", None),
+    "protocol": ("int", None),
+}
+
+
+class ColumnPlan:
+    """
+    Column plan của một phía (host / flow), compile một lần từ
+    FEATURE_NAMES của các feature set dùng phía đó.
+
+    names: các feature khác nhau (hợp của các feature set, feature chung
+    chỉ đọc / clean một lần mỗi row), cũng là thứ tự cột của raw matrix.
+    rules[j]: quy tắc clean của cột j. index[i]: thứ tự cột của feature
+    set i trong raw matrix.
+    """
+
+    def __init__(self, rules: Dict[str, Tuple[str, Optional[float]]], feature_sets: Sequence[type]):
+        names: List[str] = []
+        for feature_set in feature_sets:
+            for name in feature_set.FEATURE_NAMES:
+                if name not in rules:
+                    raise ValueError(f"{feature_set.__name__}: no column rule for '{name}'")
+                if name not in names:
+                    names.append(name)
+
+        self.names = names
+        self.rules = [rules[name] for name in names]
+        # tên feature = tên field của feature vector → một attrgetter đọc cả row
+        self.read = attrgetter(*names)
+        self.index = [
+            np.array([names.index(name) for name in feature_set.FEATURE_NAMES], dtype=np.intp)
+            for feature_set in feature_sets
+        ]
+
+
 class Preprocessor:
 
     def __init__(self):
         self._eps = 1e-6
         self._global_cap = 1e9  # prevent extreme overflow values
 
+        self._host_plan = ColumnPlan(HOST_RULES, (HostBinaryFeatures, HostMultiFeatures))
+        self._flow_plan = ColumnPlan(FLOW_RULES, (FlowBinaryFeatures, FlowMultiFeatures))
+
+        # raw row buffer dùng lại giữa các batch (gấp đôi khi thiếu)
+        self._host_buf = np.empty((0, len(self._host_plan.names)))
+        self._flow_buf = np.empty((0, len(self._flow_plan.names)))
+
+    @property
+    def host_columns(self) -> List[str]:
+        """Thứ tự cột của raw host matrix cho transform_batch()."""
+        return list(self._host_plan.names)
+
+    @property
+    def flow_columns(self) -> List[str]:
+        """Thứ tự cột của raw flow matrix cho transform_batch()."""
+        return list(self._flow_plan.names)
+
     def transform(
         self,
         host: HostFeatureVector,
@@ -36,6 +108,106 @@ class Preprocessor:
 
         return host_bin, flow_bin, host_multi, flow_multi
 
+    def transform_rows(
+        self,
+        rows: Sequence[Tuple[HostFeatureVector, FlowFeatureVector]],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Model-input matrices float32 (host_bin, flow_bin, host_multi,
+        flow_multi) cho cả batch, theo thứ tự FEATURE_NAMES. Mỗi row chỉ
+        là một attrgetter ghi thẳng vào raw buffer (không dựng dataclass /
+        dict), phần clean chạy vectorized trong transform_batch().
+        """
+        n = len(rows)
+        if len(self._host_buf) < n:
+            size = max(n, 2 * len(self._host_buf))
+            self._host_buf = np.empty((size, len(self._host_plan.names)))
+            self._flow_buf = np.empty((size, len(self._flow_plan.names)))
+
+        host_raw = self._host_buf[:n]
+        flow_raw = self._flow_buf[:n]
+        read_host = self._host_plan.read
+        read_flow = self._flow_plan.read
+        host_raw[:] = [read_host(host) for host, _ in rows]
+        flow_raw[:] = [read_flow(flow) for _, flow in rows]
+
+        return self.transform_batch(host_raw, flow_raw)
+
+    def transform_batch(
+        self,
+        host_raw: np.ndarray,
+        flow_raw: np.ndarray,
+        dtype=np.float32,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        transform() cho cả ma trận raw feature: host_raw có cột theo
+        host_columns, flow_raw theo flow_columns (float64). NaN / inf, global
+        cap, clip từng cột và log được áp bằng NumPy ufunc, tại chỗ trên
+        host_raw / flow_raw (ma trận float64 thì bị ghi đè).
+
+        Trả về (host_bin, flow_bin, host_multi, flow_multi) kiểu dtype.
+        Với dtype=float64 giá trị bit-identical với transform(); float32 là
+        đúng thứ model nhận.
+        """
+        host_x = self._clean_columns(np.asarray(host_raw, dtype=np.float64), self._host_plan.rules)
+        flow_x = self._clean_columns(np.asarray(flow_raw, dtype=np.float64), self._flow_plan.rules)
+
+        host_bin_idx, host_multi_idx = self._host_plan.index
+        flow_bin_idx, flow_multi_idx = self._flow_plan.index
+        return (
+            host_x[:, host_bin_idx].astype(dtype, copy=False),
+            flow_x[:, flow_bin_idx].astype(dtype, copy=False),
+            host_x[:, host_multi_idx].astype(dtype, copy=False),
+            flow_x[:, flow_multi_idx].astype(dtype, copy=False),
+        )
+
+    def _clean_columns(self, X: np.ndarray, rules: Sequence[Tuple[str, Optional[float]]]) -> np.ndarray:
+        # cùng phép so sánh với bản scalar (kể cả -0.0), qua copyto(where=) tại chỗ
+        for j, (kind, max_val) in enumerate(rules):
+            col = X[:, j]
+
+            if kind == "ratio":
+                # max(0.0, min(value, 1.0)); NaN / inf → 0.0
+                np.copyto(col, 0.0, where=~np.isfinite(col))
+                np.copyto(col, 1.0, where=col > 1.0)
+                np.copyto(col, 0.0, where=~(col > 0.0))
+                continue
+
+            # _clean_numeric(value, min_val=0.0, max_val)
+            np.copyto(col, 0.0, where=~np.isfinite(col))
+            np.copyto(col, self._global_cap, where=col > self._global_cap)
+            np.copyto(col, 0.0, where=col < 0.0)
+            if max_val is not None:
+                np.copyto(col, max_val, where=col > max_val)
+
+            if kind == "int":
+                np.trunc(col, out=col)
+                np.copyto(col, 0.0, where=col == 0.0)  # int(-0.0) = 0
+            elif kind == "log":
+                positive = col > 0
+                # np.log (SIMD) lệch libm 1 ulp ở vài giá trị → math.log cho bit-identical
+                logs = list(map(math.log, (col[positive] + self._eps).tolist()))
+                np.copyto(col, 0.0, where=~positive)
+                col[positive] = logs
+
+        return X
+
+    @staticmethod
+    def check_model(model, feature_set: type) -> None:
+        """ValueError nếu model không nhận đúng cột (số lượng / tên) của feature_set."""
+        names = feature_set.FEATURE_NAMES
+        if model.n_features_in_ != len(names):
+            raise ValueError(
+                f"{type(model).__name__} expects {model.n_features_in_} features, "
+                f"{feature_set.__name__} has {len(names)}"
+            )
+        trained = model.feature_names
+        if trained is not None and list(trained) != list(names):
+            raise ValueError(
+                f"{type(model).__name__} was trained on columns {list(trained)}, "
+                f"{feature_set.__name__} produces {list(names)}"
+            )
+
 
     # Internal method
     def _build_host_binary(self, h: HostFeatureVector) -> HostBinaryFeatures:
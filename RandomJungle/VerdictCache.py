@@ -0,0 +1,113 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from RandomJungle.Data.Labels import BinaryLabel
+from RandomJungle.Data.VerdictCacheStats import VerdictCacheStats
+
+
+class VerdictCache:
+    """
+    Verdict gần nhất của mỗi entity (flow key hoặc host IP): model row đã
+    chấm, thời điểm chấm (timestamp feature vector) và output
+    (binary output, multi output).
+
+    Row mới được bỏ qua inference khi:
+      - mọi feature lệch không quá rel_tol (tương đối) so với row đã chấm, hoặc
+      - verdict đã chấm là Benign và trẻ hơn benign_ttl giây.
+
+    So sánh luôn với row đã chấm (không phải row gần nhất) nên feature
+    trôi dần vẫn bị chấm lại khi lệch tích lũy vượt rel_tol.
+    max_entries giới hạn số entity (LRU), None = không giới hạn.
+    """
+
+    def __init__(
+        self,
+        rel_tol: float = 0.0,
+        benign_ttl: float = 0.0,
+        max_entries: Optional[int] = None,
+    ):
+        if rel_tol < 0:
+            raise ValueError("rel_tol must be >= 0")
+        if benign_ttl < 0:
+            raise ValueError("benign_ttl must be >= 0")
+        if max_entries is not None and max_entries < 1:
+            raise ValueError("max_entries must be >= 1")
+
+        self.rel_tol = rel_tol
+        self.benign_ttl = benign_ttl
+        self.max_entries = max_entries
+
+        # key → (row, scored_at, verdict)
+        self._entries: "OrderedDict[Hashable, Tuple[np.ndarray, float, tuple]]" = OrderedDict()
+        self.stats = VerdictCacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close_enough(self, row: np.ndarray, scored: np.ndarray) -> bool:
+        """|row - scored| <= rel_tol * max(|row|, |scored|) trên mọi feature."""
+        diff = np.abs(row - scored)
+        return bool(np.all(diff <= self.rel_tol * np.maximum(np.abs(row), np.abs(scored))))
+
+    def partition(
+        self,
+        keys: Sequence[Hashable],
+        X: np.ndarray,
+        timestamps: Sequence[float],
+    ) -> Tuple[List[Optional[tuple]], List[int], Dict[int, int]]:
+        """
+        Chia một batch thành row dùng lại verdict và row phải chấm.
+
+        Trả về (verdicts, miss_idx, alias): verdicts[i] là verdict cache
+        (None nếu miss), miss_idx là các row cần chạy model, alias[i] = j
+        khi row i trùng entity và gần row j đang chấm trong cùng batch
+        (ví dụ nhiều flow của một host trong một tick) → dùng output của j.
+        """
+        entries = self._entries
+        stats = self.stats
+        verdicts: List[Optional[tuple]] = [None] * len(keys)
+        miss_idx: List[int] = []
+        alias: Dict[int, int] = {}
+        scoring: Dict[Hashable, int] = {}
+
+        for i, key in enumerate(keys):
+            row = X[i]
+            entry = entries.get(key)
+            if entry is not None:
+                entries.move_to_end(key)
+                scored_row, scored_at, verdict = entry
+                if (
+                    verdict[0].label == BinaryLabel.Benign
+                    and timestamps[i] - scored_at < self.benign_ttl
+                ):
+                    verdicts[i] = verdict
+                    stats.ttl_hits += 1
+                    continue
+                if self.close_enough(row, scored_row):
+                    verdicts[i] = verdict
+                    stats.delta_hits += 1
+                    continue
+
+            j = scoring.get(key)
+            if j is not None and self.close_enough(row, X[j]):
+                alias[i] = j
+                stats.delta_hits += 1
+                continue
+
+            scoring[key] = i
+            miss_idx.append(i)
+            stats.misses += 1
+
+        return verdicts, miss_idx, alias
+
+    def store(self, key: Hashable, row: np.ndarray, scored_at: float, verdict: tuple) -> None:
+        entries = self._entries
+        entries[key] = (row, scored_at, verdict)
+        entries.move_to_end(key)
+        if self.max_entries is not None and len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -0,0 +1,247 @@
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from RandomJungle.Models.FlatForest import FlatForest
+from RandomJungle.Models.RfFlowBin import RfFlowBin
+from RandomJungle.Models.RfFlowMulti import RfFlowMulti
+from RandomJungle.Models.RfHostBin import RfHostBin
+from RandomJungle.Models.RfHostMulti import RfHostMulti
+
+from RandomJungle.Data.FeatureSets import FlowMultiFeatures, FlowBinaryFeatures, HostBinaryFeatures, HostMultiFeatures
+
+# Nén forest đã train: tìm tập tree nhỏ nhất / depth cap thấp nhất mà
+# accuracy và F1 trên held-out CSV giảm không quá tolerance, ghi artifact nhỏ hơn.
+#
+#   python Train/CompressForest.py flowBin Dataset/FlowBinHoldout.csv --tolerance=0.005
+#
+# model → (model class, feature set, label map); label map None = Benign / attack như RfTrainer
+MODELS = {
+    "hostBin": (RfHostBin, HostBinaryFeatures, None),
+    "flowBin": (RfFlowBin, FlowBinaryFeatures, None),
+    "hostMulti": (RfHostMulti, HostMultiFeatures, {"SynScan": 0, "UdpScan": 1, "FullScan": 2, "BruteForce": 3}),
+    "flowMulti": (RfFlowMulti, FlowMultiFeatures, {"SynFlood": 0, "UdpFlood": 1}),
+}
+
+LATENCY_BATCH = 64
+
+
+def load_holdout(csv_path: str, name: str) -> Tuple[np.ndarray, np.ndarray]:
+    """X, y của held-out CSV, label giống hệt cách RfTrainer tạo khi train."""
+    _, feature_cls, label_map = MODELS[name]
+    df = pd.read_csv(csv_path)
+    if "Label" not in df.columns:
+        raise ValueError("Dataset must contain 'Label' column")
+
+    if label_map is None:
+        y = (df["Label"] != "Benign").astype(int).values
+    else:
+        df = df[df["Label"].isin(list(label_map))]
+        y = df["Label"].astype("object").map(label_map).to_numpy()
+
+    return df[feature_cls.FEATURE_NAMES].values, y
+
+
+def load_forest(train_dir: Path, name: str) -> FlatForest:
+    """Compact artifact <name>.forest nếu có, không thì convert <name>.pkl."""
+    forest_path = train_dir / f"{name}.forest"
+    if os.path.exists(forest_path):
+        return FlatForest.load(str(forest_path), mmap=False)
+
+    model = MODELS[name][0]()
+    model.load(str(train_dir / f"{name}.pkl"))
+    return FlatForest.from_sklearn(model.model)
+
+
+class ForestCompressor:
+    """
+    Tìm (tập tree, depth cap) cho forest nhỏ nhất (ít node nhất) mà
+    accuracy / F1 trên phần select của held-out không giảm quá tolerance
+    so với forest gốc.
+
+    Mỗi depth cap (1..max_depth): xếp tree theo accuracy riêng của từng
+    tree ở depth đó, rồi lấy prefix ngắn nhất đạt tolerance; giữ cặp ít
+    node nhất. Held-out được chia đôi:
+    phần select để tìm, phần report để báo cáo delta (không lạc quan).
+    """
+
+    def __init__(
+        self,
+        forest: FlatForest,
+        X: np.ndarray,
+        y: np.ndarray,
+        tolerance: float = 0.005,
+        average: str = "macro",
+        select_fraction: float = 0.5,
+        max_rows: int = 20000,
+        seed: int = 0,
+    ):
+        if len(X) < 2:
+            raise ValueError("Need at least 2 held-out rows")
+
+        self.forest = forest
+        self.tolerance = tolerance
+        self.average = average
+
+        order = np.random.default_rng(seed).permutation(len(X))
+        cut = min(max(int(len(X) * select_fraction), 1), len(X) - 1)
+        select, report = order[:cut][:max_rows], order[cut:]
+
+        # y → index trong classes_ (metrics() gọi mỗi prefix, tránh so label)
+        y = np.searchsorted(forest.classes_, np.asarray(y))
+        X = np.asarray(X, dtype=np.float32)
+        self.X_select, self.y_select = X[select], y[select]
+        self.X_report, self.y_report = X[report], y[report]
+
+    def metrics(self, proba: np.ndarray, y: np.ndarray) -> Tuple[float, float]:
+        """
+        (accuracy, F1) của proba (n_rows, n_classes) so với y (index class).
+        F1 như sklearn: binary = class index 1, macro = trung bình các class
+        có trong y hoặc prediction, zero_division=0.
+        """
+        n_classes = proba.shape[1]
+        pred = np.argmax(proba, axis=1)
+        confusion = np.bincount(y * n_classes + pred, minlength=n_classes * n_classes)
+        confusion = confusion.reshape(n_classes, n_classes)
+
+        tp = np.diag(confusion)
+        support = confusion.sum(axis=1) + confusion.sum(axis=0)
+        f1 = np.divide(2 * tp, support, out=np.zeros(n_classes), where=support > 0)
+        f1 = f1[1] if self.average == "binary" else f1[support > 0].mean()
+        return tp.sum() / len(y), float(f1)
+
+    def search(self) -> Tuple[np.ndarray, int]:
+        """(index các tree giữ lại, depth cap) của forest nhỏ nhất đạt tolerance."""
+        forest = self.forest
+        X, y = self.X_select, self.y_select
+
+        base_acc, base_f1 = self.metrics(forest.predict_proba(X), y)
+        best_trees, best_depth = np.arange(forest.n_trees), forest.max_depth
+        best_nodes = forest.n_nodes
+
+        # đi từng tầng: leaves sau vòng depth = node ở depth cap đó
+        leaves = np.broadcast_to(forest.roots, (len(X), forest.n_trees))
+        for depth in range(1, forest.max_depth + 1):
+            step = forest._apply(X, leaves, 1)
+            if depth > 1 and np.array_equal(step, leaves):
+                break  # đã tới lá hết, depth sâu hơn không khác
+            leaves = step
+
+            found = self._shortest_prefix(leaves, base_acc, base_f1)
+            if found is None:
+                continue
+
+            nodes = forest.subset(found, depth).n_nodes
+            if nodes < best_nodes:
+                best_trees, best_depth, best_nodes = found, depth, nodes
+
+        return np.sort(best_trees), best_depth
+
+    def _shortest_prefix(self, leaves: np.ndarray, base_acc: float, base_f1: float) -> Optional[np.ndarray]:
+        """
+        Xếp tree theo accuracy riêng (tốt nhất trước, mergesort giữ thứ tự
+        gốc khi bằng điểm); prefix ngắn nhất đạt tolerance, None nếu không có.
+        """
+        value, y = self.forest.value, self.y_select
+        scores = [np.mean(np.argmax(value[leaves[:, t]], axis=1) == y) for t in range(leaves.shape[1])]
+        ranked = np.argsort(-np.asarray(scores), kind="mergesort")
+
+        running = np.zeros((len(y), self.forest.n_classes))
+        for k, t in enumerate(ranked, start=1):
+            running += value[leaves[:, t]]
+            acc, f1 = self.metrics(running, y)
+            if base_acc - acc <= self.tolerance and base_f1 - f1 <= self.tolerance:
+                return ranked[:k]
+        return None
+
+    def compress(self) -> FlatForest:
+        trees, depth = self.search()
+        return self.forest.subset(trees, depth)
+
+    def report(self, compact: FlatForest) -> Dict[str, Dict[str, float]]:
+        """Kích thước, latency và metric trên phần report của forest gốc và forest nén."""
+        result = {}
+        for label, forest in (("original", self.forest), ("compressed", compact)):
+            acc, f1 = self.metrics(forest.predict_proba(self.X_report), self.y_report)
+            row_us, batch_us = _latency(forest, self.X_report)
+            result[label] = {
+                "trees": forest.n_trees,
+                "max_depth": forest.max_depth,
+                "nodes": forest.n_nodes,
+                "bytes": forest.nbytes,
+                "accuracy": acc,
+                "f1": f1,
+                "row_us": row_us,
+                "batch_us": batch_us,
+            }
+        return result
+
+
+def _latency(forest: FlatForest, X: np.ndarray, rows: int = 200, repeat: int = 5) -> Tuple[float, float]:
+    """(µs mỗi row khi gọi từng row, µs mỗi batch LATENCY_BATCH row); best-of-repeat."""
+    single = X[:rows]
+    batch = np.resize(X, (LATENCY_BATCH, X.shape[1]))
+
+    row_best = batch_best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for i in range(len(single)):
+            forest.predict_proba(single[i:i + 1])
+        row_best = min(row_best, (time.perf_counter() - start) / len(single))
+
+        start = time.perf_counter()
+        for _ in range(10):
+            forest.predict_proba(batch)
+        batch_best = min(batch_best, (time.perf_counter() - start) / 10)
+
+    return row_best * 1e6, batch_best * 1e6
+
+
+def _print_report(result: Dict[str, Dict[str, float]]) -> None:
+    original, compressed = result["original"], result["compressed"]
+    print(f"{'':12}{'original':>14}{'compressed':>14}{'delta':>12}")
+    for key, fmt in (
+        ("trees", "d"), ("max_depth", "d"), ("nodes", "d"), ("bytes", "d"),
+        ("row_us", ".1f"), ("batch_us", ".1f"), ("accuracy", ".4f"), ("f1", ".4f"),
+    ):
+        a, b = original[key], compressed[key]
+        print(f"{key:12}{a:>14{fmt}}{b:>14{fmt}}{b - a:>+12{fmt}}")
+
+
+def main(argv: Optional[list] = None):
+    argv = sys.argv[1:] if argv is None else argv
+    flags = {k: v for k, _, v in (a[2:].partition("=") for a in argv if a.startswith("--"))}
+    args = [a for a in argv if not a.startswith("--")]
+    if len(args) != 2 or args[0] not in MODELS:
+        print("Usage: CompressForest.py <" + "|".join(MODELS) + "> <holdout.csv> [--tolerance=0.005] [--out=path]")
+        return
+
+    PROJECT_ROOT = Path(__file__).resolve().parents[1]
+    train_dir = PROJECT_ROOT / "Train"
+    name, csv_path = args
+
+    forest = load_forest(train_dir, name)
+    X, y = load_holdout(csv_path, name)
+    compressor = ForestCompressor(
+        forest,
+        X,
+        y,
+        tolerance=float(flags.get("tolerance", 0.005)),
+        average="binary" if MODELS[name][2] is None else "macro",
+    )
+
+    compact = compressor.compress()
+    out_path = flags.get("out") or str(train_dir / f"{name}.pruned.forest")
+    compact.save(out_path, MODELS[name][1].FEATURE_NAMES)
+
+    _print_report(compressor.report(compact))
+    print("Compressed", name, "->", out_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+from pathlib import Path
+
+from RandomJungle.Models.RfFlowBin import RfFlowBin
+from RandomJungle.Models.RfFlowMulti import RfFlowMulti
+from RandomJungle.Models.RfHostBin import RfHostBin
+from RandomJungle.Models.RfHostMulti import RfHostMulti
+
+from RandomJungle.Data.FeatureSets import FlowMultiFeatures, FlowBinaryFeatures, HostBinaryFeatures, HostMultiFeatures
+
+# Convert các model pickle đã train sang compact artifact (<name>.forest)
+MODELS = {
+    "hostBin": (RfHostBin, HostBinaryFeatures),
+    "flowBin": (RfFlowBin, FlowBinaryFeatures),
+    "hostMulti": (RfHostMulti, HostMultiFeatures),
+    "flowMulti": (RfFlowMulti, FlowMultiFeatures),
+}
+
+
+def main():
+    PROJECT_ROOT = Path(__file__).resolve().parents[1]
+    train_dir = PROJECT_ROOT / "Train"
+
+    for name, (model_cls, feature_cls) in MODELS.items():
+        pkl_path = train_dir / f"{name}.pkl"
+        if not os.path.exists(pkl_path):
+            print("Skipping", name, "(missing", str(pkl_path) + ")")
+            continue
+
+        model = model_cls()
+        model.load(str(pkl_path))
+        model.save_compact(str(train_dir / f"{name}.forest"), feature_cls.FEATURE_NAMES)
+
+        print("Exported", name, "->", f"{name}.forest")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ from RandomJungle.Models.RfFlowBin import RfFlowBin
 from RandomJungle.Models.RfFlowMulti import RfFlowMulti
 from RandomJungle.Models.RfHostBin import RfHostBin
 from RandomJungle.Models.RfHostMulti import RfHostMulti
+from RandomJungle.Models.CascadePrefilter import CascadePrefilter
 
 from RandomJungle.Data.FeatureSets import FlowMultiFeatures, FlowBinaryFeatures, HostBinaryFeatures, HostMultiFeatures
 
@@ -19,6 +20,10 @@ class RfTrainer:
         self.hostMulti = RfHostMulti()
         self.flowMulti = RfFlowMulti()
 
+        # cascade stage trước 2 binary forest (FNR thêm vào ≤ target_fnr, confidence 0.95)
+        self.hostPrefilter = CascadePrefilter(max_depth=4, target_fnr=0.001)
+        self.flowPrefilter = CascadePrefilter(max_depth=4, target_fnr=0.001)
+
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir)
 
@@ -37,6 +42,7 @@ class RfTrainer:
 
         self.hostBin.fit(X, y)
         self.hostBin.save(os.path.join(self.output_dir, "hostBin.pkl"))
+        self.hostBin.save_compact(os.path.join(self.output_dir, "hostBin.forest"), HostBinaryFeatures.FEATURE_NAMES)
 
         print("Host Binary trained.")
 
@@ -50,9 +56,39 @@ class RfTrainer:
 
         self.flowBin.fit(X, y)
         self.flowBin.save(os.path.join(self.output_dir, "flowBin.pkl"))
+        self.flowBin.save_compact(os.path.join(self.output_dir, "flowBin.forest"), FlowBinaryFeatures.FEATURE_NAMES)
 
         print("Flow Binary trained.")
 
+    # CASCADE PREFILTER (dùng chung dataset với binary)
+    def train_host_prefilter(self):
+
+        print("Training Host Prefilter...")
+        self._train_prefilter(self.hostPrefilter, HostBinaryFeatures, "hostPrefilter.pkl")
+        print("Host Prefilter trained.")
+
+    def train_flow_prefilter(self):
+
+        print("Training Flow Prefilter...")
+        self._train_prefilter(self.flowPrefilter, FlowBinaryFeatures, "flowPrefilter.pkl")
+        print("Flow Prefilter trained.")
+
+    def _train_prefilter(self, prefilter, feature_set, file_name):
+        X = self.df[feature_set.FEATURE_NAMES].values
+        y = (self.df["Label"] != "Benign").astype(int).values
+
+        prefilter.fit(X, y, feature_set.FEATURE_NAMES)
+        prefilter.save(os.path.join(self.output_dir, file_name))
+
+        # diagnostic trên toàn bộ dataset (gồm cả phần fit)
+        cleared, _ = prefilter.partition(X)
+        missed = int((cleared & (y == 1)).sum())
+        print(
+            f"Prefilter clears {cleared.mean():.1%} of rows, "
+            f"pass-through {prefilter.pass_through_rate:.1%}, "
+            f"attacks cleared {missed}/{int(y.sum())}"
+        )
+
     # HOST MULTI (SynScan, UdpScan, FullScan, BruteForce)
     def train_host_multi(self):
 
@@ -87,6 +123,7 @@ class RfTrainer:
 
         self.hostMulti.fit(X, y)
         self.hostMulti.save(os.path.join(self.output_dir, "hostMulti.pkl"))
+        self.hostMulti.save_compact(os.path.join(self.output_dir, "hostMulti.forest"), HostMultiFeatures.FEATURE_NAMES)
 
         print("Host Multi trained.")
 
@@ -113,5 +150,6 @@ class RfTrainer:
 
         self.flowMulti.fit(X, y)
         self.flowMulti.save(os.path.join(self.output_dir, "flowMulti.pkl"))
+        self.flowMulti.save_compact(os.path.join(self.output_dir, "flowMulti.forest"), FlowMultiFeatures.FEATURE_NAMES)
 
         print("Flow Multi trained.")
\ No newline at end of file
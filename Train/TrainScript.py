@@ -11,12 +11,14 @@ def main():
         str(dest_dir)
     )
     FlowBinTrainer.train_flow_binary()
+    FlowBinTrainer.train_flow_prefilter()
 
     HostBinTrainer = RfTrainer(
         str(PROJECT_ROOT / "Dataset/HostBinDataset.csv"),
         str(dest_dir)
     )
     HostBinTrainer.train_host_binary()
+    HostBinTrainer.train_host_prefilter()
 
     FlowMultiTrainer = RfTrainer(
         str(PROJECT_ROOT / "Dataset/FlowMultiDataset.csv"),
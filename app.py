@@ -1,75 +1,135 @@
+import sys
 import time
-import numpy as np
-from dataclasses import asdict
 import os
+import threading
 
 from NetworkReader.Services.FlowBased.FlowFeatureExtractService import FlowFeatureExtractService
-from NetworkReader.Services.FlowBased.FlowSlidingWindowService import FlowSlidingWindowService
-from NetworkReader.Services.FlowBased.FlowTableService import FlowTableService
 
-from NetworkReader.Services.HostBased.HostBehaviorService import HostBehaviorService
 from NetworkReader.Services.HostBased.HostFeatureExtractService import HostFeatureExtractService
-from NetworkReader.Services.HostBased.HostSlidingWindowService import HostSlidingWindowService
 
 from NetworkReader.Services.PacketCaptureService import PacketCaptureService
+from NetworkReader.Services.ProcessCaptureService import ProcessCaptureService
+from NetworkReader.Services.Capture.AfPacketBackend import AfPacketBackend
+from NetworkReader.Services.Capture.PcapReplayBackend import PcapReplayBackend
+from NetworkReader.Services.Capture.SimulatedClock import SimulatedClock
 from NetworkReader.Services.PacketParserService import PacketParserService
+from NetworkReader.Services.PacketStateEngine import PacketStateEngine
+from NetworkReader.Data.Enums.EvictionPolicy import EvictionPolicy
 
 from NetworkReader.NetworkReaderPipeLine import NetworkReader
 from RandomJungle.Data.Labels import FinalPredictionLabel, BinaryLabel
 
-from RandomJungle.Data.ModelOutputs import (
-    BinaryModelOutput,
-    FlowMultiModelOutput, HostMultiModelOutput
+from RandomJungle.Data.ModelOutputs import HybridModelOutput
+from RandomJungle.Data.FeatureSets import (
+    HostBinaryFeatures,
+    FlowBinaryFeatures,
+    HostMultiFeatures,
+    FlowMultiFeatures,
 )
 
 from RandomJungle.Preprocessor import Preprocessor
+from RandomJungle.InferenceScheduler import InferenceScheduler
+from RandomJungle.VerdictCache import VerdictCache
 from DecisionFusion.DecisionFusion import DecisionFusion
 
 from RandomJungle.Models.RfHostBin import RfHostBin
 from RandomJungle.Models.RfFlowBin import RfFlowBin
 from RandomJungle.Models.RfHostMulti import RfHostMulti
 from RandomJungle.Models.RfFlowMulti import RfFlowMulti
+from RandomJungle.Models.CascadePrefilter import CascadePrefilter
 
+# delta mặc định của --early-exit: margin-only không nhanh hơn full forest
+# (bench_early_exit.py), Hoeffding delta=1e-3 giữ nguyên label trên bench
+EARLY_EXIT_DELTA = 1e-3
 
-class IdsConsoleApp:
 
-    def __init__(self):
+class IdsConsoleApp:
 
-        # Load ML Models
+    def __init__(
+        self,
+        pcap_path: str | None = None,
+        realtime: bool = False,
+        capture_process: bool = False,
+        emit_interval: float | None = None,
+        verdict_tol: float | None = None,
+        benign_ttl: float = 0.0,
+        early_exit: bool = False,
+        early_exit_delta: float | None = None,
+        prefilter: bool = False,
+    ):
+
+        # ML Models (load trong background thread, xem _load_models)
         self.host_bin = RfHostBin()
         self.flow_bin = RfFlowBin()
         self.host_multi = RfHostMulti()
         self.flow_multi = RfFlowMulti()
 
-        self.host_bin.load("Train/hostBin.pkl")
-        self.flow_bin.load("Train/flowBin.pkl")
-        self.host_multi.load("Train/hostMulti.pkl")
-        self.flow_multi.load("Train/flowMulti.pkl")
+        self.host_multi_available = False
+        self.flow_multi_available = False
+
+        # early exit cho 2 binary forest; không truyền delta → EARLY_EXIT_DELTA
+        self.early_exit = early_exit or early_exit_delta is not None
+        self.early_exit_delta = early_exit_delta if early_exit_delta is not None else EARLY_EXIT_DELTA
 
-        # Check whether multi-class models are valid (trained with >=2 classes)
-        self.host_multi_available = self._is_multi_model_valid(self.host_multi)
-        self.flow_multi_available = self._is_multi_model_valid(self.flow_multi)
+        # cascade prefilter: tree nông clear row Benign rõ ràng trước 2 binary forest
+        self.host_prefilter = CascadePrefilter() if prefilter else None
+        self.flow_prefilter = CascadePrefilter() if prefilter else None
 
-        if not self.host_multi_available:
-            print("WARNING: host multi-class model appears to have <2 classes and will not be used. Retrain with host multi-class dataset.")
-        if not self.flow_multi_available:
-            print("WARNING: flow multi-class model appears to have <2 classes and will not be used. Retrain with flow multi-class dataset.")
+        self._models_ready = threading.Event()
+        self._model_load_error: Exception | None = None
+        self._model_loader = threading.Thread(target=self._load_models, daemon=True)
+        self._model_loader.start()
 
         # Network Config
+        # IP đơn hoặc CIDR, ví dụ {"192.168.1.0/24"}
         self.LOCAL_IP = {"192.168.1.165"}
-        self.IFACE = "Ethernet"
+        self.IFACE = "Ethernet" if sys.platform == "win32" else "eth0"
 
-        self.capture = PacketCaptureService()
-        self.parser = PacketParserService(self.LOCAL_IP)
+        # capture_process: capture chạy ở process riêng, packet qua shared memory
+        capture_cls = ProcessCaptureService if capture_process else PacketCaptureService
+
+        if pcap_path is None:
+            self.clock = None
+            if sys.platform == "win32":
+                self.capture = capture_cls()
+            else:
+                self.capture = capture_cls(backend=AfPacketBackend(self.IFACE))
+        else:
+            # Offline replay: thời gian chạy theo timestamp trong file pcap
+            self.clock = SimulatedClock()
+            self.capture = capture_cls(
+                backend=PcapReplayBackend(pcap_path, realtime=realtime),
+                clock=self.clock,
+            )
+        # IP giữ dạng int trong pipeline, chỉ đổi sang string ở feature vector
+        self.parser = PacketParserService(self.LOCAL_IP, int_ips=True)
+
+        # Flow + Host state: một lần update mỗi packet qua engine,
+        # 4 service bên dưới là view trên state chung
+        # packed_keys: flow key là một int (cần int_ips ở parser)
+        # max_flows / max_hosts: giới hạn state khi bị flood spoof source
+        # emit_interval: mỗi flow được chấm tối đa một lần mỗi tick (None = mỗi packet)
+        # lazy_snapshots: snapshot là handle, feature chỉ tính khi extractor đọc
+        self.engine = PacketStateEngine(
+            window_size=10,
+            flow_timeout=30,
+            host_timeout=30,
+            packed_keys=True,
+            max_flows=200_000,
+            max_hosts=50_000,
+            evict_policy=EvictionPolicy.LEAST_PACKETS,
+            emit_interval=emit_interval,
+            lazy_snapshots=True,
+        )
 
         # Flow Pipeline
-        self.flow_table = FlowTableService(flow_timeout=30)
-        self.flow_window = FlowSlidingWindowService(window_size=10)
+        self.flow_table = self.engine.flow_table
+        self.flow_window = self.engine.flow_window
         self.flow_extractor = FlowFeatureExtractService(window_size=10)
 
         # Host Pipeline
-        self.host_behavior = HostBehaviorService(host_timeout=30)
-        self.host_window = HostSlidingWindowService(window_size=10)
+        self.host_behavior = self.engine.host_behavior
+        self.host_window = self.engine.host_window
         self.host_extractor = HostFeatureExtractService(window_size=10)
 
         self.reader = NetworkReader(
@@ -80,18 +140,106 @@ class IdsConsoleApp:
             self.flow_extractor,
             self.host_behavior,
             self.host_window,
-            self.host_extractor
+            self.host_extractor,
+            engine=self.engine,
         )
 
         self.preprocessor = Preprocessor()
         self.fusion = DecisionFusion()
 
+        # Verdict cache: bỏ qua model khi feature lệch < verdict_tol so với lần
+        # chấm trước của cùng host / flow, hoặc verdict Benign trẻ hơn benign_ttl
+        host_cache = flow_cache = None
+        if verdict_tol is not None or benign_ttl > 0:
+            host_cache = VerdictCache(verdict_tol or 0.0, benign_ttl, max_entries=50_000)
+            flow_cache = VerdictCache(verdict_tol or 0.0, benign_ttl, max_entries=200_000)
+
+        # Micro-batching: tối đa N rows hoặc T ms mỗi batch
+        self.scheduler = InferenceScheduler(
+            self.host_bin,
+            self.flow_bin,
+            self.host_multi,
+            self.flow_multi,
+            self.preprocessor,
+            max_batch_size=64,
+            max_delay_ms=5.0,
+            clock=time.monotonic if self.clock is None else self.clock.now,
+            host_cache=host_cache,
+            flow_cache=flow_cache,
+            host_prefilter=self.host_prefilter,
+            flow_prefilter=self.flow_prefilter,
+        )
+
         print("IDS Ready.\n")
 
+    def _load_models(self) -> None:
+        try:
+            self._load_model(self.host_bin, "hostBin")
+            self._load_model(self.flow_bin, "flowBin")
+            self._load_model(self.host_multi, "hostMulti")
+            self._load_model(self.flow_multi, "flowMulti")
+
+            # Check whether multi-class models are valid (trained with >=2 classes)
+            self.host_multi_available = self._is_multi_model_valid(self.host_multi)
+            self.flow_multi_available = self._is_multi_model_valid(self.flow_multi)
+
+            if not self.host_multi_available:
+                print("WARNING: host multi-class model appears to have <2 classes and will not be used. Retrain with host multi-class dataset.")
+            if not self.flow_multi_available:
+                print("WARNING: flow multi-class model appears to have <2 classes and will not be used. Retrain with flow multi-class dataset.")
+
+            # cột của Preprocessor.transform_rows phải khớp lúc train
+            for model, feature_set in (
+                (self.host_bin, HostBinaryFeatures),
+                (self.flow_bin, FlowBinaryFeatures),
+                (self.host_multi, HostMultiFeatures),
+                (self.flow_multi, FlowMultiFeatures),
+            ):
+                Preprocessor.check_model(model, feature_set)
+
+            for prefilter, name, feature_set in (
+                (self.host_prefilter, "hostPrefilter", HostBinaryFeatures),
+                (self.flow_prefilter, "flowPrefilter", FlowBinaryFeatures),
+            ):
+                if prefilter is not None:
+                    prefilter.load(os.path.join("Train", f"{name}.pkl"))
+                    Preprocessor.check_model(prefilter, feature_set)
+
+            if self.early_exit:
+                for model in (self.host_bin, self.flow_bin):
+                    model.set_early_exit(32, self.early_exit_delta)
+
+            # Warm-up: chạm vào mmap pages / numpy paths trước packet thật đầu tiên
+            for model in (self.host_bin, self.flow_bin, self.host_multi, self.flow_multi):
+                model.warm_up()
+
+        except Exception as e:
+            self._model_load_error = e
+
+        finally:
+            self._models_ready.set()
+
+    @staticmethod
+    def _load_model(model, name: str) -> None:
+        # Ưu tiên compact artifact (np.load mmap, gần như tức thì), fallback pickle
+        compact_path = os.path.join("Train", f"{name}.forest")
+        if os.path.isdir(compact_path):
+            model.load_compact(compact_path)
+            return
+
+        model.load(os.path.join("Train", f"{name}.pkl"))
+        # Flattened forest backend: bỏ joblib dispatch cho batch nhỏ
+        model.set_backend("flat")
+
+    def wait_until_models_ready(self) -> None:
+        self._models_ready.wait()
+        if self._model_load_error is not None:
+            raise self._model_load_error
+
     def _is_multi_model_valid(self, model) -> bool:
-        """Return True if the loaded sklearn model has at least 2 classes_."""
+        """Return True if the loaded model has at least 2 classes_."""
         try:
-            classes = getattr(model.model, 'classes_', None)
+            classes = getattr(model, 'classes_', None)
             if classes is None:
                 return False
             return len(classes) >= 2
@@ -99,27 +247,20 @@ class IdsConsoleApp:
             return False
 
     def predict_hybrid(self, host_features, flow_features):
+        self.wait_until_models_ready()
+        output = self.scheduler.predict([(host_features, flow_features)])[0]
+        return self.decide(output)
 
-        # ---------- Preprocess ----------
-        host_bin_f, flow_bin_f, host_multi_f, flow_multi_f = self.preprocessor.transform(host_features, flow_features)
-
-        host_bin_array = np.array(list(asdict(host_bin_f).values())).reshape(1, -1)
-        flow_bin_array = np.array(list(asdict(flow_bin_f).values())).reshape(1, -1)
-        host_multi_array = np.array(list(asdict(host_multi_f).values())).reshape(1, -1)
-        flow_multi_array = np.array(list(asdict(flow_multi_f).values())).reshape(1, -1)
-
-
-
-        host_bin_output = BinaryModelOutput.from_proba(self.host_bin.predict_proba(host_bin_array)[0], self.host_bin.model.classes_)
-        flow_bin_output = BinaryModelOutput.from_proba(self.flow_bin.predict_proba(flow_bin_array)[0],self.flow_bin.model.classes_)
+    def decide(self, output: HybridModelOutput):
+        host_features = output.host_features
+        flow_features = output.flow_features
 
-        host_multi_output = None
-        flow_multi_output = None
-
-        # Only call multi-class models if binary says attack AND the multi models are actually available
-        if host_bin_output.label == BinaryLabel.Attack:
-            host_multi_output = HostMultiModelOutput.from_proba(self.host_multi.predict_proba(host_multi_array)[0],self.host_multi.model.classes_)
+        host_bin_output = output.host_bin_output
+        flow_bin_output = output.flow_bin_output
+        host_multi_output = output.host_multi_output
+        flow_multi_output = output.flow_multi_output
 
+        if host_multi_output is not None:
             print(host_features.syn_ratio)
             if host_multi_output.label.name != "BruteForce":
                 if host_features.syn_ratio >= 0:
@@ -129,9 +270,7 @@ class IdsConsoleApp:
                 if host_features.syn_ratio > 0.95:
                     host_multi_output.label = FinalPredictionLabel.SynScan
 
-        if flow_bin_output.label == BinaryLabel.Attack:
-            flow_multi_output = FlowMultiModelOutput.from_proba(self.flow_multi.predict_proba(flow_multi_array)[0], self.flow_multi.model.classes_)
-
+        if flow_multi_output is not None:
             protocol = flow_features.protocol
 
             if flow_multi_output.label.name == "SynFlood" and protocol != 6:
@@ -153,13 +292,13 @@ class IdsConsoleApp:
 
             # Prepare feature vector strings (host_multi, flow_multi) — values comma-separated
             try:
-                host_vec_vals = host_multi_array[0].tolist()
+                host_vec_vals = output.host_multi_row.tolist()
                 host_vec_str = ",".join([str(x) for x in host_vec_vals])
             except Exception:
                 host_vec_str = "None"
 
             try:
-                flow_vec_vals = flow_multi_array[0].tolist()
+                flow_vec_vals = output.flow_multi_row.tolist()
                 flow_vec_str = ",".join([str(x) for x in flow_vec_vals])
             except Exception:
                 flow_vec_str = "None"
@@ -202,40 +341,138 @@ class IdsConsoleApp:
     # MAIN LOOP
     def run(self):
 
-        print("🟢 Monitoring started...\n")
+        # Capture chạy trong lúc model còn đang load; packet chờ trong queue
         self.capture.start()
+        self.wait_until_models_ready()
+        print("🟢 Monitoring started...\n")
         while True:
             try:
-                result = self.reader.read()
+                # không chờ packet quá deadline của batch đang gom
+                deadline = self.scheduler.time_until_deadline()
+                results = self.reader.read_many(
+                    max_packets=self.scheduler.max_batch_size,
+                    max_latency=self.scheduler.max_delay if deadline is None
+                    else min(deadline, self.scheduler.max_delay),
+                    timeout=1.0 if deadline is None else deadline,
+                )
 
-                if result is None:
-                    continue
+                outputs = []
+                if self.engine.emit_interval is None:
+                    for host_features, flow_features in results:
+                        outputs += self.scheduler.submit(host_features, flow_features)
+                else:
+                    # tick mode: mọi flow dirty của một tick thành một batch;
+                    # không có packet thì tick vẫn được emit theo clock
+                    outputs += self.scheduler.submit_many(
+                        results or self.reader.emit_due(self._now())
+                    )
 
-                host_features, flow_features = result
+                if not results and self.capture.exhausted:
+                    # hết file replay → chạy nốt batch đang gom rồi dừng
+                    if self.engine.emit_interval is not None:
+                        self._report(self.scheduler.submit_many(self.reader.flush_dirty(self._now())))
+                    self._report(self.scheduler.flush())
+                    print("\nReplay finished.")
+                    self._print_stats()
+                    break
 
-                final_label, confidence = self.predict_hybrid(
-                    host_features,
-                    flow_features
-                )
-                if final_label != FinalPredictionLabel.Benign:
-                    print(
-                        f"[{time.strftime('%H:%M:%S')}] "
-                        f" {flow_features.flow_key} "
-                        f" {host_features.src_ip}"
-                        f"→ {final_label.name} "
-                        f"(conf={confidence:.2f})"
-                    )
-                    print("\n")
+                outputs += self.scheduler.poll()
+                self._report(outputs)
 
             except KeyboardInterrupt:
                 print("\nIDS Stopped.")
+                self._print_stats()
                 break
 
             except Exception as e:
                 print(e)
                 break
 
+        self.capture.stop()
+
+    def _now(self) -> float:
+        # cùng thang thời gian với timestamp packet
+        return self.clock.now() if self.clock is not None else time.time()
+
+    def _report(self, outputs) -> None:
+        for output in outputs:
+            final_label, confidence = self.decide(output)
+
+            if final_label != FinalPredictionLabel.Benign:
+                print(
+                    f"[{time.strftime('%H:%M:%S', time.localtime(output.flow_features.timestamp))}] "
+                    f" {output.flow_features.flow_key} "
+                    f" {output.host_features.src_ip}"
+                    f"→ {final_label.name} "
+                    f"(conf={confidence:.2f})"
+                )
+                print("\n")
+
+    def _print_stats(self) -> None:
+        stats = self.scheduler.stats
+        print(
+            f"Inference batches: {stats.batches}, "
+            f"mean size: {stats.mean_batch_size:.1f}, "
+            f"max size: {stats.max_batch_size}, "
+            f"mean delay: {stats.mean_queue_delay * 1000:.2f} ms, "
+            f"max delay: {stats.max_queue_delay * 1000:.2f} ms"
+        )
+        for name, cache in (("host", self.scheduler.host_cache), ("flow", self.scheduler.flow_cache)):
+            if cache is not None:
+                print(
+                    f"Verdict cache ({name}): {cache.stats.hits} hits "
+                    f"({cache.stats.delta_hits} delta, {cache.stats.ttl_hits} ttl), "
+                    f"{cache.stats.misses} misses, hit rate {cache.stats.hit_rate:.1%}"
+                )
+        if self.early_exit:
+            print(
+                f"Early exit: host bin {self.host_bin.mean_trees_per_row:.1f}/{self.host_bin.n_trees} trees/row, "
+                f"flow bin {self.flow_bin.mean_trees_per_row:.1f}/{self.flow_bin.n_trees} trees/row"
+            )
+        for name, prefilter in (("host", self.host_prefilter), ("flow", self.flow_prefilter)):
+            if prefilter is not None:
+                print(
+                    f"Prefilter ({name}): {prefilter.cleared}/{prefilter.rows} rows cleared, "
+                    f"pass-through {prefilter.pass_through_rate:.1%}"
+                )
+        print("Dropped packets:", self.capture.dropped_packets)
+        print(
+            f"Live flows: {self.engine.live_flows} (expired {self.engine.expired_flows}), "
+            f"live hosts: {self.engine.live_hosts} (expired {self.engine.expired_hosts})"
+        )
+        print(
+            f"Evicted flows: {self.engine.evicted_flows}, "
+            f"evicted hosts: {self.engine.evicted_hosts}, "
+            f"tail packets: {self.engine.flow_tail.total_packets}, "
+            f"state memory: ~{(self.engine.flow_memory_bytes + self.engine.host_memory_bytes) / 2**20:.1f} MiB"
+        )
+
 
 if __name__ == "__main__":
-    app = IdsConsoleApp()
+    # python app.py [--realtime] [--capture-process] [--emit-interval=SECONDS]
+    #               [--verdict-tol=REL] [--benign-ttl=SECONDS]
+    #               [--early-exit] [--early-exit-delta=DELTA] [--prefilter] [capture.pcap]
+    #   → live capture hoặc replay offline (--realtime: replay theo nhịp timestamp gốc)
+    #   --early-exit: dừng sớm theo Hoeffding delta=1e-3 (EARLY_EXIT_DELTA) → xấp xỉ,
+    #   label có thể khác full forest với xác suất ~delta. Chế độ margin-only (chính
+    #   xác tuyệt đối) không còn bật được từ CLI, chỉ qua BaseRFModel.set_early_exit.
+    args = [a for a in sys.argv[1:] if not a.startswith("--")]
+
+    def float_flag(name: str, default):
+        return next(
+            (float(a.split("=", 1)[1]) for a in sys.argv[1:] if a.startswith(f"--{name}=")),
+            default,
+        )
+
+    app = IdsConsoleApp(
+        pcap_path=args[0] if args else None,
+        realtime="--realtime" in sys.argv[1:],
+        capture_process="--capture-process" in sys.argv[1:],
+        emit_interval=float_flag("emit-interval", None),
+        verdict_tol=float_flag("verdict-tol", None),
+        benign_ttl=float_flag("benign-ttl", 0.0),
+        early_exit="--early-exit" in sys.argv[1:],
+        early_exit_delta=float_flag("early-exit-delta", None),
+        prefilter="--prefilter" in sys.argv[1:],
+    )
     app.run()
\ No newline at end of file
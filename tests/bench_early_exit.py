@@ -0,0 +1,93 @@
+import os
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+
+from RandomJungle.Models.RfFlowBin import RfFlowBin
+from RandomJungle.Models.RfHostBin import RfHostBin
+from RandomJungle.Models.RfFlowMulti import RfFlowMulti
+from RandomJungle.Models.RfHostMulti import RfHostMulti
+
+DELTA = 1e-3
+BATCH_SIZES = (1, 64)
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+MODEL_FILES = {
+    'hostMulti': (RfHostMulti, PROJECT_ROOT / 'Train' / 'hostMulti.pkl'),
+    'flowMulti': (RfFlowMulti, PROJECT_ROOT / 'Train' / 'flowMulti.pkl'),
+}
+
+
+def synthetic(model_cls, n_features: int, seed: int):
+    """~90% benign rõ ràng (rate thấp, không lệch SYN/RST), còn lại attack / vùng biên."""
+    rng = np.random.default_rng(seed)
+    n = 8000
+    X = rng.random((n, n_features))
+    X[:, 0] *= np.where(rng.random(n) < 0.9, 50.0, 5000.0)
+    score = X[:, 0] / 5000.0 + X[:, 1] + 0.3 * rng.standard_normal(n)
+    y = (score > 1.2).astype(int)
+
+    model = model_cls()
+    model.fit(X[:4000], y[:4000])
+    model.set_backend("flat")
+    return model, X[4000:]
+
+
+def timed(fn, X, batch_size: int, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for i in range(0, len(X), batch_size):
+            fn(X[i:i + batch_size])
+        best = min(best, time.perf_counter() - t0)
+    return best / len(X) * 1e6
+
+
+def report(name, model, X):
+    model.set_early_exit(None)
+    full = model.predict_proba(X)
+    full_label = full.argmax(axis=1)
+    print(f"{name}: {model.n_trees} trees, {len(X)} rows")
+
+    for label, delta in (("margin", None), (f"delta={DELTA:g}", DELTA)):
+        model.set_early_exit(32, delta)
+        model.early_exit_rows = model.early_exit_trees = 0
+        proba = model.predict_proba(X)
+        agree = (proba.argmax(axis=1) == full_label).mean()
+        print(
+            f"  {label:>12}: mean trees/row {model.mean_trees_per_row:6.1f}, "
+            f"label agreement {agree:.4f}, max |dp| {np.abs(proba - full).max():.3f}"
+        )
+        if delta is None and agree != 1.0:
+            raise AssertionError(f"{name}: margin early exit changed a label")
+
+    for batch_size in BATCH_SIZES:
+        model.set_early_exit(None)
+        t_full = timed(model.predict_proba, X[:512], batch_size)
+        line = f"  batch={batch_size:<3} full {t_full:8.1f} us/row"
+        for label, delta in (("margin", None), ("delta", DELTA)):
+            model.set_early_exit(32, delta)
+            t_early = timed(model.predict_proba, X[:512], batch_size)
+            line += f" | {label} {t_early:8.1f} us/row ({1 - t_early / t_full:+.0%} saved)"
+        print(line)
+    model.set_early_exit(None)
+
+
+if __name__ == '__main__':
+    warnings.simplefilter("ignore")
+    report("RfFlowBin (synthetic)", *synthetic(RfFlowBin, 6, 0))
+    report("RfHostBin (synthetic)", *synthetic(RfHostBin, 6, 1))
+
+    rng = np.random.default_rng(2)
+    for name, (model_cls, path) in MODEL_FILES.items():
+        if not os.path.exists(path):
+            print('  MISSING:', path)
+            continue
+        model = model_cls()
+        model.load(path)
+        model.set_backend("flat")
+        X = rng.random((2000, model.n_features_in_)) * rng.choice([1, 10, 1000], model.n_features_in_)
+        report(name, model, X)
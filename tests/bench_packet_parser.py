@@ -0,0 +1,307 @@
+import random
+import socket
+import struct
+import time
+from dataclasses import replace
+from typing import Optional, Set
+
+from NetworkReader.Data.Enums.Direction import Direction
+from NetworkReader.Data.Enums.L4Protocol import L4Protocol
+from NetworkReader.Data.ValueObjects.PacketArray import TCP_ACK, TCP_FIN, TCP_RST, TCP_SYN
+from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
+from NetworkReader.Services.PacketParserService import (
+    IP_MIN_HEADER_LEN,
+    TCP_MIN_HEADER_LEN,
+    UDP_HEADER_LEN,
+    PacketParserService,
+)
+
+LOCAL_IP = "192.168.1.10"
+N_PACKETS = 20000
+REPEAT = 5
+BATCH_SIZE = 256
+
+
+class LegacyPacketParser:
+    """Parser trước khi chuyển sang unpack_from (chỉ dùng để so sánh)."""
+
+    def __init__(self, local_ips: Set[str]):
+        self._local_ips = local_ips
+
+    def _resolve_direction(self, src_ip: str, dst_ip: str) -> Optional[Direction]:
+        src_local = src_ip in self._local_ips
+        dst_local = dst_ip in self._local_ips
+
+        if src_local and not dst_local:
+            return Direction.FORWARD
+        if not src_local and dst_local:
+            return Direction.BACKWARD
+
+        return None
+
+    def parse(self, raw_packet: bytes, timestamp: float) -> Optional[PacketMeta]:
+
+        # WinDivert: raw_packet bắt đầu từ IPv4 header
+        if len(raw_packet) < IP_MIN_HEADER_LEN:
+            return None
+
+        iph = struct.unpack(
+            "!BBHHHBBH4s4s",
+            raw_packet[:IP_MIN_HEADER_LEN]
+        )
+
+        version_ihl = iph[0]
+        version = version_ihl >> 4
+        if version != 4:
+            return None
+
+        ihl = (version_ihl & 0x0F) * 4
+        total_length = iph[2]
+        protocol = iph[6]
+
+        # Drop fragmented packets
+        flags_frag = iph[4]
+        fragment_offset = flags_frag & 0x1FFF
+        if fragment_offset != 0:
+            return None
+
+        if len(raw_packet) < ihl:
+            return None
+
+        src_ip = socket.inet_ntoa(iph[8])
+        dst_ip = socket.inet_ntoa(iph[9])
+
+        direction = self._resolve_direction(src_ip, dst_ip)
+        if direction is None:
+            return None
+
+        packet_size = min(total_length, len(raw_packet))
+
+        # ================= TCP =================
+        if protocol == L4Protocol.TCP.value:
+
+            tcp_start = ihl
+            if len(raw_packet) < tcp_start + TCP_MIN_HEADER_LEN:
+                return None
+
+            tcph = struct.unpack(
+                "!HHLLBBHHH",
+                raw_packet[tcp_start:tcp_start + TCP_MIN_HEADER_LEN]
+            )
+
+            src_port = tcph[0]
+            dst_port = tcph[1]
+
+            flow_dst_port = (
+                dst_port if direction == Direction.FORWARD else src_port
+            )
+
+            data_offset = (tcph[4] >> 4) * 4
+            flags = tcph[5]
+
+            if len(raw_packet) < tcp_start + data_offset:
+                return None
+
+            return PacketMeta(
+                timestamp=timestamp,
+                direction=direction,
+                src_ip=src_ip,
+                dst_ip=dst_ip,
+                src_port=src_port,
+                dst_port=flow_dst_port,
+                protocol=L4Protocol.TCP,
+                packet_size=packet_size,
+                syn=bool(flags & 0x02),
+                ack=bool(flags & 0x10),
+                rst=bool(flags & 0x04),
+                fin=bool(flags & 0x01),
+            )
+
+        # ================= UDP =================
+        if protocol == L4Protocol.UDP.value:
+
+            udp_start = ihl
+            if len(raw_packet) < udp_start + UDP_HEADER_LEN:
+                return None
+
+            udph = struct.unpack(
+                "!HHHH",
+                raw_packet[udp_start:udp_start + UDP_HEADER_LEN]
+            )
+
+            src_port = udph[0]
+            dst_port = udph[1]
+
+            flow_dst_port = (
+                dst_port if direction == Direction.FORWARD else src_port
+            )
+
+            return PacketMeta(
+                timestamp=timestamp,
+                direction=direction,
+                src_ip=src_ip,
+                dst_ip=dst_ip,
+                src_port=src_port,
+                dst_port=flow_dst_port,
+                protocol=L4Protocol.UDP,
+                packet_size=packet_size,
+                syn=None,
+                ack=None,
+                rst=None,
+                fin=None,
+            )
+
+        return None
+
+
+
+def random_packet(rng):
+    local = socket.inet_aton(LOCAL_IP)
+    remote = socket.inet_aton(f"10.0.{rng.randrange(4)}.{rng.randrange(1, 255)}")
+
+    # ~30% packet không liên quan tới local host (bị bỏ sớm)
+    roll = rng.random()
+    if roll < 0.3:
+        src, dst = remote, socket.inet_aton("10.9.9.9")
+    elif roll < 0.65:
+        src, dst = local, remote
+    else:
+        src, dst = remote, local
+
+    protocol = rng.choice([6, 6, 6, 17, 1])
+    frag = 0x2000 if rng.random() < 0.95 else 0x0010
+    if protocol == 6:
+        l4 = struct.pack(
+            "!HHLLBBHHH", rng.randrange(65536), rng.randrange(65536),
+            0, 0, rng.choice([5, 8]) << 4, rng.randrange(256), 1024, 0, 0,
+        )
+    elif protocol == 17:
+        l4 = struct.pack("!HHHH", rng.randrange(65536), rng.randrange(65536), 8, 0)
+    else:
+        l4 = b"\x08\x00" + b"\x00" * 6
+
+    payload = b"\x00" * rng.choice([0, 0, 100, 1400])
+    total = 20 + len(l4) + len(payload)
+    ip = struct.pack("!BBHHHBBH4s4s", 0x45, 0, total, 0, frag, 64, protocol, 0, src, dst)
+    packet = ip + l4 + payload
+
+    # vài packet bị cắt ngắn (snaplen), vài packet có Ethernet padding
+    roll = rng.random()
+    if roll < 0.02:
+        packet = packet[:rng.randrange(len(packet))]
+    elif roll < 0.04:
+        packet += b"\x00" * rng.randrange(1, 20)
+    return packet
+
+
+def check_parse(parser, legacy, packets):
+    """
+    Mọi field giống parser cũ trừ packet_size: parser cũ lấy
+    min(total_length, len(raw)), parser mới lấy total_length (kích thước
+    thật cả khi frame bị cắt ở snaplen; padding không tính).
+    """
+    truncated = padded = 0
+    for raw in packets:
+        expected = legacy.parse(raw, 0.0)
+        for buffer in (raw, memoryview(bytearray(raw))):
+            pkt = parser.parse(buffer, 0.0)
+            if expected is None or pkt is None:
+                if pkt != expected:
+                    raise AssertionError(f"parse mismatch on {raw.hex()}")
+                continue
+            if replace(pkt, packet_size=expected.packet_size) != expected:
+                raise AssertionError(f"parse mismatch on {raw.hex()}")
+
+            total_length = struct.unpack_from("!H", raw, 2)[0]
+            if pkt.packet_size != total_length:
+                raise AssertionError(f"packet_size {pkt.packet_size} != total_length {total_length}")
+        if expected is not None:
+            if len(raw) < total_length:
+                truncated += 1
+                if expected.packet_size != len(raw):
+                    raise AssertionError("legacy parser should report the captured length")
+            elif len(raw) > total_length:
+                padded += 1
+                if expected.packet_size != total_length:
+                    raise AssertionError("legacy parser should ignore padding")
+
+    if not truncated or not padded:
+        raise AssertionError(f"trace has {truncated} truncated / {padded} padded parsed packets")
+    print(f"OK: parse matches legacy except packet_size ({truncated} truncated, {padded} padded packets)")
+
+
+def check_batch(parser, packets, timestamps):
+    expected = [
+        (ts, pkt) for ts, raw in zip(timestamps, packets)
+        if (pkt := parser.parse(raw, ts)) is not None
+    ]
+    rows = parser.parse_batch(packets, timestamps)
+    if len(rows) != len(expected):
+        raise AssertionError(f"parse_batch: {len(rows)} rows, expected {len(expected)}")
+
+    for row, (ts, pkt) in zip(rows, expected):
+        flags = int(row["tcp_flags"])
+        actual = (
+            float(row["timestamp"]),
+            socket.inet_ntoa(struct.pack("!I", int(row["src_ip"]))),
+            socket.inet_ntoa(struct.pack("!I", int(row["dst_ip"]))),
+            int(row["src_port"]), int(row["dst_port"]), int(row["protocol"]),
+            int(row["direction"]), int(row["packet_size"]),
+        )
+        wanted = (
+            ts, pkt.src_ip, pkt.dst_ip, pkt.src_port, pkt.dst_port,
+            pkt.protocol.value, pkt.direction.value, pkt.packet_size,
+        )
+        if actual != wanted:
+            raise AssertionError(f"parse_batch row {actual} != {wanted}")
+        if pkt.syn is not None and (
+            pkt.syn != bool(flags & TCP_SYN) or pkt.ack != bool(flags & TCP_ACK)
+            or pkt.rst != bool(flags & TCP_RST) or pkt.fin != bool(flags & TCP_FIN)
+        ):
+            raise AssertionError(f"parse_batch flags {flags:#x} != {pkt}")
+
+
+def bench_batch(parser, packets, timestamps):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter_ns()
+        for i in range(0, len(packets), BATCH_SIZE):
+            parser.parse_batch(packets[i:i + BATCH_SIZE], timestamps[i:i + BATCH_SIZE])
+        best = min(best, time.perf_counter_ns() - start)
+    return best / len(packets)
+
+
+def bench(parse, packets):
+    best = float("inf")
+    for _ in range(REPEAT):
+        start = time.perf_counter_ns()
+        for raw in packets:
+            parse(raw, 0.0)
+        best = min(best, time.perf_counter_ns() - start)
+    return best / len(packets)
+
+
+if __name__ == '__main__':
+    rng = random.Random(0)
+    packets = [random_packet(rng) for _ in range(N_PACKETS)]
+    views = [memoryview(bytearray(p)) for p in packets]
+
+    legacy = LegacyPacketParser({LOCAL_IP})
+    parser = PacketParserService({LOCAL_IP})
+
+    check_parse(parser, legacy, packets)
+
+    timestamps = [1700000000.0 + i * 1e-4 for i in range(len(packets))]
+    check_batch(parser, packets, timestamps)
+    check_batch(parser, views, timestamps)
+
+    legacy_ns = bench(legacy.parse, packets)
+    bytes_ns = bench(parser.parse, packets)
+    view_ns = bench(parser.parse, views)
+
+    print(f"legacy parse (bytes)      : {legacy_ns:8.0f} ns/packet")
+    print(f"unpack_from  (bytes)      : {bytes_ns:8.0f} ns/packet  ({legacy_ns / bytes_ns:.2f}x)")
+    print(f"unpack_from  (memoryview) : {view_ns:8.0f} ns/packet  ({legacy_ns / view_ns:.2f}x)")
+
+    batch_ns = bench_batch(parser, packets, timestamps)
+    print(f"parse_batch  ({BATCH_SIZE:>3} packets) : {batch_ns:8.0f} ns/packet  ({legacy_ns / batch_ns:.2f}x)")
@@ -0,0 +1,167 @@
+import os
+import tempfile
+import time
+import warnings
+
+import joblib
+import numpy as np
+
+from NetworkReader.Data.Enums.Direction import Direction
+from NetworkReader.Data.Enums.L4Protocol import L4Protocol
+from NetworkReader.Data.ValueObjects.FlowBased.FlowFeatureVector import FlowFeatureVector
+from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey
+from NetworkReader.Data.ValueObjects.HostBased.HostFeatureVector import HostFeatureVector
+
+from RandomJungle.Data.Labels import BinaryLabel
+from RandomJungle.InferenceScheduler import InferenceScheduler
+from RandomJungle.Models.CascadePrefilter import CascadePrefilter
+from RandomJungle.Models.RfFlowBin import RfFlowBin
+from RandomJungle.Models.RfFlowMulti import RfFlowMulti
+from RandomJungle.Models.RfHostBin import RfHostBin
+from RandomJungle.Models.RfHostMulti import RfHostMulti
+from RandomJungle.Preprocessor import Preprocessor
+
+BATCH_SIZE = 64
+N_TRAIN = 6000
+N_TEST = 4096
+# ~190 attack trong phần calibration: đủ cho cận trên ~3 attack của lá clear
+# đầu tiên (target mặc định 0.001 cần ~3000 attack calibration)
+TARGET_FNR = 0.02
+
+
+def lerp(lo, hi, z):
+    return lo + (hi - lo) * z
+
+
+def synthetic_rows(rng, n):
+    """
+    85% benign rõ ràng (rate thấp, không lệch SYN/RST), 10% vùng biên
+    (label theo cường độ + nhiễu), 5% attack rõ ràng.
+    """
+    kind = rng.random(n)
+    z = np.where(kind < 0.85, rng.uniform(0.0, 0.3, n), np.where(kind < 0.95, rng.uniform(0.3, 0.7, n), rng.uniform(0.7, 1.0, n)))
+    y = (z + 0.05 * rng.standard_normal(n) > 0.5).astype(int)
+
+    rows = []
+    for i in range(n):
+        f = np.clip(z[i] + 0.05 * rng.standard_normal(12), 0.0, 1.0)
+        src_ip = f"10.0.{i // 250}.{i % 250 + 1}"
+        key = FlowKey(src_ip, "10.1.0.1", 80, L4Protocol.TCP, Direction.FORWARD)
+        host = HostFeatureVector(
+            timestamp=float(i), window_size=10.0, src_ip=src_ip,
+            packet_count=int(lerp(5, 5000, f[0])), packets_per_second=lerp(0.5, 500, f[0]),
+            unique_dst_ips=2, unique_dst_ports=int(lerp(1, 500, f[1])), port_entropy=lerp(0.0, 8.0, f[2]),
+            connection_attempts=3, connections_per_second=lerp(0.1, 500, f[3]),
+            failed_connection_ratio=f[4], syn_ratio=f[5], rst_ratio=f[6],
+            mean_flow_duration=lerp(10.0, 0.01, f[7]),
+        )
+        flow = FlowFeatureVector(
+            timestamp=float(i), window_size=10.0, flow_key=key,
+            packet_count=int(lerp(2, 5000, f[8])), byte_count=int(lerp(100, 300000, f[8])),
+            packets_per_second=lerp(0.2, 500, f[8]), bytes_per_second=lerp(10, 30000, f[9]),
+            flow_duration=lerp(10.0, 0.5, f[10]),
+            inter_arrival_mean=0.1, inter_arrival_variance=0.01,
+            forward_ratio=lerp(0.5, 1.0, f[11]), protocol=6, syn_ratio=f[5], rst_ratio=f[6],
+        )
+        rows.append((host, flow))
+    return rows, y
+
+
+def train_models(rows, y):
+    host_x, flow_x, host_multi_x, flow_multi_x = Preprocessor().transform_rows(rows)
+    attack = y == 1
+
+    models = {}
+    for name, model, X, labels in (
+        ("host_bin", RfHostBin(), host_x, y),
+        ("flow_bin", RfFlowBin(), flow_x, y),
+        # multi chỉ cần chạy được; label giả theo cường độ
+        ("host_multi", RfHostMulti(), host_multi_x[attack], (host_multi_x[attack, 0] > 250).astype(int) * 2),
+        ("flow_multi", RfFlowMulti(), flow_multi_x[attack], (flow_multi_x[attack, 0] > 250).astype(int)),
+    ):
+        model.fit(X, labels)
+        model.set_backend("flat")
+        models[name] = model
+
+    host_prefilter = CascadePrefilter(target_fnr=TARGET_FNR)
+    flow_prefilter = CascadePrefilter(target_fnr=TARGET_FNR)
+    host_prefilter.fit(host_x, y)
+    flow_prefilter.fit(flow_x, y)
+    return models, host_prefilter, flow_prefilter
+
+
+def make_scheduler(models, host_prefilter=None, flow_prefilter=None):
+    return InferenceScheduler(
+        models["host_bin"], models["flow_bin"], models["host_multi"], models["flow_multi"],
+        Preprocessor(),
+        max_batch_size=BATCH_SIZE,
+        host_prefilter=host_prefilter,
+        flow_prefilter=flow_prefilter,
+    )
+
+
+def run(scheduler, rows, repeat=3):
+    """(outputs, µs mỗi row end-to-end qua scheduler.predict); best-of-repeat."""
+    best = float("inf")
+    for _ in range(repeat):
+        outputs = []
+        t0 = time.perf_counter()
+        for i in range(0, len(rows), BATCH_SIZE):
+            outputs += scheduler.predict(rows[i:i + BATCH_SIZE])
+        best = min(best, time.perf_counter() - t0)
+    return outputs, best / len(rows) * 1e6
+
+
+def attack_mask(outputs, side):
+    return np.array([getattr(o, side).label == BinaryLabel.Attack for o in outputs])
+
+
+def check_fit_and_load(X, y):
+    # quá ít attack calibration cho target mặc định → không lá nào clear, có cảnh báo
+    prefilter = CascadePrefilter()
+    with warnings.catch_warnings(record=True) as caught:
+        warnings.simplefilter("always")
+        prefilter.fit(X, y)
+    if prefilter.partition(X)[0].any() or not any("cleared no leaf" in str(w.message) for w in caught):
+        raise AssertionError("prefilter without enough attacks should warn and pass everything through")
+
+    # artifact cũ không có "confidence" → mặc định 0.95
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "prefilter.pkl")
+        prefilter.save(path)
+        state = joblib.load(path)
+        del state["confidence"]
+        joblib.dump(state, path)
+        loaded = CascadePrefilter(confidence=0.5)
+        loaded.load(path)
+    if loaded.confidence != 0.95:
+        raise AssertionError(f"old artifact loaded with confidence {loaded.confidence}")
+    print("OK: no clear leaf -> RuntimeWarning, artifact without confidence loads with 0.95")
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    train_rows, train_y = synthetic_rows(rng, N_TRAIN)
+    test_rows, test_y = synthetic_rows(rng, N_TEST)
+
+    models, host_prefilter, flow_prefilter = train_models(train_rows, train_y)
+    check_fit_and_load(Preprocessor().transform_rows(train_rows)[1], train_y)
+
+    full_outputs, full_us = run(make_scheduler(models), test_rows)
+    cascade_outputs, cascade_us = run(make_scheduler(models, host_prefilter, flow_prefilter), test_rows)
+
+    print(f"{N_TEST} rows, batch {BATCH_SIZE}, attacks {test_y.mean():.1%}, target added FNR {TARGET_FNR}")
+    for side, prefilter in (("host_bin_output", host_prefilter), ("flow_bin_output", flow_prefilter)):
+        full, cascade = attack_mask(full_outputs, side), attack_mask(cascade_outputs, side)
+        truth = test_y == 1
+        full_fnr = (~full & truth).sum() / truth.sum()
+        cascade_fnr = (~cascade & truth).sum() / truth.sum()
+        print(
+            f"  {side.split('_')[0]:>4}: pass-through {prefilter.pass_through_rate:6.1%}, "
+            f"label agreement {(full == cascade).mean():.4f}, "
+            f"FNR forest {full_fnr:.4f} -> cascade {cascade_fnr:.4f}"
+        )
+        if cascade_fnr - full_fnr > TARGET_FNR:
+            raise AssertionError(f"{side}: added FNR {cascade_fnr - full_fnr:.4f} exceeds target {TARGET_FNR}")
+
+    print(f"  end-to-end: full {full_us:7.1f} us/row | cascade {cascade_us:7.1f} us/row ({1 - cascade_us / full_us:+.0%} saved)")
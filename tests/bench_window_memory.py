@@ -0,0 +1,151 @@
+import random
+import time
+import tracemalloc
+from collections import deque
+
+from NetworkReader.Data.Enums.Direction import Direction
+from NetworkReader.Data.Enums.L4Protocol import L4Protocol
+from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
+from NetworkReader.Data.ValueObjects.WindowBuffer import (
+    FlowWindowBuffer,
+    HostWindowBuffer,
+    window_flags,
+)
+
+N_FLOWS = 200
+PACKETS_PER_FLOW = 500
+
+
+def random_packets(rng: random.Random, n: int):
+    ts = 1_700_000_000.0
+    packets = []
+    for _ in range(n):
+        ts += rng.expovariate(1000.0)
+        packets.append(PacketMeta(
+            timestamp=ts,
+            direction=rng.choice([Direction.FORWARD, Direction.BACKWARD]),
+            src_ip=rng.getrandbits(32),
+            src_port=rng.randint(1, 65535),
+            dst_ip=rng.getrandbits(32),
+            dst_port=rng.randint(1, 65535),
+            protocol=L4Protocol.TCP,
+            packet_size=rng.randint(40, 1500),
+            syn=rng.random() < 0.5,
+            ack=rng.random() < 0.5,
+            rst=False,
+            fin=False,
+        ))
+    return packets
+
+
+def measure(fill) -> float:
+    """Byte / packet giữ lại trong window (packet gốc được tạo bên trong fill)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = fill()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return (after - before) / (N_FLOWS * PACKETS_PER_FLOW)
+
+
+def fill_deque():
+    rng = random.Random(0)
+    buffers = []
+    for _ in range(N_FLOWS):
+        buffer = deque()
+        buffer.extend(random_packets(rng, PACKETS_PER_FLOW))
+        buffers.append(buffer)
+    return buffers
+
+
+def fill_compact(cls, host: bool, compact: bool = True):
+    def fill():
+        rng = random.Random(0)
+        buffers = []
+        for _ in range(N_FLOWS):
+            buffer = cls(compact=compact)
+            for pkt in random_packets(rng, PACKETS_PER_FLOW):
+                if host:
+                    buffer.append(pkt.timestamp, pkt.packet_size, window_flags(pkt), pkt.dst_ip, pkt.dst_port)
+                else:
+                    buffer.append(pkt.timestamp, pkt.packet_size, window_flags(pkt))
+            buffers.append(buffer)
+        return buffers
+    return fill
+
+
+def bench_evict(n: int = 200_000):
+    """
+    ns mỗi packet của vòng trượt window (append + bỏ packet hết hạn), như
+    hot path: deque[PacketMeta] + popleft, ring + popleft từng packet,
+    ring + append(..., window_start) evict trong cùng lần gọi (trả về số
+    packet đã evict), với cột array (compact) và cột list.
+    """
+    rng = random.Random(0)
+    packets = random_packets(rng, n)
+    timestamps = [pkt.timestamp for pkt in packets]
+    window = 0.01
+
+    def run_deque():
+        buffer = deque()
+        start = time.perf_counter()
+        for pkt in packets:
+            buffer.append(pkt)
+            window_start = pkt.timestamp - window
+            while buffer[0].timestamp < window_start:
+                buffer.popleft()
+        return time.perf_counter() - start
+
+    def run_popleft():
+        buffer = FlowWindowBuffer()
+        start = time.perf_counter()
+        for ts in timestamps:
+            buffer.append(ts, 60, 0x12)
+            window_start = ts - window
+            while buffer.first_ts < window_start:
+                buffer.popleft()
+        return time.perf_counter() - start
+
+    def run_fused(compact: bool):
+        buffer = FlowWindowBuffer(compact=compact)
+        start = time.perf_counter()
+        for ts in timestamps:
+            buffer.append(ts, 600, 0x12, ts - window)
+        return time.perf_counter() - start
+
+    return {
+        name: min(fn() for _ in range(5)) / n * 1e9
+        for name, fn in (
+            ("deque", run_deque),
+            ("popleft", run_popleft),
+            ("fused", lambda: run_fused(True)),
+            ("fused_list", lambda: run_fused(False)),
+        )
+    }
+
+
+if __name__ == '__main__':
+    deque_bytes = measure(fill_deque)
+    flow_bytes = measure(fill_compact(FlowWindowBuffer, host=False))
+    host_bytes = measure(fill_compact(HostWindowBuffer, host=True))
+    flow_list_bytes = measure(fill_compact(FlowWindowBuffer, host=False, compact=False))
+    host_list_bytes = measure(fill_compact(HostWindowBuffer, host=True, compact=False))
+
+    print(f"deque[PacketMeta] : {deque_bytes:7.1f} bytes/packet")
+    print(f"FlowWindowBuffer  : {flow_bytes:7.1f} bytes/packet  ({deque_bytes / flow_bytes:.1f}x smaller)")
+    print(f"HostWindowBuffer  : {host_bytes:7.1f} bytes/packet  ({deque_bytes / host_bytes:.1f}x smaller)")
+    print(f"FlowWindowBuffer(compact=False) : {flow_list_bytes:7.1f} bytes/packet")
+    print(f"HostWindowBuffer(compact=False) : {host_list_bytes:7.1f} bytes/packet")
+
+    # append + evict mỗi packet (một packet hết hạn mỗi packet mới ở trạng thái ổn định)
+    times = bench_evict()
+    # máy bận thì số dao động ±30%: so tỉ lệ giữa các dòng, không so số tuyệt đối
+    base = times["deque"]
+    print(f"deque[PacketMeta] append+popleft          : {base:7.0f} ns/packet")
+    for label, key in (
+        ("ring append+popleft", "popleft"),
+        ("ring append(window_start)", "fused"),
+        ("ring append(window_start), compact=False", "fused_list"),
+    ):
+        print(f"{label:42s}: {times[key]:7.0f} ns/packet  ({times[key] / base:.1f}x deque)")
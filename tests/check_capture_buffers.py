@@ -0,0 +1,129 @@
+import time
+from collections import deque
+
+from check_pcap_replay import LOCAL_IP, REMOTE_IP, ipv4_tcp
+
+from NetworkReader.Data.ValueObjects.PacketBatch import PacketBatch
+from NetworkReader.NetworkReaderPipeLine import NetworkReader
+from NetworkReader.Services.Capture.CaptureBackend import CaptureBackend
+from NetworkReader.Services.PacketCaptureService import PacketCaptureService
+from NetworkReader.Services.PacketParserService import PacketParserService
+from NetworkReader.Services.ProcessCaptureService import ProcessCaptureService
+
+N_PACKETS = 3000
+
+
+class PooledBackend(CaptureBackend):
+    """
+    Giống AfPacketBackend: packet nằm trong slot của một pool nhỏ, slot
+    được ghi đè ngay khi consumer release → ai còn giữ memoryview của
+    batch cũ sẽ thấy bytes của packet mới.
+    """
+
+    lossless = True
+
+    def __init__(self, frames, pool_size: int = 8, slot_size: int = 64):
+        self.frames = frames
+        self.pool_size = pool_size
+        self.slot_size = slot_size
+        self._slots = None
+        self._free = None
+        self._closed = False
+
+    def open(self) -> None:
+        arena = memoryview(bytearray(self.pool_size * self.slot_size))
+        size = self.slot_size
+        self._slots = [arena[i * size:(i + 1) * size] for i in range(self.pool_size)]
+        self._free = deque(range(self.pool_size))
+        self._closed = False
+
+    def close(self) -> None:
+        self._closed = True
+
+    def packets(self):
+        for batch in self.batches(1):
+            yield from batch.packets
+            self.release(batch)
+
+    def batches(self, max_packets: int):
+        i = 0
+        while i < len(self.frames) and not self._closed:
+            if not self._free:
+                time.sleep(0.0001)
+                continue
+            packets, slot_ids = [], []
+            while self._free and len(packets) < max_packets and i < len(self.frames):
+                slot_id = self._free.popleft()
+                frame = self.frames[i]
+                self._slots[slot_id][:len(frame)] = frame
+                packets.append((self._slots[slot_id][:len(frame)], float(i)))
+                slot_ids.append(slot_id)
+                i += 1
+            yield PacketBatch(packets, slot_ids)
+
+    def release(self, batch: PacketBatch) -> None:
+        if batch.slot_ids:
+            self._free.extend(batch.slot_ids)
+            batch.slot_ids = None
+
+
+class RecordingParser(PacketParserService):
+    """Ghi lại bytes đúng lúc parser đọc buffer."""
+
+    def __init__(self):
+        super().__init__({LOCAL_IP})
+        self.seen = []
+
+    def parse(self, raw_bytes, ts):
+        self.seen.append(bytes(raw_bytes))
+        return None
+
+
+def check(capture_cls, **capture_args):
+    # mỗi packet khác nhau (source port) để nhận ra buffer bị ghi đè
+    frames = [ipv4_tcp(LOCAL_IP, REMOTE_IP, 1024 + i, 80, 0x02) for i in range(N_PACKETS)]
+    capture = capture_cls(backend=PooledBackend(frames), batch_size=2, **capture_args)
+    parser = RecordingParser()
+    reader = NetworkReader(capture, parser, None, None, None, None, None, None)
+
+    if capture.exhausted:
+        raise AssertionError(f"{capture_cls.__name__}: exhausted before start()")
+    capture.start()
+    deadline = time.monotonic() + 30.0
+    while not capture.exhausted and time.monotonic() < deadline:
+        # max_latency dài: read_many gom nhiều lần next_packets() trong một lần gọi
+        reader.read_many(max_packets=64, max_latency=0.02, timeout=0.1)
+    capture.stop()
+
+    if len(parser.seen) != len(frames):
+        raise AssertionError(f"{capture_cls.__name__}: parsed {len(parser.seen)} of {len(frames)} packets")
+    overwritten = sum(seen != frame for seen, frame in zip(parser.seen, frames))
+    if overwritten:
+        raise AssertionError(f"{capture_cls.__name__}: {overwritten} buffers overwritten before parsing")
+    print(f"OK: {capture_cls.__name__} -> {len(frames)} packets parsed from intact buffers")
+
+
+def check_release_contract():
+    # batch giữ qua lần next_packets() kế tiếp: bytes chỉ được bảo đảm
+    # tới lúc gọi lại (slot về pool) → consumer phải parse xong trước
+    frames = [ipv4_tcp(LOCAL_IP, REMOTE_IP, 1024 + i, 80, 0x02) for i in range(64)]
+    backend = PooledBackend(frames, pool_size=4)
+    capture = PacketCaptureService(backend=backend, batch_size=2, queue_size=64)
+    capture.start()
+
+    first = capture.next_packets(2, timeout=1.0)
+    held = [bytes(raw) for raw, _ in first]
+    time.sleep(0.05)
+    if held != frames[:2] or [bytes(raw) for raw, _ in first] != held:
+        raise AssertionError("batch changed before the next next_packets() call")
+
+    capture.next_packets(2, timeout=1.0)
+    capture.stop()
+    print("OK: batch bytes stay intact until the next next_packets() call")
+
+
+if __name__ == '__main__':
+    check_release_contract()
+    check(PacketCaptureService, queue_size=64)
+    check(ProcessCaptureService, queue_size=8)
+    print('Capture buffers OK')
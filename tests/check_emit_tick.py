@@ -0,0 +1,55 @@
+import random
+
+from check_host_window_parity import random_trace, same_snapshot
+
+from NetworkReader.Services.PacketStateEngine import PacketStateEngine
+
+WINDOW_SIZE = 10.0
+TIMEOUT = 30.0
+EMIT_INTERVAL = 0.5
+
+
+def check(seed: int, n_packets: int = 5000, n_hosts: int = 5):
+    rng = random.Random(seed)
+    per_packet = PacketStateEngine(WINDOW_SIZE, TIMEOUT, TIMEOUT)
+    ticked = PacketStateEngine(WINDOW_SIZE, TIMEOUT, TIMEOUT, emit_interval=EMIT_INTERVAL)
+
+    # snapshot per-packet cuối cùng của mỗi flow trong tick hiện tại / của mỗi host
+    pending_flows = {}
+    last_host = {}
+    ticks = emitted = 0
+
+    def compare(batch, where):
+        if len(batch) != len(pending_flows):
+            raise AssertionError(f"{where}: {len(batch)} snapshots != {len(pending_flows)} dirty flows")
+        for flow_snap, host_snap in batch:
+            expected = pending_flows.pop(flow_snap.flow_key)
+            if not same_snapshot(expected, flow_snap):
+                raise AssertionError(f"{where}: flow {expected} != {flow_snap}")
+            if not same_snapshot(last_host[host_snap.src_ip], host_snap):
+                raise AssertionError(f"{where}: host {last_host[host_snap.src_ip]} != {host_snap}")
+
+    for i, pkt in enumerate(random_trace(rng, n_packets, n_hosts)):
+        if ticked.emit_due(pkt.timestamp):
+            batch = ticked.emit_dirty(pkt.timestamp)
+            compare(batch, f"seed={seed} packet={i}")
+            ticks += 1
+            emitted += len(batch)
+
+        ticked.update(pkt)
+        flow_snap, host_snap = per_packet.process_packet(pkt)
+        pending_flows[flow_snap.flow_key] = flow_snap
+        last_host[host_snap.src_ip] = host_snap
+
+    batch = ticked.emit_dirty(pkt.timestamp)
+    compare(batch, f"seed={seed} final")
+    emitted += len(batch)
+
+    print(f"OK: seed={seed} -> {n_packets} packets, {ticks} ticks, {emitted} snapshots")
+
+
+if __name__ == '__main__':
+    for seed in range(5):
+        check(seed)
+
+    print('Tick emission matches last per-packet snapshot of every dirty flow')
@@ -0,0 +1,116 @@
+import random
+import time
+from dataclasses import asdict
+
+import numpy as np
+
+from NetworkReader.Data.Enums.Direction import Direction
+from NetworkReader.Data.Enums.L4Protocol import L4Protocol
+from NetworkReader.Data.ValueObjects.FlowBased.FlowFeatureVector import FlowFeatureVector
+from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey
+from NetworkReader.Data.ValueObjects.HostBased.HostFeatureVector import HostFeatureVector
+from RandomJungle.Data.FeatureSets import FlowBinaryFeatures, FlowMultiFeatures
+from RandomJungle.Models.RfFlowBin import RfFlowBin
+from RandomJungle.Preprocessor import Preprocessor
+
+SPECIAL = [float("nan"), float("inf"), float("-inf"), -1.0, 0.0, -0.0, 2e9, 1e-9, 15.5]
+
+
+def random_rows(rng, n):
+    key = FlowKey("10.0.0.1", "10.0.1.1", 80, L4Protocol.TCP, Direction.FORWARD)
+
+    def value():
+        return rng.choice(SPECIAL) if rng.random() < 0.2 else rng.uniform(0.0, 2000.0)
+
+    def ratio():
+        return rng.choice(SPECIAL) if rng.random() < 0.2 else rng.random()
+
+    rows = []
+    for i in range(n):
+        host = HostFeatureVector(
+            timestamp=float(i), window_size=10.0, src_ip="10.0.0.1",
+            packet_count=rng.randint(1, 500), packets_per_second=value(),
+            unique_dst_ips=rng.randint(0, 50), unique_dst_ports=rng.choice([0, 3, 1000, value()]),
+            port_entropy=value() / 100, connection_attempts=rng.randint(0, 50),
+            connections_per_second=value(), failed_connection_ratio=ratio(),
+            syn_ratio=ratio(), rst_ratio=ratio(), mean_flow_duration=value(),
+        )
+        flow = FlowFeatureVector(
+            timestamp=float(i), window_size=10.0, flow_key=key,
+            packet_count=rng.choice([1, 7, 40_000_000, value()]), byte_count=rng.randint(40, 10**6),
+            packets_per_second=value(), bytes_per_second=value() * 1000,
+            flow_duration=value(), inter_arrival_mean=0.1, inter_arrival_variance=0.0,
+            forward_ratio=ratio(), protocol=rng.choice([6, 17]),
+            syn_ratio=ratio(), rst_ratio=ratio(),
+        )
+        rows.append((host, flow))
+    return rows
+
+
+def asdict_rows(preprocessor, rows):
+    # path cũ: transform() → asdict → np.array (float64), model cast sang float32
+    matrices = [[], [], [], []]
+    for host, flow in rows:
+        for out, features in zip(matrices, preprocessor.transform(host, flow)):
+            out.append(list(asdict(features).values()))
+    return [np.array(m).astype(np.float32) for m in matrices]
+
+
+def check_parity(rows):
+    preprocessor = Preprocessor()
+    expected = asdict_rows(preprocessor, rows)
+    # hai batch khác cỡ: buffer được dùng lại / nới rộng
+    for batch in (rows[:7], rows, rows[:3]):
+        actual = preprocessor.transform_rows(batch)
+        for name, e, a in zip(("host_bin", "flow_bin", "host_multi", "flow_multi"), expected, actual):
+            if a.dtype != np.float32 or not np.array_equal(e[:len(batch)], a):
+                raise AssertionError(f"{name}: transform_rows differs from asdict path")
+    print(f"OK: {len(rows)} rows (NaN / inf / negative / huge values) bit-identical to asdict path")
+
+
+def check_model_columns():
+    rng = np.random.default_rng(0)
+    model = RfFlowBin()
+    model.model.set_params(n_estimators=5, n_jobs=1)
+    model.fit(rng.random((50, 6)), rng.integers(0, 2, 50))
+
+    Preprocessor.check_model(model, FlowBinaryFeatures)
+    try:
+        Preprocessor.check_model(model, FlowMultiFeatures)
+    except ValueError as e:
+        print(f"OK: rejected FlowMultiFeatures: {e}")
+    else:
+        raise AssertionError("FlowMultiFeatures should not match a 6-feature model")
+
+    # compact artifact lưu tên cột → thứ tự sai cũng bị bắt
+    model.set_backend("flat")
+    model._flat.feature_names = list(reversed(FlowBinaryFeatures.FEATURE_NAMES))
+    try:
+        Preprocessor.check_model(model, FlowBinaryFeatures)
+    except ValueError:
+        print("OK: rejected model trained with a different column order")
+    else:
+        raise AssertionError("column order mismatch not detected")
+
+
+def bench(rows, repeat: int = 5):
+    preprocessor = Preprocessor()
+    for name, fn in (
+        ("asdict", lambda: asdict_rows(preprocessor, rows)),
+        ("transform_rows", lambda: preprocessor.transform_rows(rows)),
+    ):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        print(f"  {name}: {best / len(rows) * 1e6:.2f} us/row")
+
+
+if __name__ == '__main__':
+    rows = random_rows(random.Random(0), 2000)
+    check_parity(rows)
+    check_model_columns()
+    bench(rows)
+
+    print('Feature rows match FEATURE_NAMES order and the scalar path')
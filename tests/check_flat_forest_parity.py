@@ -0,0 +1,95 @@
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+
+from RandomJungle.Models.FlatForest import FlatForest
+from RandomJungle.Models.RfFlowMulti import RfFlowMulti
+
+ATOL = 1e-9
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+MODEL_FILES = {
+    'hostBin': PROJECT_ROOT / 'Train' / 'hostBin.pkl',
+    'flowBin': PROJECT_ROOT / 'Train' / 'flowBin.pkl',
+    'hostMulti': PROJECT_ROOT / 'Train' / 'hostMulti.pkl',
+    'flowMulti': PROJECT_ROOT / 'Train' / 'flowMulti.pkl',
+}
+
+
+def check(name, model, X):
+    flat = FlatForest.from_sklearn(model)
+
+    expected = model.predict_proba(X)
+    actual = flat.predict_proba(X)
+    if not np.allclose(expected, actual, rtol=0.0, atol=ATOL):
+        diff = np.abs(expected - actual).max()
+        raise AssertionError(f"{name}: max |sklearn - flat| = {diff}")
+    if not np.array_equal(model.predict(X), flat.predict(X)):
+        raise AssertionError(f"{name}: predicted labels differ")
+
+    row = X[:1]
+    t0 = time.perf_counter()
+    for _ in range(20):
+        model.predict_proba(row)
+    t_sklearn = (time.perf_counter() - t0) / 20
+    t0 = time.perf_counter()
+    for _ in range(20):
+        flat.predict_proba(row)
+    t_flat = (time.perf_counter() - t0) / 20
+
+    print(f"OK: {name} -> {len(X)} rows, single-row sklearn={t_sklearn * 1e3:.2f} ms flat={t_flat * 1e3:.2f} ms")
+
+
+def check_compact_model(X):
+    # model load_compact chỉ có FlatForest: sklearn backend / pickle phải báo lỗi rõ
+    model = RfFlowMulti()
+    model.fit(X[:500], (X[:500, 0] > 5000).astype(int))
+    with tempfile.TemporaryDirectory() as tmp:
+        model.save_compact(tmp + "/model.forest")
+        compact = RfFlowMulti()
+        compact.load_compact(tmp + "/model.forest")
+
+        for call in (lambda: compact.set_backend("sklearn"), lambda: compact.save(tmp + "/model.pkl")):
+            try:
+                call()
+            except RuntimeError:
+                pass
+            else:
+                raise AssertionError("compact model accepted an operation that needs sklearn estimators")
+        if compact.backend != "flat" or os.path.exists(tmp + "/model.pkl"):
+            raise AssertionError("failed call left the compact model modified")
+        if not np.array_equal(compact.predict(X[500:]), model.predict(X[500:])):
+            raise AssertionError("compact model predicts differently")
+    print("OK: compact model rejects sklearn backend / pickle save and keeps 'flat'")
+
+
+def synthetic():
+    rng = np.random.default_rng(0)
+    X = rng.random((2000, 7)) * np.array([1e4, 20, 1e3, 10, 1, 1, 17])
+    y = (X[:, 0] * X[:, 4] > 2000).astype(int) + (X[:, 5] > 0.7)
+    model = RandomForestClassifier(n_estimators=100, max_depth=12, random_state=0)
+    model.fit(X[:1000], y[:1000])
+    return model, X[1000:]
+
+
+if __name__ == '__main__':
+    model, X = synthetic()
+    check('synthetic', model, X)
+    check_compact_model(X)
+
+    rng = np.random.default_rng(1)
+    for name, path in MODEL_FILES.items():
+        if not os.path.exists(path):
+            print('  MISSING:', path)
+            continue
+        m = joblib.load(path)
+        X = rng.random((500, m.n_features_in_)) * rng.choice([1.0, 10.0, 1e4], size=m.n_features_in_)
+        check(name, m, X)
+
+    print('FlatForest matches sklearn predict_proba')
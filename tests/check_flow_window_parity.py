@@ -0,0 +1,127 @@
+import math
+import random
+from dataclasses import fields, replace
+
+from NetworkReader.Data.Enums.Direction import Direction
+from NetworkReader.Data.Enums.L4Protocol import L4Protocol
+from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
+from NetworkReader.Data.ValueObjects.WindowBuffer import FlowWindowBuffer, HostWindowBuffer
+from NetworkReader.Services.FlowBased.FlowSlidingWindowService import FlowSlidingWindowService
+from NetworkReader.Services.FlowBased.FlowTableService import FlowTableService
+
+REL_TOL = 1e-6
+ABS_TOL = 1e-9
+
+
+def random_trace(rng: random.Random, n_packets: int, n_flows: int):
+    flows = [
+        (
+            f"10.0.0.{rng.randint(1, 254)}",
+            f"192.168.1.{rng.randint(1, 254)}",
+            rng.choice([22, 53, 80, 443, rng.randint(1024, 65535)]),
+            rng.choice([L4Protocol.TCP, L4Protocol.UDP]),
+            rng.choice([Direction.FORWARD, Direction.BACKWARD]),
+        )
+        for _ in range(n_flows)
+    ]
+
+    ts = 1_700_000_000.0
+    for _ in range(n_packets):
+        # mix of bursts (flood) and idle gaps longer than the window
+        gap = rng.choice([
+            rng.expovariate(2000.0),
+            rng.expovariate(20.0),
+            rng.uniform(0.0, 15.0) if rng.random() < 0.01 else 0.0,
+        ])
+        ts += gap
+        src, dst, port, proto, direction = rng.choice(flows)
+        tcp = proto == L4Protocol.TCP
+        yield PacketMeta(
+            timestamp=ts,
+            direction=direction,
+            src_ip=src,
+            src_port=rng.randint(1024, 65535),
+            dst_ip=dst,
+            dst_port=port,
+            protocol=proto,
+            packet_size=rng.randint(40, 1500),
+            syn=rng.random() < 0.5 if tcp else None,
+            ack=rng.random() < 0.5 if tcp else None,
+            rst=rng.random() < 0.1 if tcp else None,
+            fin=rng.random() < 0.1 if tcp else None,
+        )
+
+
+def same_snapshot(a, b) -> bool:
+    for f in fields(a):
+        x = getattr(a, f.name)
+        y = getattr(b, f.name)
+        if isinstance(x, float):
+            if not math.isclose(x, y, rel_tol=REL_TOL, abs_tol=ABS_TOL):
+                return False
+        elif x != y:
+            return False
+    return True
+
+
+def check(seed: int, n_packets: int = 5000, n_flows: int = 5, window_size: float = 10.0):
+    rng = random.Random(seed)
+    rebuild = FlowSlidingWindowService(window_size=window_size)
+    incremental = FlowSlidingWindowService(window_size=window_size, incremental=True)
+
+    for i, pkt in enumerate(random_trace(rng, n_packets, n_flows)):
+        a = rebuild.process_packet(pkt)[-1]
+        b = incremental.process_packet(pkt)[-1]
+        if not same_snapshot(a, b):
+            raise AssertionError(f"seed={seed} packet={i}: rebuild={a} incremental={b}")
+
+    print(f"OK: seed={seed} -> {n_packets} packets, {n_flows} flows")
+
+
+def check_packed_keys_need_int_ips():
+    # parser mặc định (int_ips=False) cho IP string → lỗi rõ ràng, không phải TypeError của <<
+    pkt = next(random_trace(random.Random(0), 1, 1))
+    for service, process in (
+        (FlowSlidingWindowService(10.0, incremental=True, packed_keys=True), "process_packet"),
+        (FlowTableService(60.0, packed_keys=True), "on_packet"),
+    ):
+        try:
+            getattr(service, process)(pkt)
+        except ValueError as e:
+            if "int_ips=True" not in str(e):
+                raise AssertionError(f"{type(service).__name__}: unclear error {e!r}")
+        else:
+            raise AssertionError(f"{type(service).__name__}: packed_keys accepted string IPs")
+    print("OK: packed_keys with string IPs -> ValueError pointing at int_ips=True")
+
+
+def check_jumbo_sizes():
+    # MSG_TRUNC: packet_size là độ dài frame thật, có thể vượt 65535 (GRO / jumbo)
+    for compact in (True, False):
+        for buffer in (FlowWindowBuffer(compact=compact), HostWindowBuffer(compact=compact)):
+            buffer.append(0.0, 70000, 0)
+            for ts in range(1, 10):
+                buffer.append(float(ts), 70000 + ts, 0)
+            sizes = [buffer.popleft()[1] for _ in range(len(buffer))]
+            if sizes != [70000 + ts for ts in range(10)]:
+                raise AssertionError(f"{type(buffer).__name__}(compact={compact}): sizes {sizes}")
+
+    rng = random.Random(0)
+    rebuild = FlowSlidingWindowService(window_size=10.0)
+    incremental = FlowSlidingWindowService(window_size=10.0, incremental=True)
+    for i, pkt in enumerate(random_trace(rng, 500, 3)):
+        pkt = replace(pkt, packet_size=rng.choice([pkt.packet_size, 65535, 70000, 200_000]))
+        a = rebuild.process_packet(pkt)[-1]
+        b = incremental.process_packet(pkt)[-1]
+        if not same_snapshot(a, b):
+            raise AssertionError(f"jumbo packet={i}: rebuild={a} incremental={b}")
+    print("OK: packet_size > 65535 kept exactly in window buffers")
+
+
+if __name__ == '__main__':
+    for seed in range(10):
+        check(seed)
+    check_packed_keys_need_int_ips()
+    check_jumbo_sizes()
+
+    print('Incremental flow window matches rebuild path')
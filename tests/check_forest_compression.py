@@ -0,0 +1,91 @@
+import tempfile
+
+import numpy as np
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import accuracy_score, f1_score
+
+from RandomJungle.Models.FlatForest import FlatForest
+from Train.CompressForest import ForestCompressor
+
+TOLERANCE = 0.01
+
+
+def synthetic():
+    rng = np.random.default_rng(0)
+    X = rng.random((6000, 7)) * np.array([1e4, 20, 1e3, 10, 1, 1, 17])
+    y = (X[:, 0] * X[:, 4] > 2000).astype(int) + (X[:, 5] > 0.7)
+    model = RandomForestClassifier(n_estimators=80, random_state=0)
+    model.fit(X[:2000], y[:2000])
+    return FlatForest.from_sklearn(model), X[2000:], y[2000:]
+
+
+def check_subset(flat, X):
+    # toàn bộ tree, không cắt depth → giống hệt forest gốc
+    if not np.array_equal(flat.subset().predict_proba(X), flat.predict_proba(X)):
+        raise AssertionError("subset() of all trees differs from the original forest")
+
+    # tree bất kỳ + depth cap → giống duyệt depth bước trên forest gốc
+    trees = np.array([2, 5, 11, 40, 79])
+    Xf = X.astype(np.float32)
+    for depth in (1, 3, 6, 10, 100):
+        compact = flat.subset(trees, depth)
+        expected = flat.value[flat._apply(Xf, flat.roots[trees], depth)].sum(axis=1) / len(trees)
+        if not np.allclose(compact.predict_proba(X), expected, rtol=0.0, atol=1e-12):
+            raise AssertionError(f"subset(depth={depth}) differs from a depth-capped walk")
+        if compact.max_depth > depth or compact.n_trees != len(trees):
+            raise AssertionError(f"subset(depth={depth}) has wrong shape")
+    print("OK: subset() matches trees / depth-capped walk")
+
+
+def check_metrics(compressor):
+    # metrics() phải khớp sklearn (binary và macro)
+    rng = np.random.default_rng(1)
+    for average, n_classes in (("binary", 2), ("macro", 3), ("macro", 4)):
+        proba = rng.random((500, n_classes))
+        y = rng.integers(0, n_classes, 500)
+        pred = np.argmax(proba, axis=1)
+        compressor.average = average
+        acc, f1 = compressor.metrics(proba, y)
+        if not np.isclose(acc, accuracy_score(y, pred)):
+            raise AssertionError(f"{average}/{n_classes}: accuracy differs from sklearn")
+        if not np.isclose(f1, f1_score(y, pred, average=average, zero_division=0)):
+            raise AssertionError(f"{average}/{n_classes}: F1 differs from sklearn")
+    compressor.average = "macro"
+    print("OK: metrics() match sklearn")
+
+
+def check_compress(compressor, flat):
+    trees, depth = compressor.search()
+    compact = flat.subset(trees, depth)
+    if compact.n_nodes >= flat.n_nodes:
+        raise AssertionError("compressed forest is not smaller")
+
+    base = compressor.metrics(flat.predict_proba(compressor.X_select), compressor.y_select)
+    got = compressor.metrics(compact.predict_proba(compressor.X_select), compressor.y_select)
+    if base[0] - got[0] > TOLERANCE or base[1] - got[1] > TOLERANCE:
+        raise AssertionError(f"compressed metrics {got} outside tolerance of {base}")
+
+    # artifact nhỏ hơn load lại cho đúng kết quả
+    with tempfile.TemporaryDirectory() as tmp:
+        compact.save(tmp + "/small.forest")
+        loaded = FlatForest.load(tmp + "/small.forest")
+        if not np.array_equal(loaded.predict_proba(compressor.X_report), compact.predict_proba(compressor.X_report)):
+            raise AssertionError("reloaded artifact differs")
+
+    result = compressor.report(compact)
+    original, compressed = result["original"], result["compressed"]
+    print(
+        f"OK: {original['trees']}x{original['max_depth']} -> {compressed['trees']}x{compressed['max_depth']}, "
+        f"{original['bytes']} -> {compressed['bytes']} bytes, "
+        f"acc {original['accuracy']:.4f} -> {compressed['accuracy']:.4f}, "
+        f"batch {original['batch_us']:.0f} -> {compressed['batch_us']:.0f} us"
+    )
+
+
+if __name__ == "__main__":
+    flat, X, y = synthetic()
+    check_subset(flat, X)
+
+    compressor = ForestCompressor(flat, X, y, tolerance=TOLERANCE)
+    check_metrics(compressor)
+    check_compress(compressor, flat)
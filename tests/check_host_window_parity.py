@@ -0,0 +1,73 @@
+import math
+import random
+from dataclasses import fields
+
+from NetworkReader.Data.Enums.Direction import Direction
+from NetworkReader.Data.Enums.L4Protocol import L4Protocol
+from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
+from NetworkReader.Services.HostBased.HostSlidingWindowService import HostSlidingWindowService
+
+REL_TOL = 1e-6
+ABS_TOL = 1e-6
+
+
+def random_trace(rng: random.Random, n_packets: int, n_hosts: int):
+    hosts = [f"10.0.0.{rng.randint(1, 254)}" for _ in range(n_hosts)]
+
+    ts = 1_700_000_000.0
+    for _ in range(n_packets):
+        ts += rng.choice([
+            rng.expovariate(1000.0),
+            rng.expovariate(10.0),
+            rng.uniform(0.0, 15.0) if rng.random() < 0.01 else 0.0,
+        ])
+        tcp = rng.random() < 0.8
+        # port scan: wide port range, few repeats; service traffic: hot ports
+        port = rng.randint(1, 5000) if rng.random() < 0.6 else rng.choice([22, 80, 443])
+        yield PacketMeta(
+            timestamp=ts,
+            direction=rng.choice([Direction.FORWARD, Direction.BACKWARD]),
+            src_ip=rng.choice(hosts),
+            src_port=rng.randint(1, 65535),
+            dst_ip=f"192.168.1.{rng.randint(1, 40)}",
+            dst_port=port,
+            protocol=L4Protocol.TCP if tcp else L4Protocol.UDP,
+            packet_size=rng.randint(40, 1500),
+            syn=rng.random() < 0.5 if tcp else None,
+            ack=rng.random() < 0.4 if tcp else None,
+            rst=rng.random() < 0.2 if tcp else None,
+            fin=rng.random() < 0.05 if tcp else None,
+        )
+
+
+def same_snapshot(a, b) -> bool:
+    for f in fields(a):
+        x = getattr(a, f.name)
+        y = getattr(b, f.name)
+        if isinstance(x, float):
+            if not math.isclose(x, y, rel_tol=REL_TOL, abs_tol=ABS_TOL):
+                return False
+        elif x != y:
+            return False
+    return True
+
+
+def check(seed: int, n_packets: int = 5000, n_hosts: int = 3, window_size: float = 10.0):
+    rng = random.Random(seed)
+    rebuild = HostSlidingWindowService(window_size=window_size)
+    incremental = HostSlidingWindowService(window_size=window_size, incremental=True)
+
+    for i, pkt in enumerate(random_trace(rng, n_packets, n_hosts)):
+        a = rebuild.process_packet(pkt)[-1]
+        b = incremental.process_packet(pkt)[-1]
+        if not same_snapshot(a, b):
+            raise AssertionError(f"seed={seed} packet={i}: rebuild={a} incremental={b}")
+
+    print(f"OK: seed={seed} -> {n_packets} packets, {n_hosts} hosts")
+
+
+if __name__ == '__main__':
+    for seed in range(10):
+        check(seed)
+
+    print('Incremental host window matches rebuild path')
@@ -0,0 +1,140 @@
+import math
+import random
+
+from check_verdict_cache import random_rows, same_output, train
+
+from RandomJungle.InferenceScheduler import InferenceScheduler
+from RandomJungle.Models.RfFlowBin import RfFlowBin
+from RandomJungle.Models.RfFlowMulti import RfFlowMulti
+from RandomJungle.Models.RfHostBin import RfHostBin
+from RandomJungle.Models.RfHostMulti import RfHostMulti
+from RandomJungle.Preprocessor import Preprocessor
+
+MAX_DELAY_MS = 5.0
+
+
+class FakeClock:
+    """Clock inject vào scheduler; test tự chỉnh now (giây)."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+MODELS = (
+    train(RfHostBin(), 6, 2, 0),
+    train(RfFlowBin(), 6, 2, 1),
+    train(RfHostMulti(), 6, 4, 2),
+    train(RfFlowMulti(), 7, 2, 3),
+)
+
+
+def make_scheduler(clock, max_batch_size=64):
+    return InferenceScheduler(
+        *MODELS, Preprocessor(),
+        max_batch_size=max_batch_size, max_delay_ms=MAX_DELAY_MS, clock=clock,
+    )
+
+
+def check_per_row(scheduler, outputs):
+    # batch phải cho cùng output với predict từng row riêng
+    for i, out in enumerate(outputs):
+        expected = scheduler.predict([(out.host_features, out.flow_features)])[0]
+        if not same_output(expected, out):
+            raise AssertionError(f"batched output {i} differs from per-row predict")
+
+
+def check_deadline(rows):
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    delay = MAX_DELAY_MS / 1000.0
+
+    for k, (host, flow) in enumerate(rows[:3]):
+        clock.now = k * 0.001
+        if scheduler.submit(host, flow):
+            raise AssertionError(f"row {k} flushed before the deadline")
+
+    clock.now = delay - 1e-6
+    if scheduler.poll():
+        raise AssertionError("poll() flushed before the oldest row waited max_delay")
+    if not math.isclose(scheduler.time_until_deadline(), 1e-6, abs_tol=1e-12):
+        raise AssertionError(f"time_until_deadline {scheduler.time_until_deadline()} != 1e-6")
+
+    clock.now = delay
+    outputs = scheduler.poll()
+    if len(outputs) != 3:
+        raise AssertionError(f"poll() at the deadline flushed {len(outputs)} rows, expected 3")
+    for k, out in enumerate(outputs):
+        if not math.isclose(out.queue_delay, delay - k * 0.001, abs_tol=1e-12):
+            raise AssertionError(f"row {k}: queue_delay {out.queue_delay}")
+    if scheduler.poll() or scheduler.time_until_deadline() is not None:
+        raise AssertionError("queue not empty after flush")
+
+    check_per_row(scheduler, outputs)
+    stats = scheduler.stats
+    if (stats.batches, stats.rows, stats.max_batch_size) != (1, 3, 3):
+        raise AssertionError(f"stats after one deadline flush: {stats}")
+    if not math.isclose(stats.max_queue_delay, delay) or not math.isclose(stats.mean_queue_delay, delay - 0.001):
+        raise AssertionError(f"queue delay stats: {stats}")
+    print(f"OK: deadline -> nothing before {delay * 1e3:.0f} ms, 3 rows at it, {stats}")
+
+
+def check_max_batch(rows, max_batch_size=4):
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, max_batch_size=max_batch_size)
+
+    flushed = []
+    for k, (host, flow) in enumerate(rows[:2 * max_batch_size + 1]):
+        # clock đứng yên: chỉ max_batch_size làm batch flush
+        outputs = scheduler.submit(host, flow)
+        if outputs and len(outputs) != max_batch_size:
+            raise AssertionError(f"row {k}: flushed {len(outputs)} rows, expected {max_batch_size}")
+        if outputs and (k + 1) % max_batch_size:
+            raise AssertionError(f"row {k}: flushed before the batch was full")
+        flushed += outputs
+
+    if len(flushed) != 2 * max_batch_size or scheduler.time_until_deadline() is None:
+        raise AssertionError(f"flushed {len(flushed)} rows, last row should still be pending")
+    if any(out.queue_delay != 0.0 for out in flushed):
+        raise AssertionError("full batch should flush without waiting")
+
+    tail = scheduler.flush()
+    check_per_row(scheduler, flushed + tail)
+    stats = scheduler.stats
+    if (stats.batches, stats.rows, stats.max_batch_size) != (3, 2 * max_batch_size + 1, max_batch_size):
+        raise AssertionError(f"stats after max_batch flushes: {stats}")
+    if stats.total_queue_delay != 0.0 or stats.mean_batch_size != stats.rows / 3:
+        raise AssertionError(f"stats after max_batch flushes: {stats}")
+    print(f"OK: max_batch_size={max_batch_size} -> flushed on submit, {stats}")
+
+
+def check_submit_many(ticks):
+    clock = FakeClock()
+    scheduler = make_scheduler(clock)
+    n = 0
+    for t, rows in enumerate(ticks[:20]):
+        clock.now = t * 0.5
+        outputs = scheduler.submit_many(rows)
+        if len(outputs) != len(rows):
+            raise AssertionError(f"tick {t}: submit_many returned {len(outputs)} of {len(rows)} rows")
+        check_per_row(scheduler, outputs)
+        n += len(rows)
+
+    stats = scheduler.stats
+    if (stats.batches, stats.rows) != (20, n) or stats.max_queue_delay != 0.0:
+        raise AssertionError(f"stats after submit_many: {stats}")
+    if scheduler.submit_many([]) or scheduler.stats.batches != 20:
+        raise AssertionError("empty submit_many should not run a batch")
+    print(f"OK: submit_many -> one batch per tick, {stats}")
+
+
+if __name__ == '__main__':
+    ticks = random_rows(random.Random(0), n_ticks=20)
+    rows = [row for tick in ticks for row in tick]
+    check_deadline(rows)
+    check_max_batch(rows)
+    check_submit_many(ticks)
+
+    print('Inference scheduler flushes on deadline / max batch and matches per-row predict')
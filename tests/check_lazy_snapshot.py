@@ -0,0 +1,116 @@
+import random
+import time
+
+from check_host_window_parity import random_trace
+
+from NetworkReader.Data.ValueObjects.HostBased.HostSnapshotHandle import HostSnapshotHandle
+from NetworkReader.Data.ValueObjects.HostBased.HostWindowStats import HostWindowStats
+from NetworkReader.Services.FlowBased.FlowFeatureExtractService import FlowFeatureExtractService
+from NetworkReader.Services.HostBased.HostFeatureExtractService import HostFeatureExtractService
+from NetworkReader.Services.HostBased.HostSlidingWindowService import HostSlidingWindowService
+from NetworkReader.Services.PacketStateEngine import PacketStateEngine
+
+WINDOW_SIZE = 10.0
+TIMEOUT = 30.0
+EMIT_INTERVAL = 0.5
+
+flow_extractor = FlowFeatureExtractService(WINDOW_SIZE)
+host_extractor = HostFeatureExtractService(WINDOW_SIZE)
+
+
+def features(flow_snap, host_snap):
+    return host_extractor.extract(host_snap), flow_extractor.extract(flow_snap)
+
+
+def check_engine(seed: int, n_packets: int = 5000, n_hosts: int = 5):
+    # handle đọc ngay sau khi emit phải cho đúng feature (bit-identical) như snapshot eager
+    packets = list(random_trace(random.Random(seed), n_packets, n_hosts))
+    eager = PacketStateEngine(WINDOW_SIZE, TIMEOUT, TIMEOUT)
+    lazy = PacketStateEngine(WINDOW_SIZE, TIMEOUT, TIMEOUT, lazy_snapshots=True)
+
+    for i, pkt in enumerate(packets):
+        expected = eager.process_packet(pkt)
+        actual = lazy.process_packet(pkt)
+        if features(*expected) != features(*actual):
+            raise AssertionError(f"seed={seed} packet={i}: lazy features differ")
+        if (actual[0].materialize(), actual[1].materialize()) != expected:
+            raise AssertionError(f"seed={seed} packet={i}: materialize() differs")
+
+    eager = PacketStateEngine(WINDOW_SIZE, TIMEOUT, TIMEOUT, emit_interval=EMIT_INTERVAL)
+    lazy = PacketStateEngine(
+        WINDOW_SIZE, TIMEOUT, TIMEOUT, emit_interval=EMIT_INTERVAL, lazy_snapshots=True
+    )
+    for i, pkt in enumerate(packets + [None]):
+        now = pkt.timestamp if pkt is not None else packets[-1].timestamp
+        if pkt is None or eager.emit_due(now):
+            expected = [features(*pair) for pair in eager.emit_dirty(now)]
+            actual = [features(*pair) for pair in lazy.emit_dirty(now)]
+            if expected != actual:
+                raise AssertionError(f"seed={seed} packet={i}: lazy tick features differ")
+        if pkt is not None:
+            eager.update(pkt)
+            lazy.update(pkt)
+
+    print(f"OK: seed={seed} -> {n_packets} packets, per-packet and tick mode")
+
+
+def check_rebuild(seed: int, n_packets: int = 3000):
+    packets = list(random_trace(random.Random(seed), n_packets, 3))
+    eager = HostSlidingWindowService(WINDOW_SIZE)
+    lazy = HostSlidingWindowService(WINDOW_SIZE, lazy=True)
+    for i, pkt in enumerate(packets):
+        expected = eager.process_packet(pkt)[-1]
+        handle = lazy.process_packet(pkt)[-1]
+        if handle.materialize() != expected:
+            raise AssertionError(f"seed={seed} packet={i}: rebuild handle differs")
+    print(f"OK: seed={seed} -> rebuild host handle matches eager snapshot")
+
+
+def check_entropy_memo():
+    engine = PacketStateEngine(WINDOW_SIZE, TIMEOUT, TIMEOUT, lazy_snapshots=True)
+    for pkt in random_trace(random.Random(0), 200, 1):
+        _, handle = engine.process_packet(pkt)
+    if not isinstance(handle, HostSnapshotHandle) or handle._port_entropy is not None:
+        raise AssertionError("port entropy computed before it was read")
+    first = handle.port_entropy
+    if handle._port_entropy != first or handle.port_entropy != first:
+        raise AssertionError("port entropy not memoized")
+    print(f"OK: port entropy memoized ({first:.4f} bits)")
+
+
+def check_abstract_base():
+    # base không tự tính được field phụ thuộc loại stats → không tạo trực tiếp được
+    try:
+        HostSnapshotHandle("10.0.0.1", HostWindowStats(0.0, 0.0), 0.0, WINDOW_SIZE)
+    except TypeError as e:
+        missing = str(e)
+    else:
+        raise AssertionError("HostSnapshotHandle instantiated without subclass fields")
+    for name in ("unique_dst_ips", "connection_attempts", "mean_flow_duration", "_compute_port_entropy"):
+        if name not in missing:
+            raise AssertionError(f"{name} is not abstract: {missing}")
+    print("OK: HostSnapshotHandle is abstract over its stats-specific fields")
+
+
+def bench(n_packets: int = 50_000):
+    packets = list(random_trace(random.Random(1), n_packets, 20))
+    for lazy in (False, True):
+        elapsed = float("inf")
+        for _ in range(3):
+            engine = PacketStateEngine(WINDOW_SIZE, TIMEOUT, TIMEOUT, lazy_snapshots=lazy)
+            t0 = time.perf_counter()
+            for pkt in packets:
+                features(*engine.process_packet(pkt))
+            elapsed = min(elapsed, time.perf_counter() - t0)
+        print(f"  lazy={lazy}: {elapsed / n_packets * 1e6:.2f} us/packet (state + snapshot + extract)")
+
+
+if __name__ == '__main__':
+    for seed in range(3):
+        check_engine(seed)
+        check_rebuild(seed)
+    check_entropy_memo()
+    check_abstract_base()
+    bench()
+
+    print('Lazy snapshot handles match eager snapshots')
@@ -0,0 +1,111 @@
+import os
+import socket
+import struct
+import tempfile
+
+from NetworkReader.Services.Capture.PcapReplayBackend import PcapReplayBackend
+from NetworkReader.Services.Capture.SimulatedClock import SimulatedClock
+from NetworkReader.Services.PacketCaptureService import PacketCaptureService
+from NetworkReader.Services.PacketParserService import PacketParserService
+from NetworkReader.Services.ProcessCaptureService import ProcessCaptureService
+
+LOCAL_IP = "192.168.1.10"
+REMOTE_IP = "10.0.0.5"
+
+
+def ipv4_tcp(src, dst, sport, dport, flags):
+    tcp = struct.pack("!HHLLBBHHH", sport, dport, 0, 0, 5 << 4, flags, 1024, 0, 0)
+    ip = struct.pack(
+        "!BBHHHBBH4s4s", 0x45, 0, 20 + len(tcp), 0, 0, 64, 6, 0,
+        socket.inet_aton(src), socket.inet_aton(dst),
+    )
+    return ip + tcp
+
+
+def ethernet(payload, vlan=False):
+    eth = b"\x00" * 12
+    if vlan:
+        eth += struct.pack("!HH", 0x8100, 42)
+    return eth + struct.pack("!H", 0x0800) + payload
+
+
+def packets():
+    # (timestamp, ipv4 bytes): SYN ra ngoài, SYN-ACK trả về, 1 packet ARP (bỏ qua)
+    return [
+        (1700000000.000001, ipv4_tcp(LOCAL_IP, REMOTE_IP, 40000, 80, 0x02)),
+        (1700000000.250002, ipv4_tcp(REMOTE_IP, LOCAL_IP, 80, 40000, 0x12)),
+        (1700000003.500003, ipv4_tcp(LOCAL_IP, REMOTE_IP, 40000, 80, 0x10)),
+    ]
+
+
+def write_pcap(path):
+    with open(path, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        for i, (ts, ip) in enumerate(packets()):
+            frame = ethernet(ip, vlan=(i == 1))
+            sec, usec = int(ts), round((ts - int(ts)) * 1e6)
+            f.write(struct.pack("<IIII", sec, usec, len(frame), len(frame)) + frame)
+        arp = b"\x00" * 12 + struct.pack("!H", 0x0806) + b"\x00" * 28
+        f.write(struct.pack("<IIII", 1700000004, 0, len(arp), len(arp)) + arp)
+
+
+def write_pcapng(path):
+    def block(block_type, body):
+        body += b"\x00" * (-len(body) % 4)
+        length = 12 + len(body)
+        return struct.pack("<II", block_type, length) + body + struct.pack("<I", length)
+
+    with open(path, "wb") as f:
+        f.write(block(0x0A0D0D0A, struct.pack("<IHHq", 0x1A2B3C4D, 1, 0, -1)))
+        # LINKTYPE_RAW, if_tsresol = 9 (nanoseconds)
+        options = struct.pack("<HHB", 9, 1, 9) + b"\x00" * 3 + struct.pack("<HH", 0, 0)
+        f.write(block(1, struct.pack("<HHI", 101, 0, 65535) + options))
+        for ts, ip in packets():
+            ns = round(ts * 1e9)
+            f.write(block(6, struct.pack("<IIIII", 0, ns >> 32, ns & 0xFFFFFFFF, len(ip), len(ip)) + ip))
+
+
+def check(path, capture_cls=PacketCaptureService):
+    clock = SimulatedClock()
+    # queue_size nhỏ để ring quay vòng
+    capture = capture_cls(backend=PcapReplayBackend(path), clock=clock, queue_size=2)
+    parser = PacketParserService({LOCAL_IP})
+
+    capture.start()
+    parsed = []
+    while not capture.exhausted:
+        item = capture.next_packet(timeout=0.1)
+        if item is not None:
+            parsed.append(parser.parse(*item))
+    # memoryview vào shared memory phải được bỏ trước stop()
+    del item
+    capture.stop()
+
+    expected = packets()
+    if len(parsed) != len(expected):
+        raise AssertionError(f"{path}: {len(parsed)} packets, expected {len(expected)}")
+
+    for pkt, (ts, _) in zip(parsed, expected):
+        if pkt is None or abs(pkt.timestamp - ts) > 1e-6 or pkt.dst_port != 80:
+            raise AssertionError(f"{path}: unexpected packet {pkt}")
+
+    if parsed[0].syn is not True or parsed[1].ack is not True:
+        raise AssertionError(f"{path}: TCP flags lost")
+    if abs(clock.now() - expected[-1][0]) > 1e-6:
+        raise AssertionError(f"{path}: simulated clock at {clock.now()}")
+
+    print(f"OK: {os.path.basename(path)} [{capture_cls.__name__}] -> {len(parsed)} packets")
+
+
+if __name__ == '__main__':
+    with tempfile.TemporaryDirectory() as tmp:
+        pcap = os.path.join(tmp, "trace.pcap")
+        pcapng = os.path.join(tmp, "trace.pcapng")
+        write_pcap(pcap)
+        write_pcapng(pcapng)
+
+        for capture_cls in (PacketCaptureService, ProcessCaptureService):
+            check(pcap, capture_cls)
+            check(pcapng, capture_cls)
+
+    print('Pcap replay backend OK')
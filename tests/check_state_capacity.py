@@ -0,0 +1,116 @@
+import random
+
+from check_host_window_parity import random_trace
+
+from NetworkReader.Data.Enums.Direction import Direction
+from NetworkReader.Data.Enums.EvictionPolicy import EvictionPolicy
+from NetworkReader.Data.Enums.L4Protocol import L4Protocol
+from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey
+from NetworkReader.Data.ValueObjects.HostBased.HostKey import HostKey
+from NetworkReader.Data.ValueObjects.PacketMeta import PacketMeta
+from NetworkReader.Services.PacketStateEngine import PacketStateEngine
+
+WINDOW_SIZE = 10.0
+TIMEOUT = 1e6
+MAX_FLOWS = 200
+MAX_HOSTS = 50
+
+
+def syn_flood(rng: random.Random, n_packets: int, ts: float):
+    # mỗi packet một source spoof → một flow + một host mới
+    for _ in range(n_packets):
+        ts += rng.expovariate(5000.0)
+        yield PacketMeta(
+            timestamp=ts,
+            direction=Direction.FORWARD,
+            src_ip=f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}",
+            src_port=rng.randint(1024, 65535),
+            dst_ip="192.168.1.10",
+            dst_port=80,
+            protocol=L4Protocol.TCP,
+            packet_size=60,
+            syn=True,
+            ack=False,
+            rst=False,
+            fin=False,
+        )
+
+
+def check_invariants(engine: PacketStateEngine, sent: int, where: str):
+    if engine.live_flows > MAX_FLOWS or engine.live_hosts > MAX_HOSTS:
+        raise AssertionError(f"{where}: table over capacity")
+
+    flows = engine.flow_table.get_active_flows()
+    hosts = engine.host_behavior.get_active_hosts()
+
+    # không mất packet: live + tail = tổng số packet
+    if sum(s.total_packets for s in flows.values()) + engine.flow_tail.total_packets != sent:
+        raise AssertionError(f"{where}: flow packets lost")
+    if sum(s.total_packets for s in hosts.values()) + engine.host_tail.total_packets != sent:
+        raise AssertionError(f"{where}: host packets lost")
+    if engine.flow_tail.entities != engine.evicted_flows:
+        raise AssertionError(f"{where}: flow tail entity count mismatch")
+
+    # gauge đếm đúng số packet đang nằm trong buffer
+    flow_buffered = sum(len(b) for b in engine.flow_window._buffers.values())
+    host_buffered = sum(len(b) for b in engine.host_window._buffers.values())
+    if (engine._flow_buffered, engine._host_buffered) != (flow_buffered, host_buffered):
+        raise AssertionError(f"{where}: buffered packet counters drifted")
+
+
+def check(seed: int, policy: EvictionPolicy, n_packets: int = 3000):
+    rng = random.Random(seed)
+    engine = PacketStateEngine(
+        WINDOW_SIZE, TIMEOUT, TIMEOUT,
+        max_flows=MAX_FLOWS, max_hosts=MAX_HOSTS, evict_policy=policy,
+    )
+
+    # traffic bình thường, rồi flood xen với một flow nặng đang chạy
+    sent = 0
+    last_ts = 0.0
+    for pkt in random_trace(rng, n_packets // 2, n_hosts=5):
+        engine.process_packet(pkt)
+        sent += 1
+        last_ts = pkt.timestamp
+    check_invariants(engine, sent, f"seed={seed} {policy.name} normal")
+
+    heavy = next(random_trace(random.Random(seed + 1000), 1, n_hosts=1))
+    for i, pkt in enumerate(syn_flood(rng, n_packets, last_ts)):
+        engine.process_packet(pkt)
+        sent += 1
+        if i % 4 == 0:
+            engine.process_packet(PacketMeta(**{
+                f: getattr(heavy, f) for f in heavy.__dataclass_fields__ if f != "timestamp"
+            }, timestamp=pkt.timestamp))
+            sent += 1
+    check_invariants(engine, sent, f"seed={seed} {policy.name} flood")
+
+    if engine.evicted_flows == 0 or engine.evicted_hosts == 0:
+        raise AssertionError(f"seed={seed} {policy.name}: flood did not evict")
+
+    # least_packets giữ lại flow / host nặng giữa flood
+    if policy is EvictionPolicy.LEAST_PACKETS:
+        if HostKey(src_ip=heavy.src_ip) not in engine.host_behavior.get_active_hosts():
+            raise AssertionError(f"seed={seed}: heavy host evicted")
+        heavy_key = FlowKey(heavy.src_ip, heavy.dst_ip, heavy.dst_port, heavy.protocol, heavy.direction)
+        if heavy_key not in engine.flow_table.get_active_flows():
+            raise AssertionError(f"seed={seed}: heavy flow evicted")
+
+    # cleanup qua view cũng cập nhật gauge
+    engine.flow_table.cleanup(last_ts + 2 * TIMEOUT)
+    engine.host_behavior.cleanup(last_ts + 2 * TIMEOUT)
+    if engine.flow_memory_bytes or engine.host_memory_bytes:
+        raise AssertionError(f"seed={seed} {policy.name}: gauge not zero after cleanup")
+
+    print(
+        f"OK: seed={seed} {policy.name} -> evicted flows={engine.evicted_flows} "
+        f"hosts={engine.evicted_hosts}, tail packets={engine.flow_tail.total_packets}"
+    )
+
+
+if __name__ == '__main__':
+    for seed in range(3):
+        for policy in EvictionPolicy:
+            check(seed, policy)
+
+    print('Bounded state tables keep capacity, counters and tail aggregate consistent')
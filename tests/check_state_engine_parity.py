@@ -0,0 +1,69 @@
+import random
+
+from check_host_window_parity import random_trace, same_snapshot
+
+from NetworkReader.Services.FlowBased.FlowSlidingWindowService import FlowSlidingWindowService
+from NetworkReader.Services.FlowBased.FlowTableService import FlowTableService
+from NetworkReader.Services.HostBased.HostBehaviorService import HostBehaviorService
+from NetworkReader.Services.HostBased.HostSlidingWindowService import HostSlidingWindowService
+from NetworkReader.Services.PacketStateEngine import PacketStateEngine
+
+WINDOW_SIZE = 10.0
+# service riêng không tự cleanup → tắt expiration của engine (xem check_state_expiry.py)
+TIMEOUT = 1e6
+
+
+def check(seed: int, n_packets: int = 5000, n_hosts: int = 3, compact_windows: bool = True):
+    rng = random.Random(seed)
+
+    flow_table = FlowTableService(flow_timeout=TIMEOUT)
+    host_behavior = HostBehaviorService(host_timeout=TIMEOUT)
+    flow_window = FlowSlidingWindowService(window_size=WINDOW_SIZE, incremental=True)
+    host_window = HostSlidingWindowService(window_size=WINDOW_SIZE, incremental=True)
+    engine = PacketStateEngine(
+        WINDOW_SIZE, flow_timeout=TIMEOUT, host_timeout=TIMEOUT, compact_windows=compact_windows
+    )
+
+    for i, pkt in enumerate(random_trace(rng, n_packets, n_hosts)):
+        flow_table.on_packet(pkt)
+        host_behavior.on_packet(pkt)
+        flow_snap = flow_window.process_packet(pkt)[-1]
+        host_snap = host_window.process_packet(pkt)[-1]
+
+        fused_flow, fused_host = engine.process_packet(pkt)
+        if not same_snapshot(flow_snap, fused_flow):
+            raise AssertionError(f"seed={seed} packet={i}: flow {flow_snap} != {fused_flow}")
+        if not same_snapshot(host_snap, fused_host):
+            raise AssertionError(f"seed={seed} packet={i}: host {host_snap} != {fused_host}")
+
+    # lifetime stats qua view phải giống service riêng
+    fused_flows = engine.flow_table.get_active_flows()
+    expected_hosts = host_behavior.get_active_hosts()
+    for key, stats in flow_table.get_active_flows().items():
+        fused = fused_flows[key]
+        if not same_snapshot(stats, fused):
+            raise AssertionError(f"seed={seed}: flow table {key} {stats} != {fused}")
+
+    for key, stats in engine.host_behavior.get_active_hosts().items():
+        expected = expected_hosts[key]
+        if not same_snapshot(expected, stats):
+            raise AssertionError(f"seed={seed}: host {key} {expected} != {stats}")
+
+    # cleanup qua view xóa entity khỏi state chung
+    now = pkt.timestamp + TIMEOUT + 1.0
+    engine.flow_table.cleanup(now)
+    engine.host_behavior.cleanup(now)
+    if engine.flow_table.get_active_flows() or engine.host_behavior.get_active_hosts():
+        raise AssertionError(f"seed={seed}: cleanup left entities behind")
+
+    print(f"OK: seed={seed} -> {n_packets} packets, {n_hosts} hosts (compact_windows={compact_windows})")
+
+
+if __name__ == '__main__':
+    for seed in range(10):
+        check(seed)
+    # buffer cột list phải cho cùng kết quả với cột array
+    for seed in range(3):
+        check(seed, compact_windows=False)
+
+    print('Fused state engine matches the four services')
@@ -0,0 +1,94 @@
+import random
+
+from check_host_window_parity import random_trace, same_snapshot
+
+from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey
+from NetworkReader.Data.ValueObjects.HostBased.HostKey import HostKey
+from NetworkReader.Services.PacketStateEngine import PacketStateEngine
+from NetworkReader.Services.TimingWheel import TimingWheel
+
+WINDOW_SIZE = 2.0
+TIMEOUT = 5.0
+TICK = 0.5
+
+
+def check_wheel(seed: int, n_items: int = 3000):
+    rng = random.Random(seed)
+    # wheel nhỏ (4 slot x 2 tầng) để chạy qua cascade và overflow
+    wheel = TimingWheel(tick=TICK, slot_bits=2, levels=2)
+    pending = {}
+    now = 100.0
+    wheel.advance(now)
+
+    for i in range(n_items):
+        deadline = now + rng.choice([rng.uniform(0, 3), rng.uniform(0, 40), rng.uniform(0, 500)])
+        wheel.schedule(deadline, i)
+        pending[i] = deadline
+
+        now += rng.choice([0.0, rng.uniform(0, 1), rng.uniform(0, 50) if rng.random() < 0.02 else 0.0])
+        for item in wheel.advance(now):
+            deadline = pending.pop(item)
+            if not deadline < now:
+                raise AssertionError(f"seed={seed}: item {item} expired early ({deadline} >= {now})")
+
+        # item còn chờ: chưa tới tick sau deadline
+        for item, deadline in pending.items():
+            if int(now // TICK) > int(deadline // TICK):
+                raise AssertionError(f"seed={seed}: item {item} overdue ({deadline} < {now})")
+
+    if len(wheel) != len(pending):
+        raise AssertionError(f"seed={seed}: len {len(wheel)} != {len(pending)}")
+
+    print(f"OK: wheel seed={seed} -> {n_items} items")
+
+
+def check_engine(seed: int, n_packets: int = 5000, n_hosts: int = 20):
+    rng = random.Random(seed)
+    engine = PacketStateEngine(WINDOW_SIZE, TIMEOUT, TIMEOUT, expire_tick=TICK)
+    reference = PacketStateEngine(WINDOW_SIZE, 1e9, 1e9)
+
+    flow_last_seen = {}
+    host_last_seen = {}
+
+    for i, pkt in enumerate(random_trace(rng, n_packets, n_hosts)):
+        # expiration không được đổi snapshot (entity idle > timeout đã trượt khỏi window)
+        flow_snap, host_snap = engine.process_packet(pkt)
+        ref_flow, ref_host = reference.process_packet(pkt)
+        if not same_snapshot(ref_flow, flow_snap) or not same_snapshot(ref_host, host_snap):
+            raise AssertionError(f"seed={seed} packet={i}: snapshot changed by expiration")
+
+        now = pkt.timestamp
+        flow_last_seen[FlowKey(pkt.src_ip, pkt.dst_ip, pkt.dst_port, pkt.protocol, pkt.direction)] = now
+        host_last_seen[HostKey(src_ip=pkt.src_ip)] = now
+
+        for name, last_seen, live in (
+            ("flow", flow_last_seen, engine.flow_table.get_active_flows()),
+            ("host", host_last_seen, engine.host_behavior.get_active_hosts()),
+        ):
+            for key, seen in last_seen.items():
+                idle = now - seen
+                if idle <= TIMEOUT and key not in live:
+                    raise AssertionError(f"seed={seed} packet={i}: live {name} {key} expired")
+                if idle > TIMEOUT + TICK and key in live:
+                    raise AssertionError(f"seed={seed} packet={i}: idle {name} {key} not expired")
+
+    if engine.live_flows + engine.expired_flows < len(flow_last_seen):
+        raise AssertionError(f"seed={seed}: flow counters do not add up")
+    if not engine.expired_flows or not engine.expired_hosts:
+        raise AssertionError(f"seed={seed}: nothing expired")
+
+    print(
+        f"OK: engine seed={seed} -> live flows={engine.live_flows} "
+        f"expired flows={engine.expired_flows} live hosts={engine.live_hosts} "
+        f"expired hosts={engine.expired_hosts}"
+    )
+
+
+if __name__ == '__main__':
+    for seed in range(5):
+        check_wheel(seed)
+
+    for seed in range(3):
+        check_engine(seed, n_packets=2000)
+
+    print('Timing wheel expiration matches brute-force idle check')
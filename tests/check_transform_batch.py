@@ -0,0 +1,65 @@
+import random
+import time
+from dataclasses import astuple
+
+import numpy as np
+
+from check_feature_rows import random_rows
+
+from RandomJungle.Preprocessor import Preprocessor
+
+NAMES = ("host_bin", "flow_bin", "host_multi", "flow_multi")
+
+
+def raw_matrices(preprocessor, rows):
+    host_raw = np.array([[getattr(h, c) for c in preprocessor.host_columns] for h, _ in rows], dtype=np.float64)
+    flow_raw = np.array([[getattr(f, c) for c in preprocessor.flow_columns] for _, f in rows], dtype=np.float64)
+    return host_raw, flow_raw
+
+
+def check_bit_identical(rows):
+    preprocessor = Preprocessor()
+    scalar = [[], [], [], []]
+    for host, flow in rows:
+        for out, features in zip(scalar, preprocessor.transform(host, flow)):
+            out.append([float(v) for v in astuple(features)])
+    scalar = [np.array(m, dtype=np.float64) for m in scalar]
+
+    batch = preprocessor.transform_batch(*raw_matrices(preprocessor, rows), dtype=np.float64)
+    for name, expected, actual in zip(NAMES, scalar, batch):
+        # so sánh bit pattern: phân biệt cả -0.0 / 0.0 và lệch 1 ulp
+        if not np.array_equal(expected.view(np.uint64), actual.view(np.uint64)):
+            bad = np.argwhere(expected.view(np.uint64) != actual.view(np.uint64))[0]
+            raise AssertionError(
+                f"{name}{tuple(bad)}: scalar={expected[tuple(bad)]!r} batch={actual[tuple(bad)]!r}"
+            )
+
+    float32 = preprocessor.transform_batch(*raw_matrices(preprocessor, rows))
+    for name, expected, actual in zip(NAMES, scalar, float32):
+        if actual.dtype != np.float32 or not np.array_equal(expected.astype(np.float32), actual):
+            raise AssertionError(f"{name}: float32 output differs")
+
+    print(f"OK: {len(rows)} rows bit-identical to scalar transform() (float64 and float32)")
+
+
+def bench(rows, repeat: int = 5):
+    preprocessor = Preprocessor()
+    host_raw, flow_raw = raw_matrices(preprocessor, rows)
+    for name, fn in (
+        ("scalar transform", lambda: [preprocessor.transform(h, f) for h, f in rows]),
+        ("transform_batch", lambda: preprocessor.transform_batch(host_raw.copy(), flow_raw.copy())),
+    ):
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            fn()
+            best = min(best, time.perf_counter() - t0)
+        print(f"  {name}: {best / len(rows) * 1e6:.3f} us/row")
+
+
+if __name__ == '__main__':
+    for seed in range(3):
+        check_bit_identical(random_rows(random.Random(seed), 5000))
+    bench(random_rows(random.Random(0), 20000))
+
+    print('Preprocessor.transform_batch matches the scalar path bit for bit')
@@ -0,0 +1,76 @@
+import socket
+import struct
+from collections import deque
+
+from check_pcap_replay import LOCAL_IP, REMOTE_IP, ethernet, ipv4_tcp
+
+from NetworkReader.Services.Capture.AfPacketBackend import AfPacketBackend
+from NetworkReader.Services.PacketParserService import PacketParserService
+
+SNAPLEN = 128
+FRAME_SIZE = 9000  # GRO: nhiều segment gộp thành một frame > snaplen
+
+
+def big_ipv4_tcp(size):
+    """TCP packet có total_length = size (payload toàn 0)."""
+    ip = bytearray(ipv4_tcp(LOCAL_IP, REMOTE_IP, 40000, 80, 0x10))
+    ip[2:4] = struct.pack("!H", size)
+    return bytes(ip) + b"\x00" * (size - len(ip))
+
+
+class FakeSocket:
+    """recv_into như AF_PACKET: cắt ở nbytes, MSG_TRUNC trả về độ dài thật."""
+
+    def __init__(self, frames):
+        self.frames = deque(frames)
+
+    def recv_into(self, buffer, nbytes, flags=0):
+        if not self.frames:
+            raise BlockingIOError
+        frame = self.frames.popleft()
+        n = min(nbytes, len(frame))
+        buffer[:n] = frame[:n]
+        return len(frame) if flags & socket.MSG_TRUNC else n
+
+
+def check_backend():
+    frames = [ethernet(big_ipv4_tcp(FRAME_SIZE)), ethernet(ipv4_tcp(LOCAL_IP, REMOTE_IP, 40000, 80, 0x02))]
+    backend = AfPacketBackend("lo", snaplen=SNAPLEN, pool_size=4)
+    # chỉ cấp phát pool, không mở socket thật
+    backend._arena = bytearray(backend.pool_size * SNAPLEN)
+    view = memoryview(backend._arena)
+    backend._slots = [view[i * SNAPLEN:(i + 1) * SNAPLEN] for i in range(backend.pool_size)]
+    backend._free_slots = deque(range(backend.pool_size))
+
+    batch = backend._drain(FakeSocket(frames), 8)
+    if len(batch) != 2 or backend.truncated_frames != 1:
+        raise AssertionError(f"{len(batch)} packets, {backend.truncated_frames} truncated")
+    if len(batch.packets[0][0]) != SNAPLEN - 14:
+        raise AssertionError("truncated frame should fill the whole slot")
+
+    parser = PacketParserService({LOCAL_IP})
+    sizes = [parser.parse(raw, ts).packet_size for raw, ts in batch.packets]
+    if sizes != [FRAME_SIZE, 40]:
+        raise AssertionError(f"packet sizes {sizes}, expected [{FRAME_SIZE}, 40]")
+    print(f"OK: truncated {FRAME_SIZE}-byte frame in a {SNAPLEN}-byte slot -> packet_size {sizes[0]}")
+
+
+def check_parser():
+    parser = PacketParserService({LOCAL_IP})
+    full = big_ipv4_tcp(FRAME_SIZE)
+    padded = ipv4_tcp(LOCAL_IP, REMOTE_IP, 40000, 80, 0x02) + b"\x00" * 6  # Ethernet padding
+
+    # scalar và batch: total_length thắng cả khi buffer bị cắt hay có padding
+    buffers = [full[:SNAPLEN], full, padded]
+    expected = [FRAME_SIZE, FRAME_SIZE, 40]
+    scalar = [parser.parse(raw, 0.0).packet_size for raw in buffers]
+    batch = parser.parse_batch(buffers, [0.0] * len(buffers))["packet_size"].tolist()
+    if scalar != expected or batch != expected:
+        raise AssertionError(f"scalar {scalar}, batch {batch}, expected {expected}")
+    print("OK: parse / parse_batch take packet_size from IPv4 total_length")
+
+
+if __name__ == '__main__':
+    check_parser()
+    check_backend()
+    print('Truncated frames OK')
@@ -0,0 +1,189 @@
+import random
+
+import numpy as np
+
+from NetworkReader.Data.Enums.Direction import Direction
+from NetworkReader.Data.Enums.L4Protocol import L4Protocol
+from NetworkReader.Data.ValueObjects.FlowBased.FlowFeatureVector import FlowFeatureVector
+from NetworkReader.Data.ValueObjects.FlowBased.FlowKey import FlowKey
+from NetworkReader.Data.ValueObjects.HostBased.HostFeatureVector import HostFeatureVector
+
+from RandomJungle.InferenceScheduler import InferenceScheduler
+from RandomJungle.Models.RfFlowBin import RfFlowBin
+from RandomJungle.Models.RfFlowMulti import RfFlowMulti
+from RandomJungle.Models.RfHostBin import RfHostBin
+from RandomJungle.Models.RfHostMulti import RfHostMulti
+from RandomJungle.Preprocessor import Preprocessor
+from RandomJungle.VerdictCache import VerdictCache
+
+REL_TOL = 0.05
+BENIGN_TTL = 2.0
+
+
+class CountingModel:
+    """Bọc model, đếm số row đưa vào predict_proba."""
+
+    def __init__(self, model):
+        self.model = model
+        self.rows = 0
+
+    @property
+    def classes_(self):
+        return self.model.classes_
+
+    def predict_proba(self, X):
+        self.rows += len(X)
+        return self.model.predict_proba(X)
+
+
+def train(model, n_features, n_classes, seed):
+    rng = np.random.default_rng(seed)
+    X = rng.random((600, n_features)) * 2.0
+    y = (X.sum(axis=1) * n_classes / (2.0 * n_features)).astype(int).clip(0, n_classes - 1)
+    model.model.set_params(n_estimators=20, n_jobs=1)
+    model.fit(X, y)
+    model.set_backend("flat")
+    return CountingModel(model)
+
+
+def make_scheduler(host_cache=None, flow_cache=None):
+    return InferenceScheduler(
+        train(RfHostBin(), 6, 2, 0),
+        train(RfFlowBin(), 6, 2, 1),
+        train(RfHostMulti(), 6, 4, 2),
+        train(RfFlowMulti(), 7, 2, 3),
+        Preprocessor(),
+        host_cache=host_cache,
+        flow_cache=flow_cache,
+    )
+
+
+def random_rows(rng, n_ticks=200, n_hosts=4, flows_per_host=3):
+    """Feature vectors trôi chậm (random walk), thỉnh thoảng nhảy mạnh."""
+    state = {}
+    ticks = []
+    for tick in range(n_ticks):
+        ts = tick * 0.5
+        rows = []
+        for h in range(n_hosts):
+            src_ip = f"10.0.0.{h + 1}"
+            for f in range(flows_per_host):
+                key = FlowKey(src_ip, f"10.0.1.{f + 1}", 80 + f, L4Protocol.TCP, Direction.FORWARD)
+                values = state.get(key)
+                if values is None or rng.random() < 0.05:
+                    values = [rng.uniform(0.0, 1.0) for _ in range(8)]
+                else:
+                    values = [v * (1.0 + rng.uniform(-0.02, 0.02)) for v in values]
+                state[key] = values
+                # host vector dùng chung cho mọi flow của host trong một tick
+                host_values = state.setdefault((src_ip, tick), values)
+                rows.append((host_vector(src_ip, ts, host_values), flow_vector(key, ts, values)))
+        ticks.append(rows)
+    return ticks
+
+
+def host_vector(src_ip, ts, v):
+    return HostFeatureVector(
+        timestamp=ts, window_size=10.0, src_ip=src_ip,
+        packet_count=int(v[0] * 100), packets_per_second=v[0] * 10,
+        unique_dst_ips=2, unique_dst_ports=int(v[1] * 2) + 1, port_entropy=v[2],
+        connection_attempts=3, connections_per_second=v[3],
+        failed_connection_ratio=v[4], syn_ratio=v[5], rst_ratio=v[6],
+        mean_flow_duration=v[7],
+    )
+
+
+def flow_vector(key, ts, v):
+    return FlowFeatureVector(
+        timestamp=ts, window_size=10.0, flow_key=key,
+        packet_count=5, byte_count=500, packets_per_second=v[0],
+        bytes_per_second=np.expm1(v[1]), flow_duration=v[2],
+        inter_arrival_mean=0.1, inter_arrival_variance=0.01,
+        forward_ratio=v[3], protocol=6, syn_ratio=v[4], rst_ratio=v[5],
+    )
+
+
+def same_output(a, b) -> bool:
+    pairs = [
+        (a.host_bin_output, b.host_bin_output),
+        (a.flow_bin_output, b.flow_bin_output),
+        (a.host_multi_output, b.host_multi_output),
+        (a.flow_multi_output, b.flow_multi_output),
+    ]
+    return all(x == y for x, y in pairs)
+
+
+def model_rows(scheduler) -> int:
+    return sum(m.rows for m in (scheduler.host_bin, scheduler.flow_bin))
+
+
+def check_exact(ticks):
+    # rel_tol=0, không TTL: chỉ row y hệt row đã chấm được dùng lại → output không đổi
+    plain = make_scheduler()
+    cached = make_scheduler(VerdictCache(), VerdictCache())
+    n = 0
+    for rows in ticks:
+        for expected, actual in zip(plain.predict(rows), cached.predict(rows)):
+            if not same_output(expected, actual):
+                raise AssertionError(f"exact cache changed output at row {n}")
+            n += 1
+
+    host_stats = cached.host_cache.stats
+    if host_stats.hits == 0:
+        raise AssertionError("identical host rows within a tick should hit")
+    print(f"OK: exact -> {n} rows, host hit rate {host_stats.hit_rate:.2f}, "
+          f"flow hit rate {cached.flow_cache.stats.hit_rate:.2f}")
+
+
+def check_tolerance(ticks):
+    plain = make_scheduler()
+    cached = make_scheduler(
+        VerdictCache(rel_tol=REL_TOL, benign_ttl=BENIGN_TTL),
+        VerdictCache(rel_tol=REL_TOL, benign_ttl=BENIGN_TTL, max_entries=8),
+    )
+    n = agree = 0
+    for rows in ticks:
+        for expected, actual in zip(plain.predict(rows), cached.predict(rows)):
+            agree += expected.flow_bin_output.label == actual.flow_bin_output.label
+            n += 1
+
+    for cache, model in ((cached.host_cache, cached.host_bin), (cached.flow_cache, cached.flow_bin)):
+        stats = cache.stats
+        if stats.hits + stats.misses != n:
+            raise AssertionError(f"hits {stats.hits} + misses {stats.misses} != rows {n}")
+        if model.rows != stats.misses:
+            raise AssertionError(f"model scored {model.rows} rows, cache reported {stats.misses} misses")
+    if len(cached.flow_cache) > 8:
+        raise AssertionError("flow cache exceeded max_entries")
+
+    saved = 1 - model_rows(cached) / model_rows(plain)
+    print(f"OK: rel_tol={REL_TOL} ttl={BENIGN_TTL}s -> {n} rows, "
+          f"host {cached.host_cache.stats}, flow {cached.flow_cache.stats}, "
+          f"binary model rows saved {saved:.0%}, flow label agreement {agree / n:.3f}")
+
+
+def check_ttl():
+    # benign verdict còn trong TTL được dùng lại dù feature đổi hẳn
+    cache = VerdictCache(benign_ttl=BENIGN_TTL)
+    scheduler = make_scheduler(flow_cache=cache)
+    key = FlowKey("10.0.0.1", "10.0.1.1", 80, L4Protocol.TCP, Direction.FORWARD)
+    host = host_vector("10.0.0.1", 0.0, [0.1] * 8)
+
+    first = scheduler.predict([(host, flow_vector(key, 0.0, [0.1] * 8))])[0]
+    label = first.flow_bin_output.label
+    scheduler.predict([(host, flow_vector(key, 1.0, [0.9] * 8))])
+    scheduler.predict([(host, flow_vector(key, 1.0 + BENIGN_TTL, [0.9] * 8))])
+
+    expected_ttl_hits = 1 if label.name == "Benign" else 0
+    if cache.stats.ttl_hits != expected_ttl_hits:
+        raise AssertionError(f"{label.name}: ttl_hits {cache.stats.ttl_hits} != {expected_ttl_hits}")
+    print(f"OK: ttl -> first verdict {label.name}, {cache.stats}")
+
+
+if __name__ == '__main__':
+    ticks = random_rows(random.Random(0))
+    check_exact(ticks)
+    check_tolerance(ticks)
+    check_ttl()
+
+    print('Verdict cache skips only rows within tolerance / benign TTL')